@@ -1,11 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 
-from backend.models.ingestion import ApiIngestionResponse
+from backend.models.ingestion import ApiIngestionJobResponse, ApiIngestionJobStatus, ApiIngestionResponse
+from backend.services.ingestion.checkpoints import CheckpointRegistry
 from backend.services.ingestion.ingestion import DocumentIngestionService
+from backend.services.ingestion.jobs import IngestionJobService
 from backend.services.ingestion.loader import DocumentLoaderService
 from backend.services.ingestion.vector_store import VectorStoreService
 from backend.core.db.weaviate_client import get_weaviate_client
-from backend.graphs.ingestion.graph import document_graph
+from backend.core.redis_client import get_redis_client
+from backend.graphs.ingestion.graph import document_graph, enrichment_graph
 
 router = APIRouter()
 
@@ -13,13 +16,141 @@ def get_ingestion_service(client = Depends(get_weaviate_client)):
     return DocumentIngestionService(
         loader=DocumentLoaderService(),
         graph=document_graph,
-        vector_store=VectorStoreService(client=client)
+        vector_store=VectorStoreService(client=client),
+        enrichment_graph=enrichment_graph
     )
 
-@router.post("/ingest", response_model=ApiIngestionResponse)
+def get_job_service(redis_client = Depends(get_redis_client)):
+    return IngestionJobService(redis_client=redis_client)
+
+@router.post("/ingest", response_model=ApiIngestionJobResponse)
 def injest_document(
     file: UploadFile | None = File(None),
     text: str | None = None,
+    pdf_engine: str | None = None,
+    chunking_strategy: str | None = None,
+    fast_ingest: bool | None = None,
+    streaming: bool | None = None,
+    document_key: str | None = None,
+    jobs: IngestionJobService = Depends(get_job_service)):
+    """Queue the document for the ingestion workers and return the job id right away."""
+    job_id = jobs.enqueue(
+        file=file,
+        text=text,
+        pdf_engine=pdf_engine,
+        chunking_strategy=chunking_strategy,
+        fast_ingest=fast_ingest,
+        streaming=streaming,
+        document_key=document_key
+    )
+    return {"job_id": job_id, "status": "queued"}
+
+
+@router.post("/ingest/bulk", response_model=ApiIngestionJobResponse)
+def injest_documents_bulk(
+    files: list[UploadFile] = File(...),
+    pdf_engine: str | None = None,
+    chunking_strategy: str | None = None,
+    fast_ingest: bool | None = None,
+    jobs: IngestionJobService = Depends(get_job_service)):
+    """Queue many PDFs/text files (or zip archives of them) as one bulk job with shared embedding batches."""
+    job_id = jobs.enqueue_bulk(
+        files,
+        pdf_engine=pdf_engine,
+        chunking_strategy=chunking_strategy,
+        fast_ingest=fast_ingest
+    )
+    return {"job_id": job_id, "status": "queued"}
+
+
+@router.post("/ingest/sync", response_model=ApiIngestionResponse)
+def injest_document_sync(
+    file: UploadFile | None = File(None),
+    text: str | None = None,
+    pdf_engine: str | None = None,
+    chunking_strategy: str | None = None,
+    fast_ingest: bool | None = None,
+    streaming: bool | None = None,
+    document_key: str | None = None,
     service: DocumentIngestionService = Depends(get_ingestion_service)):
 
-    return service.ingest_document(file=file, text=text)
+    return service.ingest_document(
+        file=file,
+        text=text,
+        pdf_engine=pdf_engine,
+        chunking_strategy=chunking_strategy,
+        fast_ingest=fast_ingest,
+        streaming=streaming,
+        document_key=document_key
+    )
+
+
+@router.post("/reingest/{document_id}", response_model=ApiIngestionJobResponse)
+def reingest_document(
+    document_id: str,
+    file: UploadFile | None = File(None),
+    text: str | None = None,
+    pdf_engine: str | None = None,
+    chunking_strategy: str | None = None,
+    fast_ingest: bool | None = None,
+    jobs: IngestionJobService = Depends(get_job_service)):
+
+    job_id = jobs.enqueue(
+        file=file,
+        text=text,
+        document_id=document_id,
+        pdf_engine=pdf_engine,
+        chunking_strategy=chunking_strategy,
+        fast_ingest=fast_ingest
+    )
+    return {"job_id": job_id, "status": "queued"}
+
+
+@router.post("/reingest/{document_id}/sync", response_model=ApiIngestionResponse)
+def reingest_document_sync(
+    document_id: str,
+    file: UploadFile | None = File(None),
+    text: str | None = None,
+    pdf_engine: str | None = None,
+    chunking_strategy: str | None = None,
+    fast_ingest: bool | None = None,
+    service: DocumentIngestionService = Depends(get_ingestion_service)):
+
+    return service.reingest_document(
+        document_id=document_id,
+        file=file,
+        text=text,
+        pdf_engine=pdf_engine,
+        chunking_strategy=chunking_strategy,
+        fast_ingest=fast_ingest
+    )
+
+
+@router.post("/resume/{document_id}", response_model=ApiIngestionJobResponse)
+def resume_document(document_id: str, jobs: IngestionJobService = Depends(get_job_service)):
+    """Queue a failed ingestion to continue from its last checkpoint."""
+    job_id = jobs.enqueue_resume(document_id)
+    return {"job_id": job_id, "status": "queued"}
+
+
+@router.get("/checkpoints")
+def list_checkpoints():
+    """Ingestions that still have checkpoints: running, or failed and resumable."""
+    return CheckpointRegistry().list_threads()
+
+
+@router.post("/checkpoints/gc")
+def collect_checkpoint_garbage(max_age_hours: float | None = None):
+    """Delete the checkpoints of ingestions not updated for max_age_hours (default INGEST_CHECKPOINT_TTL_SECONDS)."""
+    max_age_seconds = int(max_age_hours * 3600) if max_age_hours is not None else None
+    return {"deleted": CheckpointRegistry().collect_garbage(max_age_seconds)}
+
+
+@router.get("/jobs/{job_id}", response_model=ApiIngestionJobStatus)
+def get_ingestion_job(job_id: str, jobs: IngestionJobService = Depends(get_job_service)):
+    """Job status with the stages finished so far and their timings."""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job_id: {job_id}")
+    job["document_id"] = job.get("document_id") or (job["result"] or {}).get("document_id")
+    return job
@@ -16,17 +16,95 @@ class Config(BaseSettings):
     text_embedding_model: str = "text-embedding-3-large"
     llm_model: str = "gemini-2.5-flash"
 
+    # PDF extraction configuration
+    pdf_extraction_engine: str = "pdfplumber"  # pdfplumber | pypdf | pymupdf | pdfium
+    pdf_extraction_workers: int = 1          # Processes extracting page ranges
+    pdf_pages_per_task: int = 20             # Pages handed to a worker per task
+    pdf_page_timeout_seconds: int = 30       # A page taking longer is yielded as empty text; 0 extracts in-process without a limit
+
     # Chunking configuration
     min_chunk_size: int = 500
     max_chunk_size: int = 2000
+    chunking_strategy: str = "recursive"     # recursive | structure (heading-derived breadcrumbs)
 
     # Weaviate configuration
     weaviate_host: str = "localhost"
     weaviate_port: int = 8080
     weaviate_collection_name: str = "Chunk"
+    weaviate_batch_max_bytes: int = 8 * 1024 * 1024       # Below the server's 10 MB gRPC message limit
+    weaviate_batch_initial_bytes: int = 1024 * 1024       # Starting size; adapted to the observed latency
+    weaviate_batch_target_latency_seconds: float = 2.0    # Batches grow while faster than this, shrink when slower
+    weaviate_batch_in_flight: int = 4                     # Batches sent concurrently
+    weaviate_batch_max_retries: int = 3                   # Then the remaining failed objects are reported
+    weaviate_update_concurrency: int = 16                 # Partial updates in flight (position refresh on re-ingest)
+    weaviate_multi_tenancy: bool = False                  # Each document is a tenant with its own index (needs a new collection)
+    weaviate_tenant_idle_minutes: int = 30                # Tenants not queried for this long are deactivated
+    weaviate_idle_tenant_status: str = "INACTIVE"         # INACTIVE (kept on disk) | OFFLOADED (needs an offload module)
+    weaviate_tenant_sweep_seconds: int = 60               # How often the API looks for idle tenants
+
+    # Vector index configuration (the quantizer is fixed at collection creation; ef and rescore limit update at startup)
+    vector_index_quantizer: str = "none"          # none | pq | bq | sq
+    vector_index_ef: int = -1                     # Search list size; -1 sizes it from the query limit (dynamic ef)
+    vector_index_ef_construction: int = 128       # Build-time list size: better graph vs slower ingest
+    vector_index_max_connections: int = 32
+    vector_index_rescore_limit: int = 200         # bq/sq: candidates re-ranked with the uncompressed vectors
+    vector_index_pq_segments: int = 0             # pq: 0 keeps Weaviate's default for the dimension
+    vector_index_training_limit: int = 100_000    # pq/sq: objects sampled to fit the codebook
+
+    # Embedding configuration
+    embedding_provider: str = "azure"          # azure | local; recorded on the collection, so changing it needs a new collection
+    local_embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"  # sentence-transformers model for the local provider
+    local_embedding_backend: str = "torch"     # torch | onnx (needs optimum[onnxruntime])
+    local_embedding_batch_size: int = 64       # Texts per forward pass on CPU
+    local_embedding_workers: int = 2           # Batches encoded in parallel; keep workers x torch threads <= cores
+    embedding_max_batch_tokens: int = 100_000  # Per-request token budget used to pack batches
+    embedding_max_batch_size: int = 2048       # Provider's per-request input limit
+    embedding_concurrency: int = 4             # Batches in flight
+    embedding_max_attempts: int = 5
+    embedding_dimensions: int = 0              # ANN vector size, e.g. 256 or 1024 (Matryoshka, text-embedding-3 only); 0 keeps the full 3072. Changing it needs a new collection
+    embedding_store_full_vector: bool = True   # With reduced dimensions, keep the full vector as a BLOB for rescoring
+    embedding_rescore_candidates: int = 50     # Reduced-dimension candidates rescored with full vectors per query
 
     # Contextual retrieval configuration
-    contextual_retrieval_concurrency: int = 50
+    contextual_retrieval_concurrency: int = 50          # Upper bound for the adaptive limit
+    contextual_retrieval_initial_concurrency: int = 10  # Starting point; grows on success, halves on 429/5xx
+    contextual_retrieval_max_attempts: int = 5          # Then the chunk is stored without LLM context
+    contextual_retrieval_max_backoff_seconds: int = 60
+    contextual_retrieval_batch_size: int = 1  # Chunks per request; > 1 enables batched prompts
+    fast_ingest: bool = False                # Skip the LLM context step entirely
+    contextual_window_tokens: int = 100_000          # Larger documents get one cache per window (outline + section)
+    contextual_outline_max_tokens: int = 4_000       # Size cap of the document outline in each window
+    contextual_cache_min_tokens: int = 1_024         # Smaller windows are sent inline instead of cached
+
+    # Ingestion result cache configuration (contextualization + embeddings)
+    ingest_cache_enabled: bool = True
+    ingest_cache_ttl_seconds: int = 30 * 24 * 3600  # 30 days, refreshed on every hit
+    ingest_cache_max_entries: int = 200_000          # LRU eviction beyond this
+    contextual_prompt_version: str = "v1"            # Bump when the context prompt changes
+
+    # Streaming ingestion configuration
+    ingest_mode: str = "graph"              # graph (stage barriers) | streaming (pipelined)
+    streaming_queue_size: int = 64          # Bound on chunks waiting between stages
+    streaming_embed_batch_size: int = 256   # Chunks gathered per embedding call
+    streaming_store_batch_size: int = 64    # Chunks handed to the Weaviate batch writer at a time
+    streaming_linger_seconds: float = 0.5   # Max wait to fill a batch before sending it
+
+    # Ingestion job queue configuration
+    ingest_upload_dir: str = "/tmp/advanced_rag_uploads"  # Must be shared by the API and the workers
+    ingest_worker_processes: int = 2                    # Default for `--processes`
+    ingest_queue_poll_seconds: int = 5                  # Worker blocking-pop timeout
+    ingest_worker_heartbeat_seconds: int = 10           # How often a worker refreshes its heartbeat
+    ingest_worker_heartbeat_ttl_seconds: int = 60       # A worker silent for this long is dead; its jobs are requeued
+    ingest_job_max_attempts: int = 3                    # Then a job whose worker keeps dying is marked as error
+    ingest_reaper_interval_seconds: int = 15            # How often the worker parent restarts dead workers and requeues jobs
+    ingest_job_ttl_seconds: int = 7 * 24 * 3600         # Job status kept for 7 days
+    bulk_ingest_concurrency: int = 4                    # Documents loaded/contextualized at once in a bulk run
+    bulk_zip_max_bytes: int = 2 * 1024 ** 3             # Archives whose .pdf/.txt members exceed this uncompressed are rejected
+
+    # Ingestion checkpoint configuration
+    ingest_checkpointing_enabled: bool = True
+    ingest_checkpoint_path: str = "/tmp/advanced_rag_checkpoints.sqlite"  # Must be shared by the API and the workers
+    ingest_checkpoint_ttl_seconds: int = 3 * 24 * 3600              # Failed ingestions stay resumable this long
 
     # Redis configuration
     redis_host: str = "localhost"
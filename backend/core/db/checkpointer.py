@@ -0,0 +1,73 @@
+import atexit
+import logging
+import os
+import sqlite3
+from typing import Optional
+
+from backend.core.config import config
+
+logger = logging.getLogger(__name__)
+
+try:
+    from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+    from langgraph.checkpoint.sqlite import SqliteSaver
+except ImportError:  # langgraph-checkpoint-sqlite is optional; ingestion then runs without checkpoints
+    SqliteSaver = None
+
+
+def connect_checkpoint_db() -> sqlite3.Connection:
+    """Connection to the checkpoint database, shareable across threads and safe for several worker processes."""
+    directory = os.path.dirname(config.ingest_checkpoint_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(config.ingest_checkpoint_path, check_same_thread=False, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+class CheckpointerManager:
+    '''
+    Singleton SQLite checkpointer for the ingestion graph.
+    Every node's output is saved under the document's thread id, so a failed
+    ingestion can resume from the last completed node.
+    '''
+
+    _instance: Optional["SqliteSaver"] = None
+    _conn: Optional[sqlite3.Connection] = None
+
+    @classmethod
+    def get_checkpointer(cls) -> Optional["SqliteSaver"]:
+        if not config.ingest_checkpointing_enabled:
+            return None
+        if SqliteSaver is None:
+            logger.warning("langgraph-checkpoint-sqlite is not installed; ingestion runs without checkpoints")
+            return None
+        if cls._instance is None:
+            cls._conn = connect_checkpoint_db()
+            serde = JsonPlusSerializer(
+                pickle_fallback=False,
+                allowed_msgpack_modules=[
+                    ("backend.graphs.ingestion.state", "ChunkRecord"),
+                    ("backend.graphs.ingestion.state", "LineIndexedText"),
+                ],
+            )
+            cls._instance = SqliteSaver(cls._conn, serde=serde)
+            cls._instance.setup()
+        return cls._instance
+
+    @classmethod
+    def close(cls) -> None:
+        if cls._conn is not None:
+            try:
+                cls._conn.close()
+            finally:
+                cls._conn = None
+                cls._instance = None
+
+
+def get_checkpointer() -> Optional["SqliteSaver"]:
+    return CheckpointerManager.get_checkpointer()
+
+
+# Auto-cleanup on app exit
+atexit.register(CheckpointerManager.close)
@@ -0,0 +1,295 @@
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import weaviate
+from weaviate.classes.config import Configure, DataType, Property, Reconfigure, Tokenization
+
+from backend.core.config import config
+from backend.core.db.weaviate_client import get_weaviate_client
+from backend.utils.vectors import MATRYOSHKA_MODELS, embedding_identity, supports_truncation
+
+logger = logging.getLogger(__name__)
+
+# The applied schema version and the embedding provider:model[:dimensions] are kept in the collection description
+SCHEMA_VERSION_PATTERN = re.compile(r"schema_version=(\d+)")
+EMBEDDING_PATTERN = re.compile(r"embedding=([^,)\s]+)")
+COLLECTION_DESCRIPTION = "Contextualized document chunks (schema_version={version}, embedding={embedding})"
+
+
+def _id_property(name: str, filterable: bool = True) -> Property:
+    """Exact-match text (ids, hashes, names): one token per value, never BM25-searched."""
+    return Property(
+        name=name,
+        data_type=DataType.TEXT,
+        tokenization=Tokenization.FIELD,
+        index_filterable=filterable,
+        index_searchable=False,
+    )
+
+
+def _text_property(name: str, searchable: bool) -> Property:
+    """Free text: BM25-searchable or stored only; never used in filters."""
+    return Property(name=name, data_type=DataType.TEXT, index_filterable=False, index_searchable=searchable)
+
+
+def _int_property(name: str, filterable: bool = False) -> Property:
+    return Property(
+        name=name,
+        data_type=DataType.INT,
+        index_filterable=filterable,
+        index_range_filters=filterable,
+    )
+
+
+def contextualized_text(context: Optional[str], content: Optional[str]) -> str:
+    """The text given to the LLM and the reranker; derived from context + content, never stored."""
+    return f"{context}\n\n{content}" if context else (content or "")
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    properties: List[Property] = field(default_factory=list)  # Migrations are additive: they only add properties
+    # No longer written or read; Weaviate cannot drop a property, so existing objects keep the old values
+    retired: List[str] = field(default_factory=list)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        version=1,
+        description="Chunk text, ids and provenance with explicit filterable/searchable indexes",
+        properties=[
+            _id_property("chunk_id"),
+            _id_property("document_id"),
+            _id_property("document_name"),
+            _id_property("content_hash", filterable=False),
+            _id_property("chunk_type"),
+            # BM25 runs over these
+            _text_property("content", searchable=True),
+            _text_property("context", searchable=True),
+            _text_property("breadcrumbs", searchable=True),
+            # content + context again; retired in version 3
+            _text_property("contextualized_chunk", searchable=False),
+            _int_property("page_number", filterable=True),
+            _int_property("end_page_number"),
+            _int_property("line_number"),
+            _int_property("end_line_number"),
+            _int_property("start_offset"),
+            _int_property("end_offset"),
+        ],
+    ),
+    Migration(
+        version=2,
+        description="Full-dimension embedding for rescoring reduced-dimension candidates",
+        properties=[
+            # float32 bytes; only fetched when rescoring, never indexed
+            Property(name="full_embedding", data_type=DataType.BLOB),
+        ],
+    ),
+    Migration(
+        version=3,
+        description="Stop storing contextualized_chunk; it is derived from context + content at read time",
+        retired=["contextualized_chunk"],
+    ),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+RETIRED_PROPERTIES = {name for migration in MIGRATIONS for name in migration.retired}
+
+# Properties of a new collection
+CURRENT_PROPERTIES = [
+    prop for migration in MIGRATIONS for prop in migration.properties if prop.name not in RETIRED_PROPERTIES
+]
+
+QUANTIZERS = ("none", "pq", "bq", "sq")
+# Quantizer config classes returned by collection.config.get()
+_QUANTIZER_NAMES = {"_PQConfig": "pq", "_BQConfig": "bq", "_SQConfig": "sq", "_RQConfig": "rq"}
+
+
+def _quantizer(quantizer: str, rescore_limit: int, training_limit: int, pq_segments: int):
+    if quantizer == "none":
+        return None
+    if quantizer == "pq":
+        return Configure.VectorIndex.Quantizer.pq(segments=pq_segments or None, training_limit=training_limit)
+    if quantizer == "bq":
+        return Configure.VectorIndex.Quantizer.bq(rescore_limit=rescore_limit)
+    if quantizer == "sq":
+        return Configure.VectorIndex.Quantizer.sq(rescore_limit=rescore_limit, training_limit=training_limit)
+    raise ValueError(f"Unknown vector index quantizer: {quantizer}. Use one of {', '.join(QUANTIZERS)}")
+
+
+def vector_index_config(quantizer: Optional[str] = None, ef: Optional[int] = None,
+                        ef_construction: Optional[int] = None, rescore_limit: Optional[int] = None,
+                        training_limit: Optional[int] = None):
+    """HNSW settings for a new collection; arguments override the configured values (used by the benchmark)."""
+    return Configure.VectorIndex.hnsw(
+        ef=ef if ef is not None else config.vector_index_ef,
+        ef_construction=ef_construction or config.vector_index_ef_construction,
+        max_connections=config.vector_index_max_connections,
+        quantizer=_quantizer(
+            (quantizer or config.vector_index_quantizer).lower(),
+            rescore_limit or config.vector_index_rescore_limit,
+            training_limit or config.vector_index_training_limit,
+            config.vector_index_pq_segments,
+        ),
+    )
+
+
+def schema_version(description: Optional[str]) -> int:
+    """Version recorded in a collection description; 0 for collections created before versioning."""
+    match = SCHEMA_VERSION_PATTERN.search(description or "")
+    return int(match.group(1)) if match else 0
+
+
+def collection_embedding(description: Optional[str]) -> str:
+    """Embedding identity recorded in a collection description; collections created before it used full-length Azure vectors."""
+    match = EMBEDDING_PATTERN.search(description or "")
+    return match.group(1) if match else embedding_identity("azure", dimensions=0)
+
+
+class SchemaManager:
+    '''
+    Creates the chunk collection and applies pending migrations once per process,
+    at application or worker startup, instead of on every VectorStoreService.
+    A new collection is created at the latest version; an existing one gets the
+    properties of every migration newer than the version in its description.
+    The description also records the embedding provider:model and vector size, and startup
+    fails when the configured one differs, so queries never mix vector spaces. A reduced size
+    is refused for models that were not trained for Matryoshka truncation.
+    '''
+
+    _ready: bool = False
+
+    @classmethod
+    def ensure_schema(cls, client: Optional[weaviate.WeaviateClient] = None) -> int:
+        """Bring the collection to SCHEMA_VERSION and return the version it was at."""
+        if config.embedding_dimensions and not supports_truncation():
+            raise RuntimeError(
+                f"EMBEDDING_DIMENSIONS={config.embedding_dimensions} needs a Matryoshka model "
+                f"({', '.join(MATRYOSHKA_MODELS)}) but {embedding_identity(dimensions=0)} is configured; "
+                f"set EMBEDDING_DIMENSIONS=0 to store full-length vectors"
+            )
+        client = client or get_weaviate_client()
+        name = config.weaviate_collection_name
+
+        if not client.collections.exists(name):
+            try:
+                client.collections.create(
+                    name=name,
+                    description=COLLECTION_DESCRIPTION.format(version=SCHEMA_VERSION, embedding=embedding_identity()),
+                    properties=CURRENT_PROPERTIES,
+                    vector_index_config=vector_index_config(),
+                    # Fixed at creation: switching modes needs a new collection name
+                    multi_tenancy_config=Configure.multi_tenancy(
+                        enabled=True, auto_tenant_creation=True, auto_tenant_activation=True
+                    ) if config.weaviate_multi_tenancy else None,
+                )
+                logger.info("Created collection %s at schema version %d", name, SCHEMA_VERSION)
+                return SCHEMA_VERSION
+            except Exception:
+                # Another process (API or worker) created it first
+                if not client.collections.exists(name):
+                    raise
+
+        collection = client.collections.get(name)
+        current = collection.config.get()
+        version = schema_version(current.description)
+        multi_tenancy = bool(current.multi_tenancy_config and current.multi_tenancy_config.enabled)
+        if multi_tenancy != config.weaviate_multi_tenancy:
+            raise RuntimeError(
+                f"Collection {name} was created {'with' if multi_tenancy else 'without'} multi-tenancy; "
+                f"set WEAVIATE_COLLECTION_NAME to a new collection to change the storage mode"
+            )
+        embedding = collection_embedding(current.description)
+        if embedding != embedding_identity():
+            raise RuntimeError(
+                f"Collection {name} holds {embedding} embeddings but {embedding_identity()} is configured; "
+                f"set WEAVIATE_COLLECTION_NAME to a new collection to change the embedding provider, model or dimensions"
+            )
+        if version > SCHEMA_VERSION:
+            raise RuntimeError(
+                f"Collection {name} is at schema version {version}, newer than this code ({SCHEMA_VERSION})"
+            )
+
+        existing = {prop.name: prop for prop in current.properties}
+        for migration in MIGRATIONS:
+            if migration.version <= version:
+                continue
+            for prop in migration.properties:
+                if prop.name not in existing and prop.name not in RETIRED_PROPERTIES:
+                    collection.config.add_property(prop)
+            logger.info("Applied schema migration %d to %s: %s", migration.version, name, migration.description)
+        if version < SCHEMA_VERSION or EMBEDDING_PATTERN.search(current.description or "") is None:
+            collection.config.update(
+                description=COLLECTION_DESCRIPTION.format(version=SCHEMA_VERSION, embedding=embedding)
+            )
+        cls._warn_index_drift(name, existing)
+        cls._update_vector_index(collection, current)
+        return version
+
+    @staticmethod
+    def _update_vector_index(collection, current) -> None:
+        """Apply the mutable vector index settings (ef, rescore limit); the quantizer only applies to new collections."""
+        index = current.vector_index_config
+        if index is None:
+            return
+        quantizer = config.vector_index_quantizer.lower()
+        current_quantizer = _QUANTIZER_NAMES.get(type(index.quantizer).__name__, "none")
+        if current_quantizer != quantizer:
+            logger.warning(
+                "Collection %s keeps its %s vector index; VECTOR_INDEX_QUANTIZER=%s applies to new collections",
+                current.name, current_quantizer, quantizer,
+            )
+        update = {}
+        if index.ef != config.vector_index_ef:
+            update["ef"] = config.vector_index_ef
+        rescore_limit = getattr(index.quantizer, "rescore_limit", None)
+        if current_quantizer == quantizer and rescore_limit not in (None, config.vector_index_rescore_limit):
+            update["quantizer"] = (
+                Reconfigure.VectorIndex.Quantizer.bq(rescore_limit=config.vector_index_rescore_limit)
+                if quantizer == "bq"
+                else Reconfigure.VectorIndex.Quantizer.sq(rescore_limit=config.vector_index_rescore_limit)
+            )
+        if update:
+            collection.config.update(vector_index_config=Reconfigure.VectorIndex.hnsw(**update))
+            logger.info("Updated vector index of %s: %s", current.name, sorted(update))
+
+    @staticmethod
+    def _warn_index_drift(name: str, existing: dict) -> None:
+        """Index settings of an existing property cannot be changed in place; report the ones that differ."""
+        declared = {prop.name: prop for prop in CURRENT_PROPERTIES}
+        drifted = [
+            prop_name for prop_name, prop in existing.items()
+            if prop_name in declared and any(
+                wanted is not None and getattr(prop, attribute) != wanted
+                for attribute, wanted in (
+                    ("index_filterable", declared[prop_name].indexFilterable),
+                    ("index_searchable", declared[prop_name].indexSearchable),
+                )
+            )
+        ]
+        if drifted:
+            logger.warning(
+                "Properties of %s keep their previous index settings (recreate the collection to apply them): %s",
+                name, ", ".join(sorted(drifted)),
+            )
+
+    @classmethod
+    def setup(cls, client: Optional[weaviate.WeaviateClient] = None) -> None:
+        """
+        Ensure the schema once per process.
+        Call this during app and worker startup; raises if Weaviate is unavailable.
+        """
+        if cls._ready:
+            return
+        try:
+            previous = cls.ensure_schema(client)
+            cls._ready = True
+            print(f"✓ Weaviate schema at version {SCHEMA_VERSION} (was {previous})")
+        except Exception as e:
+            print(f"✗ Weaviate schema setup failed: {str(e)}")
+            raise
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional
+
+import weaviate
+from weaviate.classes.tenants import Tenant, TenantActivityStatus
+
+from backend.core.config import config
+from backend.core.db.weaviate_client import get_weaviate_client
+from backend.core.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+def tenant_name(document_id: str) -> str:
+    """Tenant holding a document's chunks. One tenant per document; ids are valid tenant names."""
+    return document_id
+
+
+class TenantManager:
+    '''
+    Hot/cold tenant lifecycle for the multi-tenant chunk collection.
+    Every query and ingest records the tenant's last access in a Redis sorted set
+    shared by the API and the workers. A tenant missing from the set is treated as
+    cold and activated (or created, for ingestion) before use; a periodic sweep
+    deactivates or offloads tenants idle for longer than the configured time, so
+    only recently used indexes stay resident.
+    '''
+    LAST_ACCESS_KEY = "weaviate_tenants:last_access"
+    SWEEP_LOCK_KEY = "weaviate_tenants:sweep_lock"
+
+    def __init__(self, client: Optional[weaviate.WeaviateClient] = None, redis_client=None):
+        self.client = client or get_weaviate_client()
+        self.redis_client = redis_client or get_redis_client()
+        self.collection_name = config.weaviate_collection_name
+
+    @property
+    def collection(self):
+        return self.client.collections.get(self.collection_name)
+
+    def touch(self, name: str) -> None:
+        self.redis_client.zadd(self.LAST_ACCESS_KEY, {name: time.time()})
+
+    def ensure_active(self, name: str, create: bool = False) -> bool:
+        """
+        Make sure the tenant is active before it is used. Returns False when it does not
+        exist and `create` is False (an unknown document).
+        """
+        if self.redis_client.zscore(self.LAST_ACCESS_KEY, name) is not None:
+            # Used recently, so still active (auto activation covers a concurrent sweep)
+            self.touch(name)
+            return True
+
+        tenants = self.collection.tenants
+        tenant = tenants.get_by_name(name)
+        if tenant is None:
+            if not create:
+                return False
+            tenants.create(Tenant(name=name))
+        elif tenant.activity_status != TenantActivityStatus.ACTIVE:
+            started = time.perf_counter()
+            tenants.update(Tenant(name=name, activity_status=TenantActivityStatus.ACTIVE))
+            logger.info("Activated tenant %s in %.2fs", name, time.perf_counter() - started)
+        self.touch(name)
+        return True
+
+    def deactivate_idle(self, idle_seconds: Optional[int] = None) -> List[str]:
+        """Move tenants not used for idle_seconds to the configured cold status. Returns their names."""
+        idle_seconds = config.weaviate_tenant_idle_minutes * 60 if idle_seconds is None else idle_seconds
+        cutoff = time.time() - idle_seconds
+        idle = self.redis_client.zrangebyscore(self.LAST_ACCESS_KEY, "-inf", cutoff)
+        if not idle:
+            return []
+
+        status = TenantActivityStatus[config.weaviate_idle_tenant_status.upper()]
+        self.collection.tenants.update([Tenant(name=name, activity_status=status) for name in idle])
+        # Only forget tenants that were not used while they were being deactivated
+        pipe = self.redis_client.pipeline()
+        for name in idle:
+            pipe.zscore(self.LAST_ACCESS_KEY, name)
+        scores = pipe.execute()
+        stale = [name for name, score in zip(idle, scores) if score is not None and score <= cutoff]
+        if stale:
+            self.redis_client.zrem(self.LAST_ACCESS_KEY, *stale)
+        logger.info("Set %d idle tenants to %s", len(idle), status.value)
+        return idle
+
+    def active_count(self) -> int:
+        return self.redis_client.zcard(self.LAST_ACCESS_KEY)
+
+    def _claim_sweep(self, interval: int) -> bool:
+        """Take the sweep for this interval; False when another process already has it."""
+        return bool(self.redis_client.set(self.SWEEP_LOCK_KEY, "1", nx=True, ex=max(1, interval - 1)))
+
+    async def run_sweeper(self) -> None:
+        """Background task for the API lifespan: one process per interval deactivates idle tenants."""
+        interval = config.weaviate_tenant_sweep_seconds
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await asyncio.to_thread(self._claim_sweep, interval):
+                    await asyncio.to_thread(self.deactivate_idle)
+            except Exception as e:
+                logger.warning("Idle tenant sweep failed: %s", e)
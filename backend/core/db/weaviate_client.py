@@ -39,5 +39,44 @@ def get_weaviate_client() -> weaviate.WeaviateClient:
     return WeaviateClientManager.get_client()
 
 
+class AsyncWeaviateClientManager:
+    '''
+    Async client for the API's query path. It is bound to the event loop that connects it,
+    so it is connected in the FastAPI lifespan (or on first use) and closed at shutdown.
+    '''
+
+    _instance: Optional[weaviate.WeaviateAsyncClient] = None
+
+    @classmethod
+    async def get_client(cls) -> weaviate.WeaviateAsyncClient:
+        if cls._instance is None:
+            cls._instance = await cls._create_client()
+        return cls._instance
+
+    @classmethod
+    async def _create_client(cls) -> weaviate.WeaviateAsyncClient:
+        try:
+            client = weaviate.use_async_with_local(
+                host=config.weaviate_host,
+                port=config.weaviate_port,
+            )
+            await client.connect()
+            return client
+        except Exception as e:
+            raise ConnectionError(f"Failed to connect to Weaviate: {str(e)}")
+
+    @classmethod
+    async def close_client(cls) -> None:
+        if cls._instance is not None:
+            try:
+                await cls._instance.close()
+            finally:
+                cls._instance = None
+
+
+async def get_async_weaviate_client() -> weaviate.WeaviateAsyncClient:
+    return await AsyncWeaviateClientManager.get_client()
+
+
 # Auto-cleanup on app exit
 atexit.register(WeaviateClientManager.close_client)
@@ -1,4 +1,4 @@
-from openai import AzureOpenAI
+from openai import AsyncAzureOpenAI, AzureOpenAI
 from typing import Optional
 from backend.core.config import config
 
@@ -31,4 +31,38 @@ class EmbeddingClientManager:
 
 
 def get_embedding_client() -> AzureOpenAI:
-    return EmbeddingClientManager.get_client()
\ No newline at end of file
+    return EmbeddingClientManager.get_client()
+
+
+class AsyncEmbeddingClientManager:
+
+    _instance: Optional[AsyncAzureOpenAI] = None
+
+    @classmethod
+    def get_client(cls) -> AsyncAzureOpenAI:
+        if cls._instance is None:
+            cls._instance = cls._create_client()
+        return cls._instance
+
+    @classmethod
+    def _create_client(cls) -> AsyncAzureOpenAI:
+        try:
+            return AsyncAzureOpenAI(
+                api_key=config.azure_openai_api_key,
+                api_version=config.azure_api_version,
+                azure_endpoint=config.azure_openai_endpoint
+            )
+        except Exception as e:
+            raise ConnectionError(f"Failed to initialize OpenAI client: {str(e)}")
+
+    @classmethod
+    async def close_client(cls) -> None:
+        if cls._instance is not None:
+            try:
+                await cls._instance.close()
+            finally:
+                cls._instance = None
+
+
+def get_async_embedding_client() -> AsyncAzureOpenAI:
+    return AsyncEmbeddingClientManager.get_client()
@@ -1,5 +1,6 @@
 import atexit
 import redis
+import redis.asyncio
 from typing import Optional
 from backend.core.config import config
 
@@ -66,5 +67,39 @@ def get_redis_client() -> redis.Redis:
     return RedisClientManager.get_client()
 
 
+class AsyncRedisClientManager:
+    """
+    Singleton asyncio Redis client for the API's async request path.
+    Connections are opened lazily on the running event loop and closed at shutdown.
+    """
+
+    _instance: Optional[redis.asyncio.Redis] = None
+
+    @classmethod
+    def get_client(cls) -> redis.asyncio.Redis:
+        if cls._instance is None:
+            cls._instance = redis.asyncio.Redis(
+                host=config.redis_host,
+                port=config.redis_port,
+                db=config.redis_db,
+                decode_responses=True,
+                socket_connect_timeout=5,
+                socket_keepalive=True,
+            )
+        return cls._instance
+
+    @classmethod
+    async def close_client(cls) -> None:
+        if cls._instance is not None:
+            try:
+                await cls._instance.aclose()
+            finally:
+                cls._instance = None
+
+
+def get_async_redis_client() -> redis.asyncio.Redis:
+    return AsyncRedisClientManager.get_client()
+
+
 # Auto-cleanup on app exit
 atexit.register(RedisClientManager.close_client)
@@ -1,4 +1,4 @@
-from tavily import TavilyClient
+from tavily import AsyncTavilyClient, TavilyClient
 from backend.core.config import config
 
 
@@ -10,5 +10,11 @@ def get_tavily_client() -> TavilyClient:
     return TavilyClient(api_key=config.tavily_api_key)
 
 
-# Create a singleton instance
+def get_async_tavily_client() -> AsyncTavilyClient:
+    """Async client for the async retrieval path."""
+    return AsyncTavilyClient(api_key=config.tavily_api_key)
+
+
+# Create singleton instances
 tavily_client = get_tavily_client()
+async_tavily_client = get_async_tavily_client()
@@ -3,6 +3,7 @@ from backend.graphs.ingestion.state import ChunkData, RagIngestState
 from backend.graphs.ingestion.nodes.chunk_node import chunk_node
 from backend.graphs.ingestion.nodes.contextual_retrival import contextual_retrival_node
 from backend.graphs.ingestion.nodes.embed import embedd
+from backend.core.db.checkpointer import get_checkpointer
 
 graph = StateGraph(RagIngestState)
 
@@ -16,4 +17,17 @@ graph.add_node("embedd",embedd)
 graph.add_edge("contextual_retrival_node", "embedd")
 
 graph.set_finish_point("embedd")
-document_graph = graph.compile()
\ No newline at end of file
+# Checkpoints every node's output so a failed ingestion can resume (None when checkpointing is off)
+document_graph = graph.compile(checkpointer=get_checkpointer())
+
+# Re-ingest: the service chunks and diffs first, then only changed chunks are enriched
+enrichment = StateGraph(RagIngestState)
+
+enrichment.add_node("contextual_retrival_node",contextual_retrival_node)
+enrichment.set_entry_point("contextual_retrival_node")
+
+enrichment.add_node("embedd",embedd)
+enrichment.add_edge("contextual_retrival_node", "embedd")
+
+enrichment.set_finish_point("embedd")
+enrichment_graph = enrichment.compile()
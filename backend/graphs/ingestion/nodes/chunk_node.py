@@ -1,14 +1,53 @@
 import uuid
+import hashlib
 import logging
 import re
-from typing import List
+from array import array
+from bisect import bisect_right
+from typing import List, Optional, Sequence
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from backend.graphs.ingestion.state import RagIngestState, ChunkData
+from backend.graphs.ingestion.state import RagIngestState, ChunkData, ChunkRecord, LineIndexedText
 from backend.core.config import config
 from backend.utils.decorators import track_execution_time
 
 logger = logging.getLogger(__name__)
 
+# Heading patterns for the structure-aware chunker, one per kind. Levels: part > chapter > article/section.
+_HEADING_PATTERN = re.compile(
+    r"^[ \t]*(?:"
+    r"(?P<markdown>#{1,6})[ \t]+\S[^\n]*"
+    r"|(?P<part>(?:PART|Part)[ \t]+(?:\d+|[IVXLCDM]+)\b[^\n]*)"
+    r"|(?P<schedule>(?:SCHEDULE|Schedule)[ \t-]+\w+\b[^\n]*)"
+    r"|(?P<chapter>(?:CHAPTER|Chapter)[ \t]+(?:\d+|[IVXLCDM]+)\b[^\n]*)"
+    r"|(?P<article>(?:ARTICLE|Article)[ \t]+\d+[A-Za-z]?\b[^\n]*)"
+    r"|(?P<section>(?:SECTION|Section)[ \t]+\d+[A-Za-z]?\b[^\n]*)"
+    r"|(?P<numbered>\d+[A-Z]?\.[ \t]+[A-Z][^.:\n]{2,80}:)[^\n]*"
+    r")$",
+    re.MULTILINE,
+)
+_HEADING_LEVELS = {"part": 1, "schedule": 1, "chapter": 2, "article": 3, "section": 3, "numbered": 3}
+_DEFINITION_TITLE = re.compile(r"\b(definitions?|interpretation)\b", re.IGNORECASE)
+_MAX_BREADCRUMB_TITLE = 80
+
+
+class TextOffsetIndex:
+    '''
+    Prefix-sum index over the items (pages or lines) merged into one text.
+    `starts[i]` is the offset at which item i begins; `pages[i]` / `lines[i]` hold its page and line number.
+    '''
+    __slots__ = ("starts", "pages", "lines")
+
+    def __init__(self, starts: Sequence[int], pages: Optional[Sequence] = None, lines: Optional[Sequence] = None):
+        self.starts = starts
+        self.pages = pages
+        self.lines = lines
+
+    def locate(self, offset: int) -> tuple[Optional[int], Optional[int]]:
+        """Return (page_number, line_number) of the item containing `offset`."""
+        i = max(bisect_right(self.starts, offset) - 1, 0)
+        page_number = self.pages[i] if self.pages is not None else None
+        line_number = self.lines[i] if self.lines is not None else None
+        return page_number, line_number
 
 
 def get_dynamic_chunk_size(text_length: int) -> int:
@@ -29,56 +68,85 @@ def clean_chunk_text(text: str) -> str:
     return text.strip()
 
 
-def merge_raw_text(raw_text) -> tuple[str, dict]:
-    """Merge raw text from list of dicts or return as string."""
+def merge_raw_text(raw_text) -> tuple[str, TextOffsetIndex]:
+    """Merge raw text from list of dicts or return as string, along with its offset index."""
+    if isinstance(raw_text, LineIndexedText):
+        # Already one string with line starts; line i + 1 starts at line_starts[i]
+        return raw_text.text, TextOffsetIndex(raw_text.line_starts, lines=range(1, raw_text.line_count + 1))
     if isinstance(raw_text, list):
         merged_text_parts = []
-        page_info = {}
-        
-        for i, item in enumerate(raw_text):
+        starts = array("q")
+        pages = []
+        lines = []
+        offset = 0
+
+        for item in raw_text:
             text = item.get("text", "")
-            page_num = item.get("page")
-            
+
             merged_text_parts.append(text)
-            page_info[i] = page_num
-        
+            starts.append(offset)
+            pages.append(item.get("page"))
+            lines.append(item.get("line_number"))  # Only set for text files, None for PDFs
+            offset += len(text) + 1  # +1 for \n
+
         merged_text = "\n".join(merged_text_parts)
-        return merged_text, page_info
+        return merged_text, TextOffsetIndex(starts, pages, lines)
     else:
         merged_text = raw_text
-        page_info = {0: None}
-        return merged_text, page_info
-
-
-def create_chunk_data(chunk_text: str, merged_text: str, page_info: dict, raw_text: list, current_pos: int) -> ChunkData:
-    """Create a ChunkData object for a given chunk."""
-    # Find which input item this chunk belongs to
-    item_index = 0
-    cumulative_pos = 0
-    
-    for i, item in enumerate(raw_text):
-        item_length = len(item.get("text", "")) + 1  # +1 for \n
-        if current_pos < cumulative_pos + item_length:
-            item_index = i
-            break
-        cumulative_pos += item_length
-    
-    # Get page and line info from the original item
-    item = raw_text[item_index] if item_index < len(raw_text) else {}
-    page_number = item.get("page")
-    line_number = item.get("line_number")  # Only set for text files, None for PDFs
-    
-    return {
-        "chunk_id": str(uuid.uuid4()),
-        "content": clean_chunk_text(chunk_text),
-        "context": None,
-        "contextualized_chunk": None,
-        "embedding": None,
-        "breadcrumbs": None,
-        "page_number": page_number,
-        "line_number": line_number,
-        "chunk_type": None
-    }
+        return merged_text, TextOffsetIndex(array("q", [0]))
+
+
+def locate_chunk_spans(merged_text: str, split_chunks: list[str]) -> list[tuple[int, int]]:
+    """
+    Find the exact [start, end) offsets of every split chunk in the merged text.
+    The splitter returns stripped substrings in document order, so each search resumes
+    where the previous chunk ended and the whole pass stays linear.
+    """
+    spans = []
+    cursor = 0
+    for chunk_text in split_chunks:
+        start = merged_text.find(chunk_text, cursor)
+        if start == -1:
+            # Should not happen with overlap 0; fall back to the running cursor
+            start = cursor
+        end = start + len(chunk_text)
+        spans.append((start, end))
+        cursor = end
+    return spans
+
+
+def create_chunk_data(chunk_text: str, start: int, end: int, offset_index: TextOffsetIndex) -> ChunkData:
+    """Create a ChunkRecord for a given chunk spanning merged_text[start:end]."""
+    page_number, line_number = offset_index.locate(start)
+    end_page_number, end_line_number = offset_index.locate(max(start, end - 1))
+
+    return ChunkRecord(
+        chunk_id=str(uuid.uuid4()),
+        content=clean_chunk_text(chunk_text),
+        page_number=page_number,
+        end_page_number=end_page_number,
+        line_number=line_number,
+        end_line_number=end_line_number,
+        start_offset=start,
+        end_offset=end,
+    )
+
+
+def assign_chunk_ids(chunks: List[ChunkData], document_id: str) -> None:
+    """
+    Give each chunk a content hash and an id derived from (document_id, hash, occurrence),
+    so re-chunking an edited document reproduces the ids of every unchanged chunk.
+    """
+    occurrences = {}
+    for chunk in chunks:
+        # Chunker breadcrumbs (structure strategy) are part of what the LLM and embedder see
+        content_hash = hashlib.sha256(
+            f"{chunk.get('breadcrumbs') or ''}\x1f{chunk['content']}".encode("utf-8")
+        ).hexdigest()
+        occurrence = occurrences.get(content_hash, 0)
+        occurrences[content_hash] = occurrence + 1
+        chunk["content_hash"] = content_hash
+        chunk["chunk_id"] = str(uuid.uuid5(uuid.NAMESPACE_OID, f"{document_id}:{content_hash}:{occurrence}"))
 
 
 def split_text_into_chunks(merged_text: str, chunk_size: int) -> list[str]:
@@ -91,6 +159,73 @@ def split_text_into_chunks(merged_text: str, chunk_size: int) -> list[str]:
     return splitter.split_text(merged_text)
 
 
+def _heading_title(heading: str) -> str:
+    title = heading.strip().lstrip("#").strip().rstrip(":")
+    return title[:_MAX_BREADCRUMB_TITLE]
+
+
+def split_text_by_structure(merged_text: str, chunk_size: int) -> list[dict]:
+    """
+    Heading/numbering-aware alternative to split_text_into_chunks.
+    Builds the section tree in one pass over the heading matches and returns spans with
+    deterministic breadcrumbs and chunk_type. Sections longer than chunk_size are split
+    further with the recursive splitter; a heading with (almost) no body of its own is
+    folded into its first child. Returns [] when the text has no recognisable headings.
+    """
+    headings = []
+    for match in _HEADING_PATTERN.finditer(merged_text):
+        kind = match.lastgroup
+        level = len(match.group("markdown")) if kind == "markdown" else _HEADING_LEVELS[kind]
+        # Numbered clauses carry their body on the heading line; the title ends at the colon
+        heading = match.group("numbered") if kind == "numbered" else match.group(0)
+        headings.append((match.start(), level, kind, _heading_title(heading)))
+    if not headings:
+        return []
+
+    # (start, end, breadcrumbs, chunk_type) for every section, including the preamble
+    sections = []
+    if headings[0][0] > 0:
+        sections.append((0, headings[0][0], None, "preamble"))
+
+    stack: list[tuple[int, str]] = []
+    fold_start = None
+    for i, (start, level, kind, title) in enumerate(headings):
+        while stack and stack[-1][0] >= level:
+            stack.pop()
+        stack.append((level, title))
+        end = headings[i + 1][0] if i + 1 < len(headings) else len(merged_text)
+        section_start = start if fold_start is None else fold_start
+
+        next_is_child = i + 1 < len(headings) and headings[i + 1][1] > level
+        if next_is_child and end - start < chunk_size // 4:
+            fold_start = section_start
+            continue
+        fold_start = None
+
+        if _DEFINITION_TITLE.search(title):
+            chunk_type = "definition"
+        else:
+            chunk_type = {"markdown": "heading", "numbered": "article"}.get(kind, kind)
+        breadcrumbs = " > ".join(t for _, t in stack)
+        sections.append((section_start, end, breadcrumbs, chunk_type))
+
+    spans = []
+    for start, end, breadcrumbs, chunk_type in sections:
+        section_text = merged_text[start:end]
+        pieces = [section_text.strip()] if len(section_text) <= chunk_size else split_text_into_chunks(section_text, chunk_size)
+        for piece, (piece_start, piece_end) in zip(pieces, locate_chunk_spans(section_text, pieces)):
+            if not piece:
+                continue
+            spans.append({
+                "text": piece,
+                "start": start + piece_start,
+                "end": start + piece_end,
+                "breadcrumbs": breadcrumbs,
+                "chunk_type": chunk_type,
+            })
+    return spans
+
+
 def log_chunking_summary(chunks: List[ChunkData], chunk_size: int, merged_text: str):
     """Log summary of chunking process."""
     chunk_lengths = [len(c["content"]) for c in chunks]
@@ -111,30 +246,44 @@ def log_chunking_summary(chunks: List[ChunkData], chunk_size: int, merged_text:
 def chunk_node(state: RagIngestState) -> RagIngestState:
     """Processes raw text or documents into smaller, manageable chunks."""
     raw_text = state["raw_text"]
-    
-    # Merge raw text and extract page info
-    merged_text, page_info = merge_raw_text(raw_text)
-    
+
+    # Merge raw text and build the offset index once
+    merged_text, offset_index = merge_raw_text(raw_text)
+
     # Get dynamic chunk size
     chunk_size = get_dynamic_chunk_size(len(merged_text))
-    
-    # Split text into chunks
-    split_chunks = split_text_into_chunks(merged_text, chunk_size)
-    
-    # Generate ChunkData objects
+
     chunks: List[ChunkData] = []
-    current_pos = 0
-    
-    for chunk_text in split_chunks:
-        chunk_data = create_chunk_data(chunk_text, merged_text, page_info, raw_text, current_pos)
-        chunks.append(chunk_data)
-        current_pos += len(chunk_text)
-    
-    # Update state
+    strategy = state.get("chunking_strategy") or config.chunking_strategy
+    if strategy == "structure":
+        # Breadcrumbs and chunk_type come from the headings, not from the LLM
+        for span in split_text_by_structure(merged_text, chunk_size):
+            chunk_data = create_chunk_data(span["text"], span["start"], span["end"], offset_index)
+            chunk_data["breadcrumbs"] = span["breadcrumbs"]
+            chunk_data["chunk_type"] = span["chunk_type"]
+            chunks.append(chunk_data)
+        if not chunks:
+            logger.info("No headings found, falling back to recursive chunking")
+
+    if not chunks:
+        # Split text into chunks
+        split_chunks = split_text_into_chunks(merged_text, chunk_size)
+
+        # Generate ChunkData objects, resolving provenance by binary search over the index
+        chunks = [
+            create_chunk_data(chunk_text, start, end, offset_index)
+            for chunk_text, (start, end) in zip(split_chunks, locate_chunk_spans(merged_text, split_chunks))
+        ]
+
+    if state.get("document_id"):
+        assign_chunk_ids(chunks, state["document_id"])
+
+    # Update state; the raw text is not needed past chunking and would bloat every checkpoint
     state["chunks"] = chunks
     state["total_chunks"] = len(chunks)
-    
+    state["raw_text"] = None
+
     # Log chunking summary
     log_chunking_summary(chunks, chunk_size, merged_text)
-    
-    return state
\ No newline at end of file
+
+    return state
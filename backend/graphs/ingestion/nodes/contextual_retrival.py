@@ -1,22 +1,67 @@
-from backend.graphs.ingestion.state import RagIngestState
+from backend.graphs.ingestion.state import RagIngestState, chunks_to_enrich
 from google import genai
-from google.genai import types
+from google.genai import errors, types
 from pydantic import BaseModel, Field
+from typing import List, Optional
 from backend.core.config import config
+from backend.services.ingestion.cache import IngestionCacheService, hit_rate_stats
+from backend.services.ingestion.embedding_pipeline import count_tokens
 import asyncio
+import re
 import warnings
 
+from backend.utils.concurrency import AdaptiveConcurrencyLimiter, jittered_backoff
 from backend.utils.decorators import track_execution_time
 
 # Suppress aiohttp's unclosed socket and transport warnings (known issue with google-genai async client)
 warnings.filterwarnings("ignore", category=ResourceWarning)
 
+SYSTEM_INSTRUCTION = 'You are a helpful assistant specialized in document analysis.'
+
 class ChunkResponse(BaseModel):
     context: str = Field(description="Concise context explaining where this chunk sits within the document.")
     chunk_type: str = Field(description="Classification or type of the chunk (e.g., 'section', 'definition').")
     breadcrumb: str = Field(description="Hierarchical path or breadcrumb showing chunk location in document structure.(e.g., 'Chapter 1 > Section 2').")
 
 
+class ContextResponse(BaseModel):
+    """Used when the chunker already derived breadcrumbs and chunk_type from the headings."""
+    context: str = Field(description="Concise context explaining where this chunk sits within the document.")
+
+
+class ChunkBatchItem(ChunkResponse):
+    chunk_index: int = Field(description="The index attribute of the <chunk> this entry describes.")
+
+
+class ContextBatchItem(ContextResponse):
+    chunk_index: int = Field(description="The index attribute of the <chunk> this entry describes.")
+
+
+class ChunkBatchResponse(BaseModel):
+    chunks: List[ChunkBatchItem]
+
+
+class ContextBatchResponse(BaseModel):
+    chunks: List[ContextBatchItem]
+
+
+_BATCH_SCHEMAS = {ChunkResponse: ChunkBatchResponse, ContextResponse: ContextBatchResponse}
+
+
+class BatchSplitRequired(Exception):
+    """A batched response was truncated or did not cover every chunk of the batch."""
+
+
+class ContextualizationFailed(Exception):
+    """A request failed permanently or ran out of attempts."""
+
+    def __init__(self, attempts: int, error: Exception, retryable: bool):
+        super().__init__(f"{error} (after {attempts} attempt(s))")
+        self.attempts = attempts
+        self.error = error
+        self.retryable = retryable
+
+
 def _build_chunk_prompt(chunk_content: str) -> str:
     """Build the prompt for contextual retrieval."""
     return f"""
@@ -30,86 +75,437 @@ def _build_chunk_prompt(chunk_content: str) -> str:
     """
 
 
-def _calculate_backoff(attempt: int) -> int:
-    """Calculate exponential backoff time, capped at 60 seconds."""
-    return min(5 * (2 ** (attempt - 1)), 60)
+def _build_batch_prompt(chunk_contents: List[str]) -> str:
+    """Build one prompt that situates several chunks at once."""
+    chunks_xml = "\n".join(
+        f'<chunk index="{i}">\n{content}\n</chunk>' for i, content in enumerate(chunk_contents)
+    )
+    return f"""
+    Here are {len(chunk_contents)} chunks we want to situate within the whole document
+    {chunks_xml}
+
+    For every chunk, give a short succinct context to situate it within the overall document for the purposes of improving search retrieval of the chunk.
+    Return exactly one entry per chunk, with chunk_index set to the chunk's index attribute.
+    - Be self-contained (assume the reader only sees the chunk + your context)
+    """
+
+
+def _parse_batch_response(response, schema: type[BaseModel], size: int) -> List[BaseModel]:
+    """Map a batched response back to per-chunk results in batch order, or ask for a split."""
+    candidate = response.candidates[0] if response.candidates else None
+    if candidate is not None and candidate.finish_reason == types.FinishReason.MAX_TOKENS:
+        raise BatchSplitRequired("output truncated")
+    if response.parsed is None:
+        raise BatchSplitRequired("response did not parse")
+
+    by_index = {item.chunk_index: item for item in response.parsed.chunks}
+    if any(i not in by_index for i in range(size)):
+        raise BatchSplitRequired(f"got {len(by_index)} of {size} chunks")
+    return [schema.model_validate(by_index[i].model_dump(exclude={"chunk_index"})) for i in range(size)]
+
+
+_THROTTLE_CODES = {429, 500, 502, 503, 504}
+_RETRY_DELAY = re.compile(r"^(\d+(?:\.\d+)?)s$")
 
 
-def _update_chunk_with_result(chunk: dict, result: ChunkResponse) -> None:
+def _retry_after_seconds(error: errors.APIError) -> Optional[float]:
+    """Read the server's requested delay from a Retry-After header or a google.rpc.RetryInfo detail."""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    retry_after = headers.get('Retry-After') or headers.get('retry-after')
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    details = (error.details or {}).get('error', {}).get('details', []) if isinstance(error.details, dict) else []
+    for detail in details:
+        match = _RETRY_DELAY.match(str(detail.get('retryDelay', '')))
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def _update_chunk_with_result(chunk: dict, result: ChunkResponse | ContextResponse) -> None:
     """Update a chunk dict with the contextual retrieval result."""
     chunk['context'] = result.context
-    chunk['chunk_type'] = result.chunk_type
-    chunk['breadcrumbs'] = result.breadcrumb
-    chunk['contextualized_chunk'] = f"{result.context}\n\n{chunk['content']}"
+    if isinstance(result, ChunkResponse):
+        chunk['chunk_type'] = result.chunk_type
+        chunk['breadcrumbs'] = result.breadcrumb
+
 
+def _apply_fallback(chunk: dict) -> None:
+    """Keep the chunk searchable without LLM context rather than blocking the document."""
+    chunk['context'] = None
 
-def _delete_cache_safely(client: genai.Client, cache_name: str) -> None:
+
+def _response_schema(chunk: dict) -> type[BaseModel]:
+    """Only ask the LLM for what the chunker could not derive."""
+    return ContextResponse if chunk.get('breadcrumbs') and chunk.get('chunk_type') else ChunkResponse
+
+
+async def delete_cache_safely(async_client: genai.Client, cache_name: str) -> None:
     """Safely delete a cache, logging any errors."""
     try:
-        client.caches.delete(name=cache_name)
+        await async_client.aio.caches.delete(name=cache_name)
     except Exception as e:
         print(f"Error deleting cache: {e}")
 
-@track_execution_time
-def contextual_retrival_node(state: RagIngestState) -> RagIngestState:
+
+class ChunkContextualizer:
+    '''
+    Contextualizes chunks against the context window passed to contextualize (its Gemini cache,
+    or its content inline).
+    Requests run under an AIMD concurrency limit and use bounded, jittered retries. Chunks that
+    exhaust their attempts fall back to un-contextualized content. Every chunk gets an outcome.
+    Contextualizers of documents processed together share one `limiter`, so a throttled request
+    slows every document down and the provider sees one concurrency limit.
+    '''
+
+    def __init__(self, async_client: genai.Client, result_cache: IngestionCacheService, on_done=None,
+                 limiter: Optional[AdaptiveConcurrencyLimiter] = None):
+        self.async_client = async_client
+        # Optional coroutine called with each chunk as soon as its outcome is final
+        self.on_done = on_done
+        self.result_cache = result_cache
+        self.batch_size = max(1, config.contextual_retrieval_batch_size)
+        self.max_attempts = max(1, config.contextual_retrieval_max_attempts)
+        self.limiter = limiter or create_context_limiter()
+        self.outcomes: List[dict] = []
+
+    async def _record(self, chunk: dict, status: str, attempts: int = 0, error: Optional[Exception] = None) -> None:
+        self.outcomes.append({
+            'chunk_id': chunk.get('chunk_id'),
+            'status': status,
+            'attempts': attempts,
+            'error': str(error) if error else None,
+        })
+        if self.on_done is not None:
+            await self.on_done(chunk)
+
+    def _request(self, prompt: str, schema: type[BaseModel], window: dict) -> tuple[str, types.GenerateContentConfig]:
+        """Refer to the window's Gemini cache, or send the window inline when it was too small to cache."""
+        if window['cache_name']:
+            return prompt, types.GenerateContentConfig(
+                cached_content=window['cache_name'],
+                response_mime_type='application/json',
+                response_schema=schema
+            )
+        return f"<document>\n{window['inline']}\n</document>\n{prompt}", types.GenerateContentConfig(
+            system_instruction=SYSTEM_INSTRUCTION,
+            response_mime_type='application/json',
+            response_schema=schema
+        )
+
+    async def _generate(self, prompt: str, schema: type[BaseModel], label: str, window: dict):
+        """Returns (response, attempts); raises ContextualizationFailed."""
+        contents, request_config = self._request(prompt, schema, window)
+        for attempt in range(1, self.max_attempts + 1):
+            async with self.limiter.slot() as started_at:
+                try:
+                    response = await self.async_client.aio.models.generate_content(
+                        model=config.llm_model,
+                        contents=contents,
+                        config=request_config
+                    )
+                    self.limiter.on_success()
+                    return response, attempt
+                except errors.APIError as e:
+                    if e.code not in _THROTTLE_CODES:
+                        raise ContextualizationFailed(attempt, e, retryable=False)
+                    retry_after = _retry_after_seconds(e)
+                    self.limiter.on_throttle(started_at, retry_after)
+                    error = e
+                except Exception as e:
+                    # Network-level failure: retry, but it says nothing about quota
+                    retry_after = None
+                    error = e
+            if attempt == self.max_attempts:
+                raise ContextualizationFailed(attempt, error, retryable=True)
+            wait_time = retry_after or jittered_backoff(attempt, cap=config.contextual_retrieval_max_backoff_seconds)
+            print(f"Error on {label}: {error}, attempt {attempt}/{self.max_attempts}, retrying in {wait_time:.1f}s "
+                  f"(concurrency limit {self.limiter.limit})...")
+            await asyncio.sleep(wait_time)
+
+    async def _process_chunk(self, chunk: dict, key: str, index: int, window: dict) -> None:
+        try:
+            response, attempts = await self._generate(
+                _build_chunk_prompt(chunk['content']), _response_schema(chunk), f"chunk {index}", window
+            )
+        except ContextualizationFailed as e:
+            _apply_fallback(chunk)
+            await self._record(chunk, 'fallback', e.attempts, e.error)
+            return
+        if response.parsed is None:
+            _apply_fallback(chunk)
+            await self._record(chunk, 'fallback', attempts, ValueError("response did not parse"))
+            return
+        _update_chunk_with_result(chunk, response.parsed)
+        # Written as each chunk completes, so an interrupted run keeps its progress
+        self.result_cache.set_context(key, response.parsed.model_dump())
+        await self._record(chunk, 'contextualized', attempts)
+
+    async def _process_batch(self, batch: list, index: int, window: dict) -> None:
+        """One request for the whole batch; halve it when the answer is truncated or unusable."""
+        if len(batch) == 1:
+            chunk, key = batch[0]
+            await self._process_chunk(chunk, key, index, window)
+            return
+
+        schema = _response_schema(batch[0][0])
+        prompt = _build_batch_prompt([chunk['content'] for chunk, _ in batch])
+        try:
+            response, attempts = await self._generate(prompt, _BATCH_SCHEMAS[schema], f"batch at chunk {index}", window)
+            results = _parse_batch_response(response, schema, len(batch))
+        except ContextualizationFailed as e:
+            if e.retryable:
+                # Out of attempts on quota/server errors: splitting would only add requests
+                for chunk, _ in batch:
+                    _apply_fallback(chunk)
+                    await self._record(chunk, 'fallback', e.attempts, e.error)
+                return
+            results = None
+            reason = e
+        except BatchSplitRequired as e:
+            results = None
+            reason = e
+
+        if results is None:
+            print(f"Splitting batch of {len(batch)} at chunk {index}: {reason}")
+            middle = len(batch) // 2
+            await asyncio.gather(
+                self._process_batch(batch[:middle], index, window),
+                self._process_batch(batch[middle:], index + middle, window),
+            )
+            return
+
+        for (chunk, key), result in zip(batch, results):
+            _update_chunk_with_result(chunk, result)
+            self.result_cache.set_context(key, result.model_dump())
+            await self._record(chunk, 'contextualized', attempts)
+
+    async def contextualize(self, pending: list, window: dict) -> None:
+        """Contextualize (chunk, cache_key) pairs in place, against `window` ({'cache_name', 'inline'})."""
+        # A batch shares one response schema, so chunks are grouped by schema first
+        groups = {}
+        for index, (chunk, key) in enumerate(pending):
+            groups.setdefault(_response_schema(chunk), []).append((index, chunk, key))
+        batches = [
+            group[i:i + self.batch_size]
+            for group in groups.values()
+            for i in range(0, len(group), self.batch_size)
+        ]
+        await asyncio.gather(*[
+            self._process_batch([(chunk, key) for _, chunk, key in batch], batch[0][0], window)
+            for batch in batches
+        ])
+
+    def report(self, cached_chunks: List[dict]) -> dict:
+        outcomes = [
+            {'chunk_id': chunk.get('chunk_id'), 'status': 'cached', 'attempts': 0, 'error': None}
+            for chunk in cached_chunks
+        ] + self.outcomes
+        return build_contextualization_report(outcomes, self.limiter.stats())
+
+
+def build_contextualization_report(outcomes: List[dict], concurrency: Optional[dict]) -> dict:
+    counts = {}
+    for outcome in outcomes:
+        counts[outcome['status']] = counts.get(outcome['status'], 0) + 1
+    return {
+        'counts': counts,
+        'effective_concurrency': concurrency,
+        'chunks': outcomes,
+    }
+
+
+def is_fast_ingest(state: RagIngestState) -> bool:
+    fast_ingest = state.get('fast_ingest')
+    return config.fast_ingest if fast_ingest is None else fast_ingest
+
+
+def apply_cached_contexts(state: RagIngestState, result_cache: IngestionCacheService) -> tuple[list, list]:
     """
-    Applies Contextual Retrieval techniques to enhance chunk relevance and context.
-    Also gathers metadata.
+    Serve previously contextualized chunks from the content-addressed cache.
+    Returns (pending (chunk, cache_key) pairs, chunks served from the cache).
     """
-    client = genai.Client(api_key=config.google_api_key)
-    async_client = genai.Client(api_key=config.google_api_key, http_options=types.HttpOptions(api_version="v1beta"))
-    print("Starting contextual retrieval node...")
-    
-    document_content = "\n\n".join([c['content'] for c in state['chunks']])
-    
-    cache = client.caches.create(
-        model=config.llm_model,
-        config=types.CreateCachedContentConfig(
-            display_name='ingestion_cache',
-            system_instruction='You are a helpful assistant specialized in document analysis.',
-            contents=[document_content],
-            ttl='600s'
+    chunks = chunks_to_enrich(state)
+    fingerprint = state.get('document_fingerprint') or IngestionCacheService.document_fingerprint(state['document_id'])
+    cache_keys = [
+        result_cache.context_key(chunk['content'], fingerprint, _response_schema(chunk).__name__)
+        for chunk in chunks
+    ]
+    pending = []
+    cached_chunks = []
+    for chunk, key, cached in zip(chunks, cache_keys, result_cache.get_contexts(cache_keys)):
+        if cached is not None:
+            _update_chunk_with_result(chunk, _response_schema(chunk).model_validate(cached))
+            cached_chunks.append(chunk)
+        else:
+            pending.append((chunk, key))
+
+    state['cache_stats'] = {
+        **(state.get('cache_stats') or {}),
+        'context': hit_rate_stats(len(cached_chunks), len(chunks)),
+    }
+    return pending, cached_chunks
+
+
+def plan_context_windows(chunks: List[dict], max_tokens: Optional[int] = None) -> List[List[int]]:
+    """
+    Group consecutive chunks into windows of at most max_tokens, cutting at a top-level
+    section change when there is one in the second half of the window.
+    """
+    max_tokens = max_tokens or config.contextual_window_tokens
+    windows: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    last_section_start = None  # Position in `current` where the latest top-level section begins
+    for i, chunk in enumerate(chunks):
+        tokens = count_tokens(chunk['content'])
+        section = (chunk.get('breadcrumbs') or '').split(' > ')[0]
+        if current and section and section != (chunks[current[-1]].get('breadcrumbs') or '').split(' > ')[0]:
+            last_section_start = len(current)
+        if current and current_tokens + tokens > max_tokens:
+            cut = last_section_start if last_section_start and last_section_start >= len(current) // 2 else len(current)
+            windows.append(current[:cut])
+            current = current[cut:]
+            current_tokens = sum(count_tokens(chunks[j]['content']) for j in current)
+            last_section_start = None
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        windows.append(current)
+    return windows
+
+
+def build_outline(chunks: List[dict], windows: List[List[int]], max_tokens: Optional[int] = None) -> str:
+    """Compact map of the whole document: the chunker's section headings, or each window's opening line."""
+    max_chars = (max_tokens or config.contextual_outline_max_tokens) * 4
+    lines = []
+    for number, window in enumerate(windows, start=1):
+        first = chunks[window[0]]
+        pages = f"pages {first.get('page_number')}-{chunks[window[-1]].get('end_page_number')}"
+        headings = list(dict.fromkeys(chunks[i]['breadcrumbs'] for i in window if chunks[i].get('breadcrumbs')))
+        if not headings:
+            headings = [first['content'].strip().split('\n', 1)[0][:120]]
+        lines.append(f"Part {number} ({pages}):")
+        lines.extend(f"  - {heading}" for heading in headings)
+    outline = "\n".join(lines)
+    return outline if len(outline) <= max_chars else outline[:max_chars] + "\n  ..."
+
+
+def window_content(chunks: List[dict], window: List[int], outline: Optional[str]) -> str:
+    """The whole document when it fits in one window, otherwise the outline plus the local section."""
+    section = "\n\n".join(chunks[i]['content'] for i in window)
+    if outline is None:
+        return section
+    return f"<outline>\n{outline}\n</outline>\n\n<section>\n{section}\n</section>"
+
+
+async def create_context_cache(async_client: genai.Client, content: str) -> Optional[str]:
+    """Cache a window's content; None when it is too small for explicit caching and must go inline."""
+    if count_tokens(content) < config.contextual_cache_min_tokens:
+        return None
+    try:
+        cache = await async_client.aio.caches.create(
+            model=config.llm_model,
+            config=types.CreateCachedContentConfig(
+                display_name='ingestion_cache',
+                system_instruction=SYSTEM_INSTRUCTION,
+                contents=[content],
+                ttl='600s'
+            )
         )
+    except errors.APIError as e:
+        if e.code != 400:
+            raise
+        # Typically below the model's minimum cacheable size: fall back to inline content
+        print(f"Context cache not created ({e}), sending the window inline")
+        return None
+    return cache.name
+
+
+async def contextualize_document(async_client: genai.Client, contextualizer: ChunkContextualizer,
+                                 chunks: List[dict], pending: list) -> None:
+    """
+    Contextualize pending (chunk, cache_key) pairs against their own window of the document.
+    Each window's cache is created and used concurrently with the others, and only windows
+    with pending chunks get one.
+    """
+    windows = plan_context_windows(chunks)
+    outline = build_outline(chunks, windows) if len(windows) > 1 else None
+    pending_by_id = {id(chunk): (chunk, key) for chunk, key in pending}
+
+    async def run_window(window: List[int]) -> None:
+        window_pending = [pending_by_id[id(chunks[i])] for i in window if id(chunks[i]) in pending_by_id]
+        if not window_pending:
+            return
+        content = window_content(chunks, window, outline)
+        cache_name = await create_context_cache(async_client, content)
+        try:
+            await contextualizer.contextualize(
+                window_pending, {'cache_name': cache_name, 'inline': None if cache_name else content}
+            )
+        finally:
+            if cache_name:
+                await delete_cache_safely(async_client, cache_name)
+
+    if len(windows) > 1:
+        print(f"Contextualizing {len(chunks)} chunks in {len(windows)} windows")
+    await asyncio.gather(*[run_window(window) for window in windows])
+
+
+def create_genai_client() -> genai.Client:
+    return genai.Client(api_key=config.google_api_key, http_options=types.HttpOptions(api_version="v1beta"))
+
+
+def create_context_limiter() -> AdaptiveConcurrencyLimiter:
+    return AdaptiveConcurrencyLimiter(
+        initial=config.contextual_retrieval_initial_concurrency,
+        maximum=config.contextual_retrieval_concurrency,
     )
-    
-    try:
-        async def process_chunk(semaphore: asyncio.Semaphore, chunk: dict, index: int) -> ChunkResponse:
-            async with semaphore:
-                prompt = _build_chunk_prompt(chunk['content'])
-                attempt = 0
-                while True:
-                    try:
-                        response = await async_client.aio.models.generate_content(
-                            model=config.llm_model,
-                            contents=prompt,
-                            config=types.GenerateContentConfig(
-                                cached_content=cache.name,
-                                response_mime_type='application/json',
-                                response_schema=ChunkResponse
-                            )
-                        )
-                        return response.parsed
-                    except Exception as e:
-                        attempt += 1
-                        wait_time = _calculate_backoff(attempt)
-                        print(f"Error on chunk {index}: {e}, attempt {attempt}, retrying in {wait_time}s...")
-                        await asyncio.sleep(wait_time)
-
-        async def process_all_chunks() -> list:
-            semaphore = asyncio.Semaphore(config.contextual_retrieval_concurrency)
-            tasks = [process_chunk(semaphore, chunk, i) for i, chunk in enumerate(state['chunks'])]
-            results = await asyncio.gather(*tasks)
-            # Allow pending async tasks to complete and connections to close
-            await asyncio.sleep(0.1)
-            return results
-
-        results = asyncio.run(process_all_chunks())
-        
-        for i, result in enumerate(results):
-            if result:
-                _update_chunk_with_result(state['chunks'][i], result)
 
+
+async def contextualize_state(state: RagIngestState, async_client: Optional[genai.Client] = None,
+                              result_cache: Optional[IngestionCacheService] = None,
+                              limiter: Optional[AdaptiveConcurrencyLimiter] = None) -> RagIngestState:
+    """
+    Contextual retrieval of one document on the running event loop. Documents contextualized
+    together pass the same `async_client` and `limiter`; otherwise each call makes its own.
+    """
+    if is_fast_ingest(state):
+        # No LLM round trip: chunks keep whatever breadcrumbs the chunker derived
+        return state
+
+    result_cache = result_cache or IngestionCacheService()
+    pending, cached_chunks = apply_cached_contexts(state, result_cache)
+    if not pending:
+        state['contextualization_report'] = build_contextualization_report(
+            [{'chunk_id': c.get('chunk_id'), 'status': 'cached', 'attempts': 0, 'error': None} for c in cached_chunks],
+            None,
+        )
+        return state
+
+    own_client = async_client is None
+    async_client = async_client or create_genai_client()
+    print("Starting contextual retrieval node...")
+
+    # Windows always cover the whole document, even when only changed chunks are pending
+    contextualizer = ChunkContextualizer(async_client, result_cache, limiter=limiter)
+    try:
+        await contextualize_document(async_client, contextualizer, state['chunks'], pending)
     finally:
-        _delete_cache_safely(client, cache.name)
-    
-    return state
\ No newline at end of file
+        if own_client:
+            await async_client.aio.aclose()
+    state['contextualization_report'] = contextualizer.report(cached_chunks)
+    return state
+
+
+@track_execution_time
+def contextual_retrival_node(state: RagIngestState) -> RagIngestState:
+    """
+    Applies Contextual Retrieval techniques to enhance chunk relevance and context.
+    Also gathers metadata.
+    """
+    return asyncio.run(contextualize_state(state))
@@ -1,46 +1,71 @@
-from openai import AzureOpenAI
-from backend.graphs.ingestion.state import RagIngestState
-from backend.core.config import config
+import numpy as np
+
+from backend.graphs.ingestion.state import RagIngestState, chunks_to_enrich
+from backend.services.ingestion.cache import IngestionCacheService, hit_rate_stats
+from backend.services.ingestion.embedding_pipeline import EmbeddingProvider, get_embedding_provider
 from backend.utils.decorators import track_execution_time
 
 
+def embedding_text(chunk: dict) -> str:
+    # Use breadcrumbs + context + content for embedding
+    return f"{chunk.get('breadcrumbs') or ''} {chunk.get('context') or ''} {chunk.get('content', '')}".strip()
+
 
-def get_embedding_client() -> AzureOpenAI:
-    return AzureOpenAI(
-        api_version=config.azure_api_version,
-        azure_endpoint=config.azure_openai_endpoint,
-        api_key=config.azure_openai_api_key
-    )
+def generate_embeddings(texts: list[str], on_batch=None) -> np.ndarray:
+    # Batched and run on a thread pool by the configured provider (remote or local CPU)
+    return get_embedding_provider().embed(texts, on_batch=on_batch)
 
 
-def generate_embeddings(texts: list[str], batch_size: int = 20) -> list[list[float]]:
-    client = get_embedding_client()
-    all_embeddings = []
-    
-    for i in range(0, len(texts), batch_size):
-        batch = texts[i:i + batch_size]
-        response = client.embeddings.create(
-            input=batch,
-            model=config.text_embedding_model
-        )
-        batch_embeddings = [item.embedding for item in sorted(response.data, key=lambda x: x.index)]
-        all_embeddings.extend(batch_embeddings)
+def embed_chunks(chunks: list[dict], result_cache: IngestionCacheService | None = None,
+                 pipeline: EmbeddingProvider | None = None) -> int:
+    """Set chunk["embedding"] for every chunk, serving what it can from the cache. Returns the cache hits."""
+    texts = [embedding_text(chunk) for chunk in chunks]
     
-    return all_embeddings
+    # Only texts missing from the content-addressed cache go to the provider
+    result_cache = result_cache or IngestionCacheService()
+    cache_keys = [result_cache.embedding_key(text) for text in texts]
+    embeddings = result_cache.get_embeddings(cache_keys)
+    misses = [i for i, embedding in enumerate(embeddings) if embedding is None]
+
+    pending_texts = [texts[i] for i in misses]
+
+    def cache_batch(indices: list[int], batch_embeddings: np.ndarray) -> None:
+        # Cached per batch, so a failure part-way through keeps the finished batches for a resume
+        result_cache.set_embeddings({cache_keys[misses[i]]: embedding for i, embedding in zip(indices, batch_embeddings)})
+
+    if pipeline:
+        generated = pipeline.embed(pending_texts, on_batch=cache_batch)
+    else:
+        generated = generate_embeddings(pending_texts, on_batch=cache_batch)
+    for i, embedding in zip(misses, generated):
+        embeddings[i] = embedding
+
+    attach_embeddings(chunks, embeddings)
+    return len(texts) - len(misses)
+
+
+def attach_embeddings(chunks: list, embeddings) -> np.ndarray:
+    """
+    Copy the embeddings into one contiguous float32 matrix and give each chunk its row (a view, not a copy).
+    Returns the matrix.
+    """
+    if not chunks:
+        return np.empty((0, 0), dtype=np.float32)
+    matrix = np.empty((len(chunks), len(embeddings[0])), dtype=np.float32)
+    for i, embedding in enumerate(embeddings):
+        matrix[i] = embedding
+    for chunk, row in zip(chunks, matrix):
+        chunk["embedding"] = row
+    return matrix
 
 @track_execution_time
 def embedd(state: RagIngestState) -> RagIngestState:
-    chunks = state["chunks"]
-    
-    # Use breadcrumbs + context + content for embedding
-    texts = [
-        f"{chunk.get('breadcrumbs', '')} {chunk.get('context', '')} {chunk.get('content', '')}".strip()
-        for chunk in chunks
-    ]
-    
-    embeddings = generate_embeddings(texts)
-    
-    for chunk, embedding in zip(chunks, embeddings):
-        chunk["embedding"] = embedding
+    chunks = chunks_to_enrich(state)
+    hits = embed_chunks(chunks)
+
+    state["cache_stats"] = {
+        **(state.get("cache_stats") or {}),
+        "embedding": hit_rate_stats(hits, len(chunks)),
+    }
     
-    return state
\ No newline at end of file
+    return state
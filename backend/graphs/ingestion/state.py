@@ -1,20 +1,127 @@
-from typing import List, Optional, TypedDict, Union
+import codecs
+import re
+from array import array
+from dataclasses import dataclass, fields
+from typing import Any, BinaryIO, List, Optional, TypedDict, Union
 
-class ChunkData(TypedDict):
+import numpy as np
+
+_NEWLINE = re.compile("\n")
+
+
+@dataclass(slots=True)
+class LineIndexedText:
+    '''
+    Raw text plus the offset at which every line starts.
+    Compact loader output for plain-text uploads: O(lines) machine integers instead of one dict per line.
+    Line starts are an int64 array, so checkpoints store it with msgpack like ChunkRecord embeddings.
+    '''
+    text: str
+    line_starts: np.ndarray
+
+    @classmethod
+    def from_text(cls, text: str) -> "LineIndexedText":
+        line_starts = array("q", [0])
+        line_starts.extend(match.end() for match in _NEWLINE.finditer(text))
+        return cls(text, np.frombuffer(line_starts, dtype=np.int64))
+
+    @classmethod
+    def from_stream(cls, stream: BinaryIO, encoding: str = "utf-8", block_size: int = 1 << 20) -> "LineIndexedText":
+        """Decode a binary stream block by block, indexing line starts as the blocks arrive."""
+        decoder = codecs.getincrementaldecoder(encoding)()
+        parts: List[str] = []
+        line_starts = array("q", [0])
+        offset = 0
+
+        while True:
+            block = stream.read(block_size)
+            text = decoder.decode(block, final=not block)
+            if text:
+                line_starts.extend(offset + match.end() for match in _NEWLINE.finditer(text))
+                parts.append(text)
+                offset += len(text)
+            if not block:
+                break
+
+        return cls("".join(parts), np.frombuffer(line_starts, dtype=np.int64))
+
+    @property
+    def line_count(self) -> int:
+        return len(self.line_starts)
+
+    def line_at(self, offset: int) -> int:
+        """1-based line number containing the character at `offset`."""
+        return int(np.searchsorted(self.line_starts, offset, side="right"))
+
+
+@dataclass(slots=True)
+class ChunkRecord:
+    '''
+    One chunk of a document being ingested.
+    Slotted, so a record costs a fixed handful of pointers instead of a dict. The embedding is a
+    float32 row of the document's embedding matrix rather than a list of boxed floats.
+    Supports chunk["field"], chunk.get("field") and chunk["field"] = value like the dicts it replaces.
+    '''
     chunk_id: str
     content: str
     context: Optional[str] = None
-    contextualized_chunk: Optional[str] = None
-    embedding: Optional[List[float]]
+    embedding: Optional[np.ndarray] = None
     breadcrumbs: Optional[str] = None
     page_number: Optional[int] = None
+    end_page_number: Optional[int] = None
     line_number: Optional[int] = None
+    end_line_number: Optional[int] = None
+    start_offset: Optional[int] = None
+    end_offset: Optional[int] = None
     chunk_type: Optional[str] = None
+    content_hash: Optional[str] = None
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in _CHUNK_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in _CHUNK_FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in _CHUNK_FIELDS
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in _CHUNK_FIELDS else default
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in _CHUNK_FIELDS}
+
+
+_CHUNK_FIELDS = frozenset(field.name for field in fields(ChunkRecord))
+
+# Name used across the ingestion code before chunks became records
+ChunkData = ChunkRecord
 
 class RagIngestState(TypedDict):
     document_name: str
-    raw_text: Optional[Union[str, dict]]
+    raw_text: Optional[Union[str, list, LineIndexedText]]
     document_id: str
     total_chunks: int
     chunks:List[ChunkData]
-    
+    chunking_strategy: Optional[str]
+    fast_ingest: Optional[bool]
+    document_fingerprint: Optional[str]
+    cache_stats: Optional[dict]
+    contextualization_report: Optional[dict]
+    streaming_report: Optional[dict]
+    store_report: Optional[dict]
+    changed_chunk_ids: Optional[List[str]]
+
+
+def chunks_to_enrich(state: RagIngestState) -> List[ChunkData]:
+    """Chunks the contextualize and embed nodes should process: all of them, or only the changed ones on re-ingest."""
+    changed = state.get("changed_chunk_ids")
+    if changed is None:
+        return state["chunks"]
+    changed = set(changed)
+    return [chunk for chunk in state["chunks"] if chunk["chunk_id"] in changed]
+
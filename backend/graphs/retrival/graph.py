@@ -1,12 +1,19 @@
+import time
 from functools import partial
+from typing import Optional
 from langgraph.graph import StateGraph, END
+from langchain_core.runnables import RunnableLambda
 from langgraph.prebuilt import ToolNode
 from backend.graphs.retrival.state import RetrivalGraphState
-from backend.graphs.retrival.nodes.orchestrator import orchestrator_node
+from backend.graphs.retrival.nodes.orchestrator import aorchestrator_node, orchestrator_node
 from backend.graphs.retrival.tools.web_search import websearch_tool
 from backend.graphs.retrival.tools.retrival import RetrieveTool
 from backend.graphs.retrival.tools.summarizer import summarizer_tool
 from backend.core.llm_client import get_llm
+from backend.core.db.weaviate_client import get_weaviate_client
+from backend.services.retrival.chunks_retrival import ChunksRetrivalService
+from backend.services.retrival.embedding_service import EmbeddingService
+from backend.services.retrival.reranking import RerankingService
 
 
 
@@ -34,8 +41,13 @@ class RetrivalGraph:
         # Bind tools to LLM (with partial versions)
         llm = get_llm().bind_tools(tools)
         
-        # Inject LLM into orchestrator using partial (Dependency Injection)
-        orchestrator_with_llm = partial(orchestrator_node, llm=llm)
+        # Inject LLM into orchestrator using partial (Dependency Injection);
+        # graph.invoke runs the sync node, graph.ainvoke the async one
+        orchestrator_with_llm = RunnableLambda(
+            partial(orchestrator_node, llm=llm),
+            afunc=partial(aorchestrator_node, llm=llm),
+            name="orchestrator",
+        )
 
         graph.add_node("orchestrator", orchestrator_with_llm)
 
@@ -60,4 +72,51 @@ class RetrivalGraph:
         
         graph.add_edge("tools", "orchestrator")
         
-        return graph.compile()
\ No newline at end of file
+        return graph.compile()
+
+
+class RetrivalGraphManager:
+    '''
+    Process-wide compiled retrieval graph.
+    The retrieval services, the tool-bound LLM and the compiled StateGraph are built once
+    and shared by every request; request data (query, document_id, history) only travels
+    in the graph state passed to invoke.
+    '''
+
+    _instance: Optional[RetrivalGraph] = None
+
+    @classmethod
+    def get_instance(cls) -> RetrivalGraph:
+        if cls._instance is None:
+            cls._instance = cls._create_instance()
+        return cls._instance
+
+    @classmethod
+    def _create_instance(cls) -> RetrivalGraph:
+        return RetrivalGraph(
+            retrival_methods=ChunksRetrivalService(
+                weaviate_client=get_weaviate_client(),
+                embedding_service=EmbeddingService(),
+            ),
+            reranking_service=RerankingService(),
+        )
+
+    @classmethod
+    def get_graph(cls):
+        return cls.get_instance().graph
+
+    @classmethod
+    def setup(cls) -> None:
+        """
+        Build the graph and load the local models (cross-encoder, local embeddings) at startup,
+        so the first query does not pay for them.
+        """
+        try:
+            started = time.perf_counter()
+            instance = cls.get_instance()
+            instance.reranking_service.rerank("warm up", [{"content": "warm up"}], top_k=1)
+            instance.retrival_methods.embedding_service.provider.warm_up()
+            print(f"✓ Retrieval graph compiled and warmed in {time.perf_counter() - started:.1f}s")
+        except Exception as e:
+            print(f"✗ Retrieval graph setup failed: {str(e)}")
+            raise
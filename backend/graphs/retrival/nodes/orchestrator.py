@@ -3,10 +3,7 @@ from backend.core.llm_client import get_llm
 from langchain.messages import SystemMessage, HumanMessage
 
 
-def orchestrator_node(state: RetrivalGraphState, llm) -> RetrivalGraphState:
-    # LLM already has tools bound (injected from graph.py)
-    # Use llm.invoke() to call the model with tools
-    
+def _build_messages(state: RetrivalGraphState) -> list:
     # Build system prompt with retrieved context if available
     base_prompt = """You are an AI Research Orchestrator. Follow this protocol strictly for thorough, accurate research.
 
@@ -45,10 +42,24 @@ TASK: {query}
     # Add previous messages for context
     if state.get("messages"):
         messages.extend(state["messages"])
-    
-    response = llm.invoke(messages)
-    
+    return messages
+
+
+def _node_output(response) -> RetrivalGraphState:
     return {
         "messages": [response],
         "tool_calls": response.tool_calls if hasattr(response, 'tool_calls') and response.tool_calls else [],
     }
+
+
+def orchestrator_node(state: RetrivalGraphState, llm) -> RetrivalGraphState:
+    # LLM already has tools bound (injected from graph.py)
+    # Use llm.invoke() to call the model with tools
+    response = llm.invoke(_build_messages(state))
+    return _node_output(response)
+
+
+async def aorchestrator_node(state: RetrivalGraphState, llm) -> RetrivalGraphState:
+    # Same node for graph.ainvoke: the LLM call awaits instead of blocking the event loop
+    response = await llm.ainvoke(_build_messages(state))
+    return _node_output(response)
@@ -1,5 +1,6 @@
+import asyncio
 from typing import Annotated, List, Dict, Any
-from langchain_core.tools import tool
+from langchain_core.tools import StructuredTool
 from langgraph.prebuilt import InjectedState
 
 class RetrieveTool:
@@ -10,13 +11,33 @@ class RetrieveTool:
         self.retrival_methods = retrival_methods
         self.reranking_service = reranking_service
 
+    @staticmethod
+    def _output(reranked_results: List[Dict[str, Any]], state: dict) -> List[Dict[str, Any]]:
+        filtered_results = [
+            {
+                "breadcrumbs": chunk.get("breadcrumbs", ""),
+                "contextualized_chunk": chunk.get("contextualized_chunk", ""),
+                "line_number": chunk.get("line_number"),
+                "end_line_number": chunk.get("end_line_number"),
+                "page_number": chunk.get("page_number"),
+                "end_page_number": chunk.get("end_page_number"),
+                "reranking_score": chunk.get("reranking_score")
+            }
+            for chunk in reranked_results
+        ]
+
+        # Update state with full results for background history
+        # Note: InjectedState allows you to read/mutate the state dict directly
+        state.setdefault("retrieved_chunks", []).extend(reranked_results)
+        return filtered_results
+
     def get_tool(self):
         """
         Returns a clean tool function for the LLM. 
         This closure captures 'self' so the LLM never sees it as a parameter.
+        The tool has a sync implementation (graph.invoke) and an async one (graph.ainvoke).
         """
 
-        @tool
         def retrieve_from_knowledge_base(
             query: str,
             vector_search_top_k: int,
@@ -73,23 +94,45 @@ class RetrieveTool:
                 chunks=results,
                 top_k=reranking_top_k
             )
+            reranked_results = self.retrival_methods.fetch_payloads(
+                document_id=state.get("document_id"),
+                chunks=reranked_results,
+            )
 
             # --- Formatting Output ---
-            filtered_results = [
-                {
-                    "breadcrumbs": chunk.get("breadcrumbs", ""),
-                    "contextualized_chunk": chunk.get("contextualized_chunk", ""),
-                    "line_number": chunk.get("line_number"),
-                    "page_number": chunk.get("page_number"),
-                    "reranking_score": chunk.get("reranking_score")
-                }
-                for chunk in reranked_results
-            ]
-
-            # Update state with full results for background history
-            # Note: InjectedState allows you to read/mutate the state dict directly
-            state.setdefault("retrieved_chunks", []).extend(reranked_results)
-            # print("Retrieve Tool Results:", filtered_results)
-            return filtered_results
-
-        return retrieve_from_knowledge_base
\ No newline at end of file
+            return self._output(reranked_results, state)
+
+        async def aretrieve_from_knowledge_base(
+            query: str,
+            vector_search_top_k: int,
+            bm25_top_k: int,
+            reranking_top_k: int,
+            state: Annotated[dict, InjectedState],
+        ) -> List[Dict[str, Any]]:
+            print("Retrieve Tool Invoked with query:", query)
+            document_id = state.get("document_id")
+            # Both searches wait on Weaviate at the same time
+            vector_search_results, bm25_results = await asyncio.gather(
+                self.retrival_methods.avector_search(query=query, document_id=document_id, top_k=vector_search_top_k),
+                self.retrival_methods.abm25_search(query=query, document_id=document_id, top_k=bm25_top_k),
+            )
+
+            results = self.retrival_methods.reciprocal_rank_fusion(
+                vector_results=vector_search_results,
+                bm25_results=bm25_results
+            )
+            reranked_results = await self.reranking_service.arerank(
+                query=query,
+                chunks=results,
+                top_k=reranking_top_k
+            )
+            reranked_results = await self.retrival_methods.afetch_payloads(
+                document_id=document_id,
+                chunks=reranked_results,
+            )
+            return self._output(reranked_results, state)
+
+        return StructuredTool.from_function(
+            func=retrieve_from_knowledge_base,
+            coroutine=aretrieve_from_knowledge_base,
+        )
\ No newline at end of file
@@ -1,13 +1,22 @@
 from backend.graphs.retrival.state import RetrivalGraphState
-from backend.core.tavily_client import tavily_client
-from langchain_core.tools import tool
+from backend.core.tavily_client import async_tavily_client, tavily_client
+from langchain_core.tools import StructuredTool
 from langgraph.prebuilt import InjectedState
 from typing import Annotated
 from backend.utils.decorators import track_execution_time
 
-@tool
+def _record_results(query: str, results, state: dict):
+    # Update state with web results for tracking
+    if state:
+        state.setdefault("web_results", []).append({
+            "query": query,
+            "results": results
+        })
+    return results
+
+
 @track_execution_time
-def websearch_tool(
+def websearch(
     query: str,
     max_results: int = 5,
     search_depth: str = "advanced",
@@ -43,12 +52,26 @@ def websearch_tool(
         include_answer=True,
         topic=topic
     )
-    
-    # Update state with web results for tracking
-    if state:
-        state.setdefault("web_results", []).append({
-            "query": query,
-            "results": results
-        })
-    
-    return results
\ No newline at end of file
+    return _record_results(query, results, state)
+
+
+@track_execution_time
+async def awebsearch(
+    query: str,
+    max_results: int = 5,
+    search_depth: str = "advanced",
+    topic: str = "general",
+    state: Annotated[dict, InjectedState] = {}
+) -> str:
+    results = await async_tavily_client.search(
+        query=query,
+        max_results=max_results,
+        search_depth=search_depth,
+        include_answer=True,
+        topic=topic
+    )
+    return _record_results(query, results, state)
+
+
+# Sync implementation for graph.invoke, async one for graph.ainvoke
+websearch_tool = StructuredTool.from_function(func=websearch, coroutine=awebsearch, name="websearch_tool")
\ No newline at end of file
@@ -1,8 +1,14 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from backend.core.config import config
+from backend.core.embedding_client import AsyncEmbeddingClientManager
 from backend.core.logging import setup_logging
-from backend.core.redis_client import RedisClientManager
+from backend.core.redis_client import AsyncRedisClientManager, RedisClientManager
+from backend.core.db.schema import SchemaManager
+from backend.core.db.weaviate_client import AsyncWeaviateClientManager
+from backend.core.db.tenants import TenantManager
+from backend.graphs.retrival.graph import RetrivalGraphManager
 from backend.api.v1.injgestion import router as ingestion_router
 from backend.api.v1.retrival import router as retrival_router
 
@@ -15,9 +21,23 @@ async def lifespan(app: FastAPI):
     """Startup and shutdown events."""
     # Startup - verify Redis connection
     RedisClientManager.setup()
+    # Create or migrate the Weaviate collection once, not per request
+    SchemaManager.setup()
+    # Compile the retrieval graph and load its models once, not per query
+    RetrivalGraphManager.setup()
+    # Async clients for the query path, connected on the server's event loop
+    await AsyncWeaviateClientManager.get_client()
+    sweeper = None
+    if config.weaviate_multi_tenancy:
+        # Deactivate tenants nobody has queried lately
+        sweeper = asyncio.create_task(TenantManager().run_sweeper())
     yield
-    # Shutdown (if needed)
-    pass
+    # Shutdown
+    if sweeper is not None:
+        sweeper.cancel()
+    await AsyncWeaviateClientManager.close_client()
+    await AsyncRedisClientManager.close_client()
+    await AsyncEmbeddingClientManager.close_client()
 
 
 app = FastAPI(
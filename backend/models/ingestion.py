@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Optional, Union
 
 
 class ApiIngestionResponse(BaseModel):
@@ -8,4 +8,42 @@ class ApiIngestionResponse(BaseModel):
     document_name: Optional[str] = None
     total_chunks: Optional[int] = None
     processing_time_seconds: float
+    cache_stats: Optional[Dict] = None
+    contextualization_report: Optional[Dict] = None
+    streaming_report: Optional[Dict] = None
+    store_report: Optional[Dict] = None  # Weaviate writer: objects, batches, retries, objects/sec
+    reingest_report: Optional[Dict] = None
     error_message: Optional[str] = None
+
+
+class ApiBulkIngestionResponse(BaseModel):
+    status: str  # "success", "partial" or "error"
+    total_documents: int
+    succeeded: int
+    failed: int
+    total_chunks: int
+    processing_time_seconds: float
+    documents_per_second: float
+    chunks_per_second: float
+    embedding_flushes: Optional[int] = None
+    cache_stats: Optional[Dict] = None
+    store_report: Optional[Dict] = None
+    documents: List[Dict] = []  # Per-document status, id and chunk count
+    error_message: Optional[str] = None
+
+
+class ApiIngestionJobResponse(BaseModel):
+    job_id: str
+    status: str  # "queued"
+
+
+class ApiIngestionJobStatus(BaseModel):
+    job_id: str
+    status: str  # "queued", "running", "success", "partial" (bulk) or "error"
+    document_name: Optional[str] = None
+    document_id: Optional[str] = None
+    created_at: Optional[float] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    stages: List[Dict] = []  # Finished stages in order, with their duration
+    result: Optional[Union[ApiBulkIngestionResponse, ApiIngestionResponse]] = None
@@ -0,0 +1,36 @@
+"""Helpers shared by the benchmark scripts; not a script itself."""
+import resource
+import sys
+from typing import Iterator
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of the current process in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def iter_stored_objects(client=None, **query) -> Iterator:
+    """
+    Iterate over the objects of the chunk collection, across every active tenant when multi-tenant.
+    `query` is passed to `iterator` (include_vector, return_properties, ...).
+    """
+    # Imported here so the memory benchmarks measure a process without the Weaviate client loaded
+    from weaviate.classes.tenants import TenantActivityStatus
+
+    from backend.core.config import config
+    from backend.core.db.weaviate_client import get_weaviate_client
+
+    collection = (client or get_weaviate_client()).collections.get(config.weaviate_collection_name)
+    if config.weaviate_multi_tenancy:
+        handles = [
+            collection.with_tenant(name)
+            for name, tenant in collection.tenants.get().items()
+            if tenant.activity_status == TenantActivityStatus.ACTIVE
+        ]
+    else:
+        handles = [collection]
+
+    for handle in handles:
+        yield from handle.iterator(**query)
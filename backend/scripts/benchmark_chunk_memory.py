@@ -0,0 +1,108 @@
+"""
+Benchmark the memory footprint of a document's chunk state.
+
+Compares the previous layout (one dict per chunk with a list[float] embedding) against
+the compact one (slotted ChunkRecord rows viewing a single float32 embedding matrix).
+Each layout is built in a fresh process so peak RSS is measured per layout; the size of
+the serialized graph checkpoint is reported as well.
+
+Usage:
+    uv run python -m backend.scripts.benchmark_chunk_memory [--chunks 5000] [--dimensions 3072]
+"""
+import argparse
+import multiprocessing
+import time
+
+from backend.scripts._benchmark import peak_rss_mb
+
+LAYOUTS = ("dict", "compact")
+
+
+def _chunk_fields(index: int) -> dict:
+    return {
+        "chunk_id": f"00000000-0000-0000-0000-{index:012d}",
+        "content": f"Chunk {index} " + "lorem ipsum dolor sit amet " * 40,
+        "context": f"Context for chunk {index}, situating it within the document.",
+        "page_number": index // 10 + 1,
+        "end_page_number": index // 10 + 1,
+        "line_number": index % 50 + 1,
+        "end_line_number": index % 50 + 12,
+        "start_offset": index * 1_200,
+        "end_offset": index * 1_200 + 1_100,
+    }
+
+
+def _build_layout(layout: str, chunks: int, dimensions: int, serialize: bool) -> dict:
+    """Build the chunk state of one document in `layout`. Runs in a child process."""
+    import numpy as np
+
+    from backend.graphs.ingestion.nodes.embed import attach_embeddings
+    from backend.graphs.ingestion.state import ChunkRecord
+
+    baseline_rss = peak_rss_mb()
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    if layout == "dict":
+        state_chunks = [_chunk_fields(index) for index in range(chunks)]
+        for chunk in state_chunks:
+            chunk["embedding"] = rng.random(dimensions).tolist()
+    else:
+        state_chunks = [ChunkRecord(**_chunk_fields(index)) for index in range(chunks)]
+        # One embedding batch at a time, as the embedding pipeline returns them
+        embeddings = np.concatenate([
+            rng.random((min(256, chunks - offset), dimensions), dtype=np.float32)
+            for offset in range(0, chunks, 256)
+        ])
+        attach_embeddings(state_chunks, embeddings)
+        del embeddings
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "layout": layout,
+        "seconds": elapsed,
+        "peak_rss_mb": peak_rss_mb(),
+        "state_rss_mb": peak_rss_mb() - baseline_rss,
+        "checkpoint_mb": None,
+    }
+    if serialize:
+        from backend.core.db.checkpointer import JsonPlusSerializer
+
+        serde = JsonPlusSerializer(
+            pickle_fallback=True,
+            allowed_msgpack_modules=[("backend.graphs.ingestion.state", "ChunkRecord")],
+        )
+        _, payload = serde.dumps_typed({"chunks": state_chunks})
+        result["checkpoint_mb"] = len(payload) / (1024 * 1024)
+    return result
+
+
+def benchmark(chunks: int, dimensions: int, serialize: bool) -> list[dict]:
+    ctx = multiprocessing.get_context("spawn")
+    rows = []
+    for layout in LAYOUTS:
+        with ctx.Pool(1, maxtasksperchild=1) as pool:
+            rows.append(pool.apply(_build_layout, (layout, chunks, dimensions, serialize)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=5_000)
+    parser.add_argument("--dimensions", type=int, default=3_072)
+    parser.add_argument("--no-checkpoint", action="store_true", help="Skip measuring the serialized checkpoint")
+    args = parser.parse_args()
+
+    rows = benchmark(args.chunks, args.dimensions, serialize=not args.no_checkpoint)
+
+    print(f"{args.chunks} chunks x {args.dimensions} dimensions")
+    print(f"{'layout':<10}{'build sec':>11}{'peak RSS MB':>13}{'state MB':>10}{'checkpoint MB':>15}")
+    for row in rows:
+        checkpoint = f"{row['checkpoint_mb']:.1f}" if row["checkpoint_mb"] is not None else "-"
+        print(
+            f"{row['layout']:<10}{row['seconds']:>11.2f}{row['peak_rss_mb']:>13.1f}"
+            f"{row['state_rss_mb']:>10.1f}{checkpoint:>15}"
+        )
+
+
+if __name__ == "__main__":
+    main()
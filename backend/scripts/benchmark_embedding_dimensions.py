@@ -0,0 +1,117 @@
+"""
+Compare retrieval recall of reduced-dimension embeddings, with and without full-dimension rescoring.
+
+Full-dimension vectors are read from the chunk collection (the full_embedding BLOB, or the
+stored vector when the collection keeps full vectors) or embedded from --texts, one text per line.
+Queries are --query-texts (embedded) or held-out vectors from the sample. Ground truth is exact
+cosine search at full dimension. For each dimension, candidates are ranked on the truncated,
+re-normalized vectors; with a rescore limit the top candidates are re-ranked at full dimension.
+Index effects are excluded here; see benchmark_vector_index for those.
+
+Usage:
+    uv run python -m backend.scripts.benchmark_embedding_dimensions [--sample 5000] [--queries 200]
+        [--dimensions 256 512 1024 1536 3072] [--rescore-limit 0 50 100] [--texts corpus.txt] [--query-texts queries.txt]
+"""
+import argparse
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from backend.scripts._benchmark import iter_stored_objects
+from backend.services.ingestion.embedding_pipeline import get_embedding_provider
+from backend.utils.vectors import decode_vector, reduce_dimensions
+
+
+def load_full_vectors(size: int) -> np.ndarray:
+    vectors = []
+    for obj in iter_stored_objects(include_vector=True, return_properties=["full_embedding"]):
+        blob = obj.properties.get("full_embedding")
+        vectors.append(decode_vector(blob) if blob else np.asarray(obj.vector["default"], dtype=np.float32))
+        if len(vectors) >= size:
+            break
+    dimensions = {len(vector) for vector in vectors}
+    if len(dimensions) > 1:
+        raise SystemExit(f"Mixed vector sizes in the collection: {sorted(dimensions)}; use --texts")
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def embed_lines(path: Path, limit: Optional[int] = None) -> np.ndarray:
+    lines = [line.strip() for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+    return get_embedding_provider().embed(lines[:limit] if limit else lines)
+
+
+def top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k most cosine-similar corpus rows per query, best first."""
+    corpus = corpus / np.maximum(np.linalg.norm(corpus, axis=1, keepdims=True), 1e-12)
+    queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+    scores = queries @ corpus.T
+    k = min(k, corpus.shape[0])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(top, np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1), axis=1)
+
+
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    return float(np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)]))
+
+
+def benchmark(corpus: np.ndarray, queries: np.ndarray, k: int, dimensions: list[int],
+              rescore_limits: list[int]) -> list[dict]:
+    truth = top_k(corpus, queries, k)
+    rows = []
+    for size in dimensions:
+        reduced_corpus = reduce_dimensions(corpus, size)
+        reduced_queries = reduce_dimensions(queries, size)
+        for rescore_limit in rescore_limits:
+            candidates = top_k(reduced_corpus, reduced_queries, max(k, rescore_limit))
+            if rescore_limit:
+                found = np.asarray([
+                    ids[top_k(corpus[ids], query[None, :], k)[0]]
+                    for ids, query in zip(candidates, queries)
+                ])
+            else:
+                found = candidates[:, :k]
+            rows.append({
+                "dimensions": min(size, corpus.shape[1]),
+                "rescore_limit": rescore_limit,
+                "recall": recall(found, truth),
+                # In-memory ANN vector per object (before any index quantization)
+                "vector_bytes": 4 * min(size, corpus.shape[1]),
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sample", type=int, default=5_000)
+    parser.add_argument("--queries", type=int, default=200, help="Held-out vectors used as queries")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dimensions", nargs="+", type=int, default=[256, 512, 1024, 1536, 3072])
+    parser.add_argument("--rescore-limit", nargs="+", type=int, default=[0, 50, 100])
+    parser.add_argument("--texts", type=Path, default=None, help="Corpus texts to embed, one per line")
+    parser.add_argument("--query-texts", type=Path, default=None, help="Query texts to embed, one per line")
+    args = parser.parse_args()
+
+    vectors = embed_lines(args.texts, args.sample + args.queries) if args.texts else load_full_vectors(args.sample + args.queries)
+    if args.query_texts:
+        corpus, queries = vectors, embed_lines(args.query_texts, args.queries)
+    else:
+        corpus, queries = vectors[:-args.queries], vectors[-args.queries:]
+    if len(corpus) <= args.k:
+        raise SystemExit(f"Only {len(corpus)} corpus vectors; ingest more documents or pass --texts")
+    if corpus.shape[1] < max(args.dimensions):
+        print(f"Stored vectors have {corpus.shape[1]} dimensions; larger sizes are capped")
+
+    rows = benchmark(corpus, queries, args.k, args.dimensions, args.rescore_limit)
+
+    print(f"{len(corpus)} vectors, {len(queries)} queries, full dimension {corpus.shape[1]}")
+    print(f"{'dimensions':>10}{'rescore':>9}{'recall@' + str(args.k):>11}{'bytes/vector':>14}{'GB per 1M':>11}")
+    for row in rows:
+        print(
+            f"{row['dimensions']:>10}{row['rescore_limit']:>9}{row['recall']:>11.3f}"
+            f"{row['vector_bytes']:>14}{row['vector_bytes'] * 1e6 / 1024 ** 3:>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
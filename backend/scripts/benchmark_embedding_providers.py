@@ -0,0 +1,98 @@
+"""
+Compare embedding providers: bulk throughput (ingest) and single-query latency (retrieval).
+
+Texts are read from --texts (one per line) or from the content of stored chunks. Each provider
+first embeds a few texts as warm-up (model load or connection setup, reported separately), then
+embeds the whole sample through `embed` (texts/sec) and --queries texts one at a time through
+`embed_query` (p50/p99 ms). The local provider runs once per --local-backends entry.
+
+Usage:
+    uv run python -m backend.scripts.benchmark_embedding_providers [--sample 2000] [--queries 100]
+        [--providers azure local] [--local-backends torch onnx] [--texts corpus.txt]
+"""
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+from backend.scripts._benchmark import iter_stored_objects
+from backend.services.ingestion.embedding_pipeline import (
+    EMBEDDING_PROVIDERS,
+    EmbeddingProvider,
+    LocalEmbeddingProvider,
+    get_embedding_provider,
+)
+
+
+def load_texts(size: int) -> list[str]:
+    texts = []
+    for obj in iter_stored_objects(return_properties=["content"]):
+        if obj.properties.get("content"):
+            texts.append(obj.properties["content"])
+        if len(texts) >= size:
+            break
+    return texts
+
+
+def run_provider(provider: EmbeddingProvider, texts: list[str], queries: list[str]) -> dict:
+    started = time.perf_counter()
+    provider.embed(texts[:8])
+    warmup_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    embeddings = provider.embed(texts)
+    bulk_seconds = time.perf_counter() - started
+
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        provider.embed_query(query)
+        latencies.append(time.perf_counter() - started)
+
+    return {
+        "dimensions": embeddings.shape[1],
+        "warmup_seconds": warmup_seconds,
+        "texts_per_second": len(texts) / bulk_seconds,
+        "p50_ms": float(np.percentile(latencies, 50)) * 1000,
+        "p99_ms": float(np.percentile(latencies, 99)) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sample", type=int, default=2_000, help="Texts embedded in bulk")
+    parser.add_argument("--queries", type=int, default=100, help="Texts embedded one at a time")
+    parser.add_argument("--providers", nargs="+", default=list(EMBEDDING_PROVIDERS), choices=list(EMBEDDING_PROVIDERS))
+    parser.add_argument("--local-backends", nargs="+", default=["torch"], choices=["torch", "onnx"])
+    parser.add_argument("--texts", type=Path, default=None, help="Texts to embed, one per line")
+    args = parser.parse_args()
+
+    if args.texts:
+        texts = [line.strip() for line in args.texts.read_text(encoding="utf-8").splitlines() if line.strip()]
+        texts = texts[:args.sample]
+    else:
+        texts = load_texts(args.sample)
+    if not texts:
+        raise SystemExit("No texts to embed; ingest documents or pass --texts")
+    queries = texts[:args.queries]
+
+    variants = []
+    for name in args.providers:
+        if name == LocalEmbeddingProvider.name:
+            variants += [(f"local/{backend}", LocalEmbeddingProvider(backend=backend)) for backend in args.local_backends]
+        else:
+            variants.append((name, get_embedding_provider(name)))
+
+    print(f"{len(texts)} texts, {len(queries)} queries")
+    print(f"{'provider':<14}{'model':<42}{'dims':>6}{'warm-up s':>11}{'texts/sec':>11}{'p50 ms':>9}{'p99 ms':>9}")
+    for label, provider in variants:
+        row = run_provider(provider, texts, queries)
+        print(
+            f"{label:<14}{provider.model:<42}{row['dimensions']:>6}{row['warmup_seconds']:>11.2f}"
+            f"{row['texts_per_second']:>11.1f}{row['p50_ms']:>9.1f}{row['p99_ms']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark the PDF extraction engines on a folder of sample PDFs.
+
+Every engine/file pair runs in a fresh process so peak RSS is measured per engine.
+The text diff is measured against pdfplumber's output (the current default engine).
+
+Usage:
+    uv run python -m backend.scripts.benchmark_pdf_extractors path/to/pdfs [--engines pdfplumber pypdf pdfium]
+"""
+import argparse
+import difflib
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+
+from backend.scripts._benchmark import peak_rss_mb
+from backend.services.ingestion.extractors import PDF_EXTRACTORS, get_pdf_extractor
+
+BASELINE_ENGINE = "pdfplumber"
+
+
+def _run_engine(engine: str, path: str) -> dict:
+    """Extract every page of `path` with `engine`. Runs in a child process."""
+    start = time.perf_counter()
+    with get_pdf_extractor(engine)(path) as extractor:
+        pages = [extractor.extract_page(index) for index in range(extractor.page_count)]
+    elapsed = time.perf_counter() - start
+    return {
+        "pages": len(pages),
+        "seconds": elapsed,
+        "peak_rss_mb": peak_rss_mb(),
+        "text": "\n".join(pages),
+    }
+
+
+def _diff_size(baseline: str, text: str) -> int:
+    """Number of characters on added or removed lines relative to the baseline text."""
+    diff = difflib.unified_diff(baseline.splitlines(), text.splitlines(), lineterm="", n=0)
+    return sum(
+        len(line) - 1
+        for line in diff
+        if line[:1] in "+-" and not line.startswith(("+++", "---"))
+    )
+
+
+def benchmark(folder: Path, engines: list[str]) -> list[dict]:
+    pdfs = sorted(folder.glob("*.pdf"))
+    if not pdfs:
+        raise SystemExit(f"No PDFs found in {folder}")
+
+    ctx = multiprocessing.get_context("spawn")
+    totals = {engine: {"pages": 0, "seconds": 0.0, "peak_rss_mb": 0.0, "diff_chars": 0, "chars": 0, "errors": 0} for engine in engines}
+
+    for pdf in pdfs:
+        outputs = {}
+        for engine in dict.fromkeys([BASELINE_ENGINE, *engines]):
+            with ctx.Pool(1, maxtasksperchild=1) as pool:
+                try:
+                    outputs[engine] = pool.apply(_run_engine, (engine, str(pdf)))
+                except Exception as e:
+                    print(f"{engine} failed on {pdf.name}: {e}", file=sys.stderr)
+                    outputs[engine] = None
+
+        baseline = outputs[BASELINE_ENGINE]["text"] if outputs.get(BASELINE_ENGINE) else ""
+        for engine in engines:
+            result = outputs[engine]
+            if result is None:
+                totals[engine]["errors"] += 1
+                continue
+            totals[engine]["pages"] += result["pages"]
+            totals[engine]["seconds"] += result["seconds"]
+            totals[engine]["peak_rss_mb"] = max(totals[engine]["peak_rss_mb"], result["peak_rss_mb"])
+            totals[engine]["chars"] += len(result["text"])
+            totals[engine]["diff_chars"] += _diff_size(baseline, result["text"])
+
+    return [
+        {
+            "engine": engine,
+            "files": len(pdfs) - stats["errors"],
+            "pages": stats["pages"],
+            "pages_per_sec": stats["pages"] / stats["seconds"] if stats["seconds"] else 0.0,
+            "peak_rss_mb": stats["peak_rss_mb"],
+            "chars": stats["chars"],
+            "diff_chars": stats["diff_chars"],
+        }
+        for engine, stats in totals.items()
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", type=Path, help="Folder containing sample PDFs")
+    parser.add_argument("--engines", nargs="+", default=list(PDF_EXTRACTORS), choices=list(PDF_EXTRACTORS))
+    args = parser.parse_args()
+
+    rows = benchmark(args.folder, args.engines)
+
+    print(f"{'engine':<12}{'files':>7}{'pages':>8}{'pages/sec':>12}{'peak RSS MB':>13}{'chars':>11}{'diff vs ' + BASELINE_ENGINE:>22}")
+    for row in rows:
+        print(
+            f"{row['engine']:<12}{row['files']:>7}{row['pages']:>8}{row['pages_per_sec']:>12.1f}"
+            f"{row['peak_rss_mb']:>13.1f}{row['chars']:>11}{row['diff_chars']:>22}"
+        )
+
+
+if __name__ == "__main__":
+    main()
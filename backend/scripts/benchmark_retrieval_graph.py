@@ -0,0 +1,67 @@
+"""
+Measure the per-request setup cost of the /retrival endpoint.
+
+"per request" builds the retrieval services, binds the tools to the LLM and compiles the
+StateGraph on every call, as the endpoint used to; "shared" resolves the process-wide graph
+from RetrivalGraphManager. No LLM, embedding or search call is made, so the numbers are the
+setup overhead alone.
+
+Usage:
+    uv run python -m backend.scripts.benchmark_retrieval_graph [--requests 200]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from backend.core.db.weaviate_client import get_weaviate_client
+from backend.graphs.retrival.graph import RetrivalGraph, RetrivalGraphManager
+from backend.services.retrival.chunks_retrival import ChunksRetrivalService
+from backend.services.retrival.embedding_service import EmbeddingService
+from backend.services.retrival.reranking import RerankingService
+
+
+def build_per_request():
+    return RetrivalGraph(
+        retrival_methods=ChunksRetrivalService(
+            weaviate_client=get_weaviate_client(),
+            embedding_service=EmbeddingService(),
+        ),
+        reranking_service=RerankingService(),
+    ).graph
+
+
+def measure(build, requests: int) -> dict:
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        build()
+        latencies.append(time.perf_counter() - started)
+    return {
+        "mean_ms": float(np.mean(latencies)) * 1000,
+        "p50_ms": float(np.percentile(latencies, 50)) * 1000,
+        "p99_ms": float(np.percentile(latencies, 99)) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    # Model loads and client connections happen once in both modes; keep them out of the numbers
+    started = time.perf_counter()
+    RetrivalGraphManager.setup()
+    print(f"Startup (compile + model warm-up): {time.perf_counter() - started:.2f}s")
+
+    rows = [
+        ("per request", measure(build_per_request, args.requests)),
+        ("shared", measure(RetrivalGraphManager.get_graph, args.requests)),
+    ]
+    print(f"{'graph':<14}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for label, row in rows:
+        print(f"{label:<14}{row['mean_ms']:>10.3f}{row['p50_ms']:>10.3f}{row['p99_ms']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Benchmark vector index settings (quantizer, ef, rescoring) on a sample corpus.
+
+The sample is read from the chunk collection (or generated with --synthetic). The last
+--queries vectors are held out as queries and ground truth is brute-force cosine search
+over the rest. Each quantizer gets a temporary collection; for every ef and rescore limit
+the script reports recall@k, p50/p99 query latency and the vector index memory: the
+Weaviate heap growth when --metrics-url points at its Prometheus endpoint, otherwise an
+estimate of the in-memory vector size.
+
+Usage:
+    uv run python -m backend.scripts.benchmark_vector_index [--sample 5000] [--queries 200] [--k 10]
+        [--quantizers none pq bq sq] [--ef 64 128 256] [--rescore-limit 0 100] [--synthetic 3072]
+        [--metrics-url http://localhost:2112/metrics]
+"""
+import argparse
+import time
+import urllib.request
+import uuid
+from typing import Optional
+
+import numpy as np
+from weaviate.classes.config import Configure, DataType, Property, Reconfigure
+
+from backend.core.config import config
+from backend.core.db.schema import QUANTIZERS, vector_index_config
+from backend.core.db.weaviate_client import get_weaviate_client
+from backend.scripts._benchmark import iter_stored_objects
+from backend.services.ingestion.batch_writer import WeaviateBatchWriter
+from backend.services.retrival.chunks_retrival import rescore_by_vector
+
+BENCHMARK_COLLECTION = "VectorIndexBenchmark"
+
+
+def load_sample(client, size: int) -> np.ndarray:
+    """Read up to `size` stored vectors from the chunk collection (active tenants only when multi-tenant)."""
+    vectors = []
+    for obj in iter_stored_objects(client, include_vector=True, return_properties=[]):
+        vectors.append(obj.vector["default"])
+        if len(vectors) >= size:
+            break
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def synthetic_sample(size: int, dimensions: int, clusters: int = 50, seed: int = 0) -> np.ndarray:
+    """Clustered random vectors, so neighbours are not uniformly far apart."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimensions)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=size)
+    return centers[labels] + 0.5 * rng.normal(size=(size, dimensions)).astype(np.float32)
+
+
+def brute_force(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    corpus = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    scores = queries @ corpus.T
+    top = np.argpartition(-scores, k, axis=1)[:, :k]
+    return np.take_along_axis(top, np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1), axis=1)
+
+
+def heap_bytes(metrics_url: Optional[str]) -> Optional[float]:
+    if not metrics_url:
+        return None
+    with urllib.request.urlopen(metrics_url, timeout=10) as response:
+        for line in response.read().decode().splitlines():
+            if line.startswith("go_memstats_heap_inuse_bytes "):
+                return float(line.split()[1])
+    return None
+
+
+def estimated_vector_bytes(quantizer: str, dimensions: int) -> Optional[float]:
+    """Bytes per vector held in memory by the index (graph links excluded)."""
+    if quantizer == "pq":
+        return config.vector_index_pq_segments or None  # One byte per segment; Weaviate picks the default
+    return {"none": 4 * dimensions, "sq": dimensions, "bq": dimensions / 8}[quantizer]
+
+
+def build_collection(client, quantizer: str, corpus: np.ndarray):
+    if client.collections.exists(BENCHMARK_COLLECTION):
+        client.collections.delete(BENCHMARK_COLLECTION)
+    collection = client.collections.create(
+        name=BENCHMARK_COLLECTION,
+        properties=[Property(name="position", data_type=DataType.INT)],
+        vectorizer_config=Configure.Vectorizer.none(),
+        # Train on the whole sample so pq/sq compress it before the queries run
+        vector_index_config=vector_index_config(quantizer=quantizer, training_limit=len(corpus)),
+    )
+    with WeaviateBatchWriter(collection) as writer:
+        for position, vector in enumerate(corpus):
+            writer.add_object(
+                properties={"position": position},
+                vector=vector.tolist(),
+                uuid=str(uuid.uuid5(uuid.NAMESPACE_OID, f"benchmark:{position}")),
+            )
+    client.batch.wait_for_vector_indexing()
+    return collection
+
+
+def run_queries(collection, queries: np.ndarray, truth: np.ndarray, k: int, rescore_limit: int) -> dict:
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        vector = query.tolist()
+        started = time.perf_counter()
+        objects = collection.query.near_vector(
+            near_vector=vector,
+            limit=max(k, rescore_limit),
+            include_vector=bool(rescore_limit),
+            return_properties=["position"],
+        ).objects
+        if rescore_limit:
+            objects = rescore_by_vector(vector, objects)
+        latencies.append(time.perf_counter() - started)
+        found = {obj.properties["position"] for obj in objects[:k]}
+        hits += len(found & set(expected.tolist()))
+    return {
+        "recall": hits / (len(queries) * k),
+        "p50_ms": float(np.percentile(latencies, 50)) * 1000,
+        "p99_ms": float(np.percentile(latencies, 99)) * 1000,
+    }
+
+
+def benchmark(args) -> list[dict]:
+    client = get_weaviate_client()
+    total = args.sample + args.queries
+    vectors = synthetic_sample(total, args.synthetic) if args.synthetic else load_sample(client, total)
+    if len(vectors) <= args.queries + args.k:
+        raise SystemExit(
+            f"Only {len(vectors)} vectors in {config.weaviate_collection_name}; ingest more documents or use --synthetic"
+        )
+    corpus, queries = vectors[:-args.queries], vectors[-args.queries:]
+    truth = brute_force(corpus, queries, args.k)
+
+    rows = []
+    try:
+        for quantizer in args.quantizers:
+            heap_before = heap_bytes(args.metrics_url)
+            build_started = time.perf_counter()
+            collection = build_collection(client, quantizer, corpus)
+            build_seconds = time.perf_counter() - build_started
+            heap_after = heap_bytes(args.metrics_url)
+            if heap_before is not None and heap_after is not None:
+                memory_mb, memory_source = (heap_after - heap_before) / (1024 * 1024), "heap"
+            else:
+                per_vector = estimated_vector_bytes(quantizer, corpus.shape[1])
+                memory_mb = per_vector * len(corpus) / (1024 * 1024) if per_vector else None
+                memory_source = "estimate"
+
+            for ef in args.ef:
+                collection.config.update(vector_index_config=Reconfigure.VectorIndex.hnsw(ef=ef))
+                for rescore_limit in args.rescore_limit:
+                    run_queries(collection, queries[:5], truth[:5], args.k, rescore_limit)  # Warm-up
+                    rows.append({
+                        "quantizer": quantizer,
+                        "ef": ef,
+                        "rescore_limit": rescore_limit,
+                        "build_seconds": build_seconds,
+                        "memory_mb": memory_mb,
+                        "memory_source": memory_source,
+                        **run_queries(collection, queries, truth, args.k, rescore_limit),
+                    })
+    finally:
+        if client.collections.exists(BENCHMARK_COLLECTION):
+            client.collections.delete(BENCHMARK_COLLECTION)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sample", type=int, default=5_000, help="Corpus vectors")
+    parser.add_argument("--queries", type=int, default=200, help="Held-out query vectors")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--quantizers", nargs="+", default=list(QUANTIZERS), choices=list(QUANTIZERS))
+    parser.add_argument("--ef", nargs="+", type=int, default=[64, 128, 256])
+    parser.add_argument("--rescore-limit", nargs="+", type=int, default=[0, 100],
+                        help="Candidates re-ranked client-side with full vectors (0 = off)")
+    parser.add_argument("--synthetic", type=int, default=None, metavar="DIMENSIONS",
+                        help="Generate clustered random vectors instead of reading the chunk collection")
+    parser.add_argument("--metrics-url", default=None, help="Weaviate Prometheus endpoint for heap measurements")
+    args = parser.parse_args()
+
+    rows = benchmark(args)
+
+    print(f"{'quantizer':<11}{'ef':>6}{'rescore':>9}{'recall@' + str(args.k):>11}{'p50 ms':>9}{'p99 ms':>9}"
+          f"{'build sec':>11}{'memory MB':>11}")
+    for row in rows:
+        memory = f"{row['memory_mb']:.1f}" + ("*" if row["memory_source"] == "estimate" else "") if row["memory_mb"] is not None else "-"
+        print(
+            f"{row['quantizer']:<11}{row['ef']:>6}{row['rescore_limit']:>9}{row['recall']:>11.3f}"
+            f"{row['p50_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['build_seconds']:>11.1f}{memory:>11}"
+        )
+    if any(row["memory_source"] == "estimate" for row in rows):
+        print("* estimated in-memory vector size; pass --metrics-url for measured heap growth")
+
+
+if __name__ == "__main__":
+    main()
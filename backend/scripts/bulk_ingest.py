@@ -0,0 +1,57 @@
+"""
+Bulk-ingest PDFs and text files from server-side paths (files, directories or zip archives).
+
+Documents are processed concurrently, embeddings are packed across documents into full
+batches, and all objects go through one Weaviate batch writer. Prints the bulk report,
+including documents/sec and chunks/sec.
+
+Usage:
+    uv run python -m backend.scripts.bulk_ingest path/to/corpus [more paths ...] [--concurrency 8]
+"""
+import argparse
+import json
+import tempfile
+
+from backend.core.db.schema import SchemaManager
+from backend.core.logging import setup_logging
+from backend.services.ingestion.bulk import BulkIngestionService, expand_sources
+from backend.services.ingestion.loader import DocumentLoaderService
+from backend.services.ingestion.vector_store import VectorStoreService
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="Files, directories or zip archives")
+    parser.add_argument("--concurrency", type=int, default=None, help="Documents processed at once")
+    parser.add_argument("--pdf-engine", default=None)
+    parser.add_argument("--chunking-strategy", default=None)
+    parser.add_argument("--fast", action="store_true", help="Skip contextual retrieval")
+    args = parser.parse_args()
+
+    setup_logging()
+    SchemaManager.setup()
+    with tempfile.TemporaryDirectory(prefix="bulk_ingest_") as extract_dir:
+        sources = expand_sources(args.paths, extract_dir)
+        if not sources:
+            raise SystemExit("No .pdf or .txt documents found")
+
+        service = BulkIngestionService(
+            loader=DocumentLoaderService(),
+            vector_store=VectorStoreService(),
+            concurrency=args.concurrency,
+        )
+        report = service.ingest(
+            sources,
+            pdf_engine=args.pdf_engine,
+            chunking_strategy=args.chunking_strategy,
+            fast_ingest=True if args.fast else None,
+        )
+
+    documents = report.pop("documents")
+    for document in documents:
+        print(f"{document['status']:<8} {document.get('total_chunks', '-'):>6}  {document['document_name']}")
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import json
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from weaviate.classes.data import DataObject
+
+from backend.core.config import config
+
+logger = logging.getLogger(__name__)
+
+# Per-object gRPC overhead on top of properties and vector (uuid, collection, field tags)
+_OBJECT_OVERHEAD_BYTES = 128
+_MIN_BATCH_BYTES = 64 * 1024
+
+# (object, caller's reference, estimated payload bytes, tenant)
+_Entry = Tuple[DataObject, Any, int, Optional[str]]
+
+
+class BatchWriteError(RuntimeError):
+    '''Raised when objects still fail to import after every retry.'''
+
+    def __init__(self, failed: List[Dict[str, Any]]):
+        self.failed = failed
+        super().__init__(f"{len(failed)} objects failed to import, first error: {failed[0]['message']}")
+
+
+def estimate_object_bytes(properties: dict, vector: Optional[List[float]]) -> int:
+    """Approximate gRPC payload of one object: properties as JSON plus the vector as float32."""
+    return (
+        len(json.dumps(properties, default=str).encode("utf-8"))
+        + 4 * len(vector or ())
+        + _OBJECT_OVERHEAD_BYTES
+    )
+
+
+class WeaviateBatchWriter:
+    '''
+    Streaming writer over `insert_many`:
+    - objects are added one at a time (from a list or as they arrive from an iterator)
+      and sent in batches sized by payload bytes, kept under the gRPC message limit
+    - the byte budget grows while batches return faster than the target latency and
+      shrinks when they are slower, or when a whole batch fails (which is split and retried)
+    - up to `max_in_flight` batches are sent at once
+    - only the objects reported as failed are retried, with backoff; what still fails
+      is raised as BatchWriteError when the writer closes
+    - on a multi-tenant collection each object names its tenant; a batch may mix tenants
+    '''
+
+    def __init__(self, collection, max_batch_bytes: Optional[int] = None, max_in_flight: Optional[int] = None,
+                 target_latency_seconds: Optional[float] = None, max_retries: Optional[int] = None,
+                 on_written: Optional[Callable[[List[Any]], None]] = None):
+        self.collection = collection
+        self.max_batch_bytes = max_batch_bytes or config.weaviate_batch_max_bytes
+        self.batch_bytes = min(config.weaviate_batch_initial_bytes, self.max_batch_bytes)
+        self.max_in_flight = max(1, max_in_flight or config.weaviate_batch_in_flight)
+        self.target_latency_seconds = target_latency_seconds or config.weaviate_batch_target_latency_seconds
+        self.max_retries = config.weaviate_batch_max_retries if max_retries is None else max_retries
+        # Called from the adding thread with the refs of each batch once it is stored
+        self.on_written = on_written
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="weaviate-batch")
+        self._in_flight: Dict[Future, Tuple[List[_Entry], int]] = {}
+        self._buffer: List[_Entry] = []
+        self._buffer_bytes = 0
+        self._started: Optional[float] = None
+        self._elapsed = 0.0
+        self._closed = False
+        self.failed: List[Dict[str, Any]] = []
+        self.stats = {"written": 0, "batches": 0, "retried_objects": 0, "split_batches": 0}
+
+    def __enter__(self) -> "WeaviateBatchWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._closed = True
+            return
+        self.close()
+
+    def add_object(self, properties: dict, vector: Optional[List[float]] = None, uuid: Optional[str] = None,
+                   ref: Any = None, tenant: Optional[str] = None) -> None:
+        """Queue one object; `ref` is handed back through on_written once the object is stored."""
+        if self._started is None:
+            self._started = time.perf_counter()
+        size = estimate_object_bytes(properties, vector)
+        if self._buffer and self._buffer_bytes + size > self.batch_bytes:
+            self.flush()
+        self._buffer.append((DataObject(properties=properties, vector=vector, uuid=uuid), ref, size, tenant))
+        self._buffer_bytes += size
+        self._harvest(block=False)
+
+    def close(self) -> Dict[str, Any]:
+        """Send what is buffered, wait for every batch and its retries, and return the report."""
+        if not self._closed:
+            self.flush()
+            while self._in_flight:
+                self._harvest(block=True)
+            self._executor.shutdown(wait=True)
+            self._closed = True
+            if self._started is not None:
+                self._elapsed = time.perf_counter() - self._started
+            logger.info("Weaviate batch writer: %s", self.report)
+        if self.failed:
+            raise BatchWriteError(self.failed)
+        return self.report
+
+    @property
+    def report(self) -> Dict[str, Any]:
+        elapsed = self._elapsed or (time.perf_counter() - self._started if self._started else 0.0)
+        return {
+            "objects": self.stats["written"],
+            "failed": len(self.failed),
+            "batches": self.stats["batches"],
+            "retried_objects": self.stats["retried_objects"],
+            "split_batches": self.stats["split_batches"],
+            "batch_bytes": self.batch_bytes,
+            "seconds": round(elapsed, 3),
+            "objects_per_second": round(self.stats["written"] / elapsed, 1) if elapsed else 0.0,
+        }
+
+    def flush(self) -> None:
+        """Send the buffered objects now, without waiting for a full batch."""
+        if not self._buffer:
+            return
+        entries, self._buffer, self._buffer_bytes = self._buffer, [], 0
+        # Backpressure: never more than max_in_flight batches queued or running
+        while len(self._in_flight) >= self.max_in_flight:
+            self._harvest(block=True)
+        self._submit(entries, attempt=0)
+
+    def _submit(self, entries: List[_Entry], attempt: int) -> None:
+        delay = min(2 ** (attempt - 1), 30) if attempt else 0
+        self._in_flight[self._executor.submit(self._insert, entries, delay)] = (entries, attempt)
+
+    def _insert(self, entries: List[_Entry], delay: float):
+        if delay:
+            time.sleep(delay)
+        started = time.perf_counter()
+        by_tenant: Dict[Optional[str], List[int]] = {}
+        for index, entry in enumerate(entries):
+            by_tenant.setdefault(entry[3], []).append(index)
+        errors = {}
+        for tenant, indexes in by_tenant.items():
+            collection = self.collection.with_tenant(tenant) if tenant else self.collection
+            result = collection.data.insert_many([entries[index][0] for index in indexes])
+            # Map the per-request indexes back to positions in this batch
+            errors.update({indexes[i]: error for i, error in (result.errors or {}).items()})
+        return errors, time.perf_counter() - started
+
+    def _harvest(self, block: bool) -> None:
+        if not self._in_flight:
+            return
+        done, _ = wait(list(self._in_flight), timeout=None if block else 0, return_when=FIRST_COMPLETED)
+        for future in done:
+            entries, attempt = self._in_flight.pop(future)
+            try:
+                errors, latency = future.result()
+            except Exception as e:
+                self._batch_failed(entries, attempt, e)
+                continue
+
+            self.stats["batches"] += 1
+            self._adapt(sum(entry[2] for entry in entries), latency)
+            written = [entry[1] for index, entry in enumerate(entries) if index not in errors]
+            self.stats["written"] += len(written)
+            if written and self.on_written:
+                self.on_written(written)
+            if errors:
+                self._retry([entries[index] for index in errors], attempt,
+                            [error.message for error in errors.values()])
+
+    def _adapt(self, batch_bytes: int, latency: float) -> None:
+        """Scale the byte budget towards the target latency, at most 2x per step."""
+        if latency <= 0 or batch_bytes < self.batch_bytes / 2:
+            # Tail batches say little about throughput at full size
+            return
+        factor = min(2.0, max(0.5, self.target_latency_seconds / latency))
+        self.batch_bytes = int(min(self.max_batch_bytes, max(_MIN_BATCH_BYTES, self.batch_bytes * factor)))
+
+    def _batch_failed(self, entries: List[_Entry], attempt: int, error: Exception) -> None:
+        """The whole request failed (timeout, message too large, ...): shrink and retry in halves."""
+        logger.warning("Weaviate batch of %d objects failed (attempt %d): %s", len(entries), attempt + 1, error)
+        self.batch_bytes = max(_MIN_BATCH_BYTES, self.batch_bytes // 2)
+        if attempt >= self.max_retries:
+            self._record_failed(entries, str(error))
+            return
+        if len(entries) > 1:
+            middle = len(entries) // 2
+            self.stats["split_batches"] += 1
+            self._submit(entries[:middle], attempt + 1)
+            self._submit(entries[middle:], attempt + 1)
+        else:
+            self._submit(entries, attempt + 1)
+        self.stats["retried_objects"] += len(entries)
+
+    def _retry(self, entries: List[_Entry], attempt: int, messages: List[str]) -> None:
+        """Resend only the objects Weaviate rejected."""
+        if attempt >= self.max_retries:
+            for entry, message in zip(entries, messages):
+                self._record_failed([entry], message)
+            return
+        logger.warning("Retrying %d failed objects (attempt %d), first error: %s", len(entries), attempt + 2, messages[0])
+        self.stats["retried_objects"] += len(entries)
+        self._submit(entries, attempt + 1)
+
+    def _record_failed(self, entries: List[_Entry], message: str) -> None:
+        for obj, *_ in entries:
+            self.failed.append({"uuid": str(obj.uuid) if obj.uuid else None, "message": message})
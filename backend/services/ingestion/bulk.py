@@ -0,0 +1,236 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+import zipfile
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from fastapi import UploadFile
+
+from backend.core.config import config
+from backend.graphs.ingestion.nodes.chunk_node import chunk_node
+from backend.graphs.ingestion.nodes.contextual_retrival import (
+    contextualize_state,
+    create_context_limiter,
+    create_genai_client,
+)
+from backend.graphs.ingestion.nodes.embed import embed_chunks, embedding_text
+from backend.graphs.ingestion.state import RagIngestState
+from backend.services.ingestion.batch_writer import BatchWriteError
+from backend.services.ingestion.cache import IngestionCacheService, hit_rate_stats
+from backend.services.ingestion.embedding_pipeline import count_tokens, get_embedding_provider
+from backend.services.ingestion.vector_store import chunk_properties, vector_to_list
+from backend.utils.decorators import track_execution_time
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_SUFFIXES = (".pdf", ".txt")
+
+# (document_name, path on disk)
+DocumentSource = Tuple[str, str]
+
+
+def extract_archive(path: str, target: str) -> List[DocumentSource]:
+    """
+    Extract only the supported members of a zip archive into target (nested archives are
+    skipped). Raises ValueError if their uncompressed size exceeds config.bulk_zip_max_bytes.
+    """
+    with zipfile.ZipFile(path) as archive:
+        members = [
+            info for info in archive.infolist()
+            if not info.is_dir() and info.filename.lower().endswith(SUPPORTED_SUFFIXES)
+        ]
+        total_bytes = sum(info.file_size for info in members)
+        if total_bytes > config.bulk_zip_max_bytes:
+            raise ValueError(
+                f"{os.path.basename(path)} expands to {total_bytes} bytes, "
+                f"over the {config.bulk_zip_max_bytes} byte limit (BULK_ZIP_MAX_BYTES)"
+            )
+        # extract() strips absolute paths and ".." from member names
+        extracted = [archive.extract(info, target) for info in members]
+    return [(os.path.relpath(source_path, target), source_path) for source_path in extracted]
+
+
+def expand_sources(paths: Iterable[str], extract_dir: str) -> List[DocumentSource]:
+    """
+    Turn files, directories (walked recursively) and zip archives (supported members
+    extracted into extract_dir) into the list of supported documents to ingest.
+    """
+    sources: List[DocumentSource] = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                sources.extend(expand_sources(sorted(os.path.join(root, name) for name in files), extract_dir))
+        elif path.lower().endswith(".zip"):
+            sources.extend(extract_archive(path, os.path.join(extract_dir, uuid.uuid4().hex)))
+        elif path.lower().endswith(SUPPORTED_SUFFIXES):
+            sources.append((os.path.basename(path), path))
+    return sources
+
+
+class BulkIngestionService:
+    '''
+    Ingests many documents in one run:
+    - loads, chunks and contextualizes up to `concurrency` documents at a time; loading runs on
+      threads, contextualization on one event loop with one Gemini client and one concurrency limit
+    - packs chunks from all finished documents into full embedding batches
+    - writes every object through a single Weaviate batch writer
+    '''
+
+    def __init__(self, loader, vector_store, concurrency: Optional[int] = None):
+        self.loader = loader
+        self.vector_store = vector_store
+        self.concurrency = max(1, concurrency or config.bulk_ingest_concurrency)
+        self.pipeline = get_embedding_provider()
+        self.result_cache = IngestionCacheService()
+        # Flush once there is a full batch for every in-flight embedding request
+        self.flush_tokens = self.pipeline.max_batch_tokens * self.pipeline.concurrency
+
+    def _load_document(self, document_name: str, path: str, pdf_engine=None, chunking_strategy=None,
+                       fast_ingest=None) -> RagIngestState:
+        """Load and chunk one document (runs on a worker thread)."""
+        with open(path, "rb") as f:
+            raw_text = self.loader.load(file=UploadFile(file=f, filename=document_name), engine=pdf_engine)
+        document_id = str(uuid.uuid4())
+
+        return chunk_node({
+            "document_name": document_name,
+            "document_id": document_id,
+            "raw_text": raw_text,
+            "total_chunks": 0,
+            "chunks": [],
+            "chunking_strategy": chunking_strategy,
+            "fast_ingest": fast_ingest,
+            "document_fingerprint": IngestionCacheService.document_fingerprint(document_id, raw_text=raw_text),
+            "cache_stats": {}
+        })
+
+    def _discard_failed(self, failed: List[dict], chunk_documents: dict) -> None:
+        """
+        Mark the documents owning the objects that failed to import as errors, and delete
+        the chunks of theirs that were written, so no document is left half stored.
+        """
+        failed_by_document = {}
+        for failure in failed:
+            document = chunk_documents.get(failure["uuid"])
+            if document is not None:
+                failed_by_document.setdefault(id(document), (document, failure["message"]))
+        for document, message in failed_by_document.values():
+            document.update(status="error", error_message=f"Storing chunks failed: {message}")
+            chunk_ids = [chunk_id for chunk_id, owner in chunk_documents.items() if owner is document]
+            try:
+                self.vector_store.delete_chunks(chunk_ids, document["document_id"])
+            except Exception as e:
+                logger.warning("Could not remove stored chunks of %s: %s", document["document_name"], e)
+
+    @track_execution_time
+    def ingest(self, sources: List[DocumentSource], pdf_engine=None, chunking_strategy=None, fast_ingest=None,
+               on_stage: Optional[Callable[[str], None]] = None) -> dict:
+        """
+        Ingest every source; `on_stage` is called with each document name once it is contextualized.
+        A failure (loading, embedding or storing) marks only the documents it affects as errors;
+        the report always covers every source.
+        """
+        options = {"pdf_engine": pdf_engine, "chunking_strategy": chunking_strategy, "fast_ingest": fast_ingest}
+        return asyncio.run(self._ingest(sources, options, on_stage or (lambda stage: None)))
+
+    async def _ingest(self, sources: List[DocumentSource], options: dict, on_stage: Callable[[str], None]) -> dict:
+        start_time = time.time()
+        documents = []
+        pending = []  # (chunk, document entry, tenant) waiting for a full embedding batch
+        pending_tokens = 0
+        chunk_documents = {}  # chunk id -> document entry, to trace failed imports back
+        stats = {"embedded": 0, "embedding_hits": 0, "flushes": 0}
+
+        # Shared by every document, so a throttled request slows the whole run down
+        async_client = create_genai_client()
+        limiter = create_context_limiter()
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def prepare(document_name: str, path: str) -> tuple:
+            try:
+                async with slots:
+                    state = await asyncio.to_thread(self._load_document, document_name, path, **options)
+                    return document_name, await contextualize_state(state, async_client, self.result_cache, limiter), None
+            except Exception as e:
+                return document_name, None, e
+
+        def flush(writer) -> None:
+            chunks = [chunk for chunk, *_ in pending]
+            try:
+                stats["embedding_hits"] += embed_chunks(chunks, self.result_cache, self.pipeline)
+            except Exception as e:
+                # A document's chunks are always flushed together, so nothing of these was written
+                logger.warning("Embedding %d pending chunks failed: %s", len(pending), e)
+                for _, document, _ in pending:
+                    document.update(status="error", error_message=f"Embedding failed: {e}")
+                pending.clear()
+                return
+            for chunk, document, tenant in pending:
+                chunk_documents[chunk["chunk_id"]] = document
+                writer.add_object(
+                    properties=chunk_properties(chunk, document["document_id"], document["document_name"]),
+                    vector=vector_to_list(chunk["embedding"]),
+                    uuid=chunk["chunk_id"],
+                    tenant=tenant,
+                )
+                chunk["embedding"] = None
+            stats["embedded"] += len(pending)
+            stats["flushes"] += 1
+            pending.clear()
+
+        try:
+            with self.vector_store.batch_writer() as writer:
+                for next_prepared in asyncio.as_completed([prepare(name, path) for name, path in sources]):
+                    document_name, state, error = await next_prepared
+                    if error is not None:
+                        logger.warning("Bulk ingest of %s failed: %s", document_name, error)
+                        documents.append({"document_name": document_name, "status": "error", "error_message": str(error)})
+                        on_stage(document_name)
+                        continue
+
+                    document = {
+                        "document_name": document_name,
+                        "document_id": state["document_id"],
+                        "status": "success",
+                        "total_chunks": len(state["chunks"]),
+                    }
+                    documents.append(document)
+                    tenant = await asyncio.to_thread(self.vector_store.tenant, state["document_id"])
+                    for chunk in state["chunks"]:
+                        pending.append((chunk, document, tenant))
+                        pending_tokens += count_tokens(embedding_text(chunk))
+                    on_stage(document_name)
+                    if pending_tokens >= self.flush_tokens:
+                        # Contextualization of the other documents continues meanwhile
+                        await asyncio.to_thread(flush, writer)
+                        pending_tokens = 0
+
+                if pending:
+                    await asyncio.to_thread(flush, writer)
+        except BatchWriteError as e:
+            logger.warning("Bulk ingest: %s", e)
+            self._discard_failed(e.failed, chunk_documents)
+        finally:
+            await async_client.aio.aclose()
+        on_stage("store")
+
+        elapsed = time.time() - start_time
+        succeeded = sum(1 for document in documents if document["status"] == "success")
+        failed = len(documents) - succeeded
+        stored_chunks = sum(document["total_chunks"] for document in documents if document["status"] == "success")
+        return {
+            "status": "success" if not failed else ("partial" if succeeded else "error"),
+            "total_documents": len(documents),
+            "succeeded": succeeded,
+            "failed": failed,
+            "total_chunks": stored_chunks,
+            "processing_time_seconds": elapsed,
+            "documents_per_second": round(succeeded / elapsed, 3) if elapsed else 0.0,
+            "chunks_per_second": round(stored_chunks / elapsed, 3) if elapsed else 0.0,
+            "embedding_flushes": stats["flushes"],
+            "cache_stats": {"embedding": hit_rate_stats(stats["embedding_hits"], stats["embedded"])},
+            "store_report": writer.report,
+            "documents": documents,
+        }
@@ -0,0 +1,151 @@
+import base64
+import hashlib
+import json
+import logging
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backend.core.config import config
+from backend.core.redis_client import get_redis_client
+from backend.utils.vectors import embedding_identity
+
+logger = logging.getLogger(__name__)
+
+
+def document_text(raw_text) -> str:
+    """The whole text of loader output: LineIndexedText, PDF page records or a plain string."""
+    if isinstance(raw_text, str):
+        return raw_text
+    if isinstance(raw_text, list):
+        return "\f".join(page.get("text") or "" for page in raw_text)
+    return raw_text.text
+
+
+class IngestionCacheService:
+    '''
+    Content-addressed cache for contextualization and embedding results, kept in Redis.
+    Keys hash every input that determines a result, so a re-uploaded document or a repeated
+    chunk is served from the cache instead of the providers. Entries expire after a sliding
+    TTL, and the least recently used ones are evicted once the cache holds more than max_entries.
+    A missing Redis disables the cache instead of failing ingestion.
+    '''
+    CONTEXT_PREFIX = "ingest_cache:context:"
+    EMBEDDING_PREFIX = "ingest_cache:embedding:"
+    LRU_KEY = "ingest_cache:lru"
+
+    def __init__(self, redis_client=None, ttl_seconds: int | None = None, max_entries: int | None = None):
+        self.ttl_seconds = ttl_seconds or config.ingest_cache_ttl_seconds
+        self.max_entries = max_entries or config.ingest_cache_max_entries
+        self.redis_client = None
+        if config.ingest_cache_enabled:
+            try:
+                self.redis_client = redis_client or get_redis_client()
+            except ConnectionError as e:
+                logger.warning("Ingestion cache disabled: %s", e)
+
+    @property
+    def enabled(self) -> bool:
+        return self.redis_client is not None
+
+    @staticmethod
+    def _hash(*parts: str) -> str:
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def document_fingerprint(document_id: str, document_key: Optional[str] = None, raw_text=None) -> str:
+        """
+        Scopes cached contexts to one document, so a chunk never reuses context generated for another
+        document that merely shares a file name or some text. In order of preference:
+        - `document_key`, a stable identity supplied by the caller (kept across versions of a document);
+        - `raw_text`, the loaded upload, hashed whole (an unchanged re-upload hits the cache);
+        - `document_id`, stable across re-ingest and resume, and unique for every raw-text ingest.
+        """
+        if document_key:
+            return IngestionCacheService._hash("document_key", document_key)
+        if raw_text is not None:
+            return IngestionCacheService._hash("document_text", document_text(raw_text))
+        return IngestionCacheService._hash("document_id", document_id)
+
+    def context_key(self, content: str, document_fingerprint: str, schema_name: str) -> str:
+        return self.CONTEXT_PREFIX + self._hash(
+            content, document_fingerprint, config.llm_model, config.contextual_prompt_version, schema_name
+        )
+
+    def embedding_key(self, text: str) -> str:
+        # Full-length vectors are cached, so the key ignores EMBEDDING_DIMENSIONS
+        return self.EMBEDDING_PREFIX + self._hash(text, embedding_identity(dimensions=0))
+
+    # -- reads -----------------------------------------------------------------
+
+    def _get_many(self, keys: List[str]) -> List[Optional[str]]:
+        if not self.enabled or not keys:
+            return [None] * len(keys)
+        try:
+            values = self.redis_client.mget(keys)
+            hits = [key for key, value in zip(keys, values) if value is not None]
+            if hits:
+                # Sliding TTL plus recency bump for LRU eviction
+                now = time.time()
+                pipe = self.redis_client.pipeline(transaction=False)
+                for key in hits:
+                    pipe.expire(key, self.ttl_seconds)
+                pipe.zadd(self.LRU_KEY, {key: now for key in hits})
+                pipe.execute()
+            return values
+        except Exception as e:
+            logger.warning("Ingestion cache read failed: %s", e)
+            return [None] * len(keys)
+
+    def get_contexts(self, keys: List[str]) -> List[Optional[dict]]:
+        return [json.loads(value) if value is not None else None for value in self._get_many(keys)]
+
+    def get_embeddings(self, keys: List[str]) -> List[Optional[np.ndarray]]:
+        return [
+            np.frombuffer(base64.b64decode(value), dtype=np.float32) if value is not None else None
+            for value in self._get_many(keys)
+        ]
+
+    # -- writes ----------------------------------------------------------------
+
+    def _set_many(self, items: Dict[str, str]) -> None:
+        if not self.enabled or not items:
+            return
+        try:
+            now = time.time()
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.setex(key, self.ttl_seconds, value)
+            pipe.zadd(self.LRU_KEY, {key: now for key in items})
+            # Drop LRU entries whose keys have expired by TTL
+            pipe.zremrangebyscore(self.LRU_KEY, "-inf", now - self.ttl_seconds)
+            pipe.zcard(self.LRU_KEY)
+            size = pipe.execute()[-1]
+            if size > self.max_entries:
+                self._evict(size - self.max_entries)
+        except Exception as e:
+            logger.warning("Ingestion cache write failed: %s", e)
+
+    def _evict(self, count: int) -> None:
+        evicted = [key for key, _ in self.redis_client.zpopmin(self.LRU_KEY, count)]
+        if evicted:
+            self.redis_client.delete(*evicted)
+
+    def set_context(self, key: str, value: dict) -> None:
+        self._set_many({key: json.dumps(value)})
+
+    def set_embeddings(self, items: Dict[str, np.ndarray]) -> None:
+        self._set_many({
+            key: base64.b64encode(np.asarray(embedding, dtype=np.float32).tobytes()).decode("ascii")
+            for key, embedding in items.items()
+        })
+
+
+def hit_rate_stats(hits: int, total: int) -> dict:
+    """Cache statistics in the shape reported by the ingestion response."""
+    return {
+        "hits": hits,
+        "misses": total - hits,
+        "hit_rate": round(hits / total, 4) if total else 0.0,
+    }
@@ -0,0 +1,102 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from backend.core.config import config
+from backend.core.db.checkpointer import connect_checkpoint_db, get_checkpointer
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointRegistry:
+    '''
+    Keeps track of the ingestion threads that have graph checkpoints, next to the
+    checkpoints themselves. A thread is registered when an ingestion starts, marked
+    failed when it raises, and deleted (with its checkpoints) once the document is
+    stored. Failed threads stay resumable until garbage-collected.
+    '''
+    _conn = None
+    _lock = threading.Lock()
+
+    def __init__(self, checkpointer=None):
+        self.checkpointer = checkpointer or get_checkpointer()
+        if self.enabled:
+            self._ensure_table()
+
+    @property
+    def enabled(self) -> bool:
+        return self.checkpointer is not None
+
+    @classmethod
+    def _connection(cls):
+        if cls._conn is None:
+            cls._conn = connect_checkpoint_db()
+        return cls._conn
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self._lock:
+            conn = self._connection()
+            rows = conn.execute(sql, params).fetchall()
+            conn.commit()
+            return rows
+
+    def _ensure_table(self) -> None:
+        self._execute(
+            """CREATE TABLE IF NOT EXISTS ingest_threads (
+                thread_id TEXT PRIMARY KEY,
+                document_name TEXT,
+                status TEXT NOT NULL,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+
+    def register(self, thread_id: str, document_name: str) -> None:
+        if not self.enabled:
+            return
+        now = time.time()
+        self._execute(
+            """INSERT INTO ingest_threads (thread_id, document_name, status, created_at, updated_at)
+               VALUES (?, ?, 'running', ?, ?)
+               ON CONFLICT(thread_id) DO UPDATE SET status = 'running', error = NULL, updated_at = excluded.updated_at""",
+            (thread_id, document_name, now, now),
+        )
+
+    def mark_failed(self, thread_id: str, error: str) -> None:
+        if not self.enabled:
+            return
+        self._execute(
+            "UPDATE ingest_threads SET status = 'failed', error = ?, updated_at = ? WHERE thread_id = ?",
+            (error, time.time(), thread_id),
+        )
+
+    def complete(self, thread_id: str) -> None:
+        """The document is stored: its checkpoints are no longer needed."""
+        if not self.enabled:
+            return
+        self.checkpointer.delete_thread(thread_id)
+        self._execute("DELETE FROM ingest_threads WHERE thread_id = ?", (thread_id,))
+
+    def list_threads(self) -> List[Dict]:
+        if not self.enabled:
+            return []
+        rows = self._execute(
+            "SELECT thread_id, document_name, status, error, created_at, updated_at FROM ingest_threads ORDER BY updated_at DESC"
+        )
+        columns = ["document_id", "document_name", "status", "error", "created_at", "updated_at"]
+        return [dict(zip(columns, row)) for row in rows]
+
+    def collect_garbage(self, max_age_seconds: Optional[int] = None) -> int:
+        """Delete the checkpoints of threads not updated for max_age_seconds. Returns the number removed."""
+        if not self.enabled:
+            return 0
+        cutoff = time.time() - (max_age_seconds if max_age_seconds is not None else config.ingest_checkpoint_ttl_seconds)
+        stale = [row[0] for row in self._execute("SELECT thread_id FROM ingest_threads WHERE updated_at < ?", (cutoff,))]
+        for thread_id in stale:
+            self.checkpointer.delete_thread(thread_id)
+            self._execute("DELETE FROM ingest_threads WHERE thread_id = ?", (thread_id,))
+        if stale:
+            logger.info("Removed checkpoints of %d stale ingestion threads", len(stale))
+        return len(stale)
@@ -0,0 +1,270 @@
+import asyncio
+import base64
+import logging
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Type
+
+import numpy as np
+import openai
+from openai import AsyncAzureOpenAI, AzureOpenAI
+
+from backend.core.config import config
+from backend.core.embedding_client import get_async_embedding_client, get_embedding_client
+from backend.utils.concurrency import jittered_backoff
+from backend.utils.vectors import embedding_model
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+
+    _ENCODING = tiktoken.get_encoding("cl100k_base")  # text-embedding-3-* tokenizer
+except Exception:  # tiktoken is optional; fall back to a character estimate
+    _ENCODING = None
+
+_RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+
+
+def count_tokens(text: str) -> int:
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def _decode_embedding(embedding) -> np.ndarray:
+    if isinstance(embedding, str):
+        return np.frombuffer(base64.b64decode(embedding), dtype=np.float32)
+    return np.asarray(embedding, dtype=np.float32)
+
+
+def _retry_wait(error: Exception, attempt: int) -> float:
+    """Seconds before the next attempt: the provider's retry-after when given, else jittered backoff."""
+    response = getattr(error, "response", None)
+    if response is not None and response.headers.get("retry-after"):
+        try:
+            return float(response.headers["retry-after"])
+        except ValueError:
+            pass
+    return jittered_backoff(attempt, cap=30.0)
+
+
+OnBatch = Callable[[List[int], np.ndarray], None]
+
+
+class EmbeddingProvider(ABC):
+    '''
+    Base interface for embedding backends used by ingestion and retrieval.
+    `embed` returns one float32 row per text; `identity` (provider:model) is recorded on the
+    collection, so documents and queries are always embedded by the same model.
+    '''
+    name: str = ""
+
+    def __init__(self, model: Optional[str] = None):
+        self.model = model or embedding_model(self.name)
+        # Used by bulk ingestion to decide when enough chunks are pending for full batches
+        self.max_batch_tokens = config.embedding_max_batch_tokens
+        self.concurrency = 1
+
+    @property
+    def identity(self) -> str:
+        return f"{self.name}:{self.model}"
+
+    @abstractmethod
+    def embed(self, texts: List[str], on_batch: Optional[OnBatch] = None) -> np.ndarray:
+        """
+        Embed all texts into one float32 matrix, row i for texts[i]. `on_batch` receives (text indices,
+        embedding rows) as each batch completes, so callers can persist progress before the call returns.
+        """
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.embed([text])[0]
+
+    async def aembed_query(self, text: str) -> np.ndarray:
+        """embed_query for the event loop; runs on a worker thread unless the provider has an async client."""
+        return await asyncio.to_thread(self.embed_query, text)
+
+    def warm_up(self) -> None:
+        """Load models ahead of the first request; remote providers have nothing to load."""
+
+
+class AzureEmbeddingProvider(EmbeddingProvider):
+    '''
+    Embeds texts through the pooled Azure OpenAI client.
+    Batches are packed by token count up to the provider's per-request limits, and several batches
+    are kept in flight on a thread pool, each with bounded, jittered retries.
+    '''
+    name = "azure"
+
+    def __init__(self, client: Optional[AzureOpenAI] = None, model: Optional[str] = None,
+                 async_client: Optional[AsyncAzureOpenAI] = None):
+        super().__init__(model)
+        self.client = client or get_embedding_client()
+        self._async_client = async_client
+        self.max_batch_size = config.embedding_max_batch_size
+        self.concurrency = max(1, config.embedding_concurrency)
+        self.max_attempts = max(1, config.embedding_max_attempts)
+
+    def pack_batches(self, texts: List[str]) -> List[List[int]]:
+        """Group text indices into batches that stay under the token and input-count limits."""
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+        for i, text in enumerate(texts):
+            tokens = count_tokens(text)
+            if current and (current_tokens + tokens > self.max_batch_tokens or len(current) >= self.max_batch_size):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _embed_batch(self, batch: List[str]) -> np.ndarray:
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                # base64 is decoded straight into float32, never into Python floats
+                response = self.client.embeddings.create(
+                    input=batch,
+                    model=self.model,
+                    encoding_format="base64"
+                )
+                return np.stack([
+                    _decode_embedding(item.embedding) for item in sorted(response.data, key=lambda x: x.index)
+                ])
+            except _RETRYABLE_ERRORS as e:
+                if attempt == self.max_attempts:
+                    raise
+                wait_time = _retry_wait(e, attempt)
+                logger.warning(
+                    "Embedding batch of %d failed (%s), attempt %d/%d, retrying in %.1fs",
+                    len(batch), e, attempt, self.max_attempts, wait_time,
+                )
+                time.sleep(wait_time)
+
+    def embed(self, texts: List[str], on_batch: Optional[OnBatch] = None) -> np.ndarray:
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        batches = self.pack_batches(texts)
+        embeddings: Optional[np.ndarray] = None
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as executor:
+            futures = {executor.submit(self._embed_batch, [texts[i] for i in batch]): batch for batch in batches}
+            for future in as_completed(futures):
+                batch = futures[future]
+                batch_embeddings = future.result()
+                if embeddings is None:
+                    embeddings = np.empty((len(texts), batch_embeddings.shape[1]), dtype=np.float32)
+                embeddings[batch] = batch_embeddings
+                if on_batch is not None:
+                    on_batch(batch, batch_embeddings)
+
+        logger.info(
+            "Embedded %d texts in %d batches (%d in flight) in %.2fs",
+            len(texts), len(batches), min(self.concurrency, len(batches)), time.perf_counter() - start,
+        )
+        return embeddings
+
+    def embed_query(self, text: str) -> np.ndarray:
+        # One request, no thread pool
+        return self._embed_batch([text])[0]
+
+    async def aembed_query(self, text: str) -> np.ndarray:
+        client = self._async_client or get_async_embedding_client()
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                response = await client.embeddings.create(input=[text], model=self.model, encoding_format="base64")
+                return _decode_embedding(response.data[0].embedding)
+            except _RETRYABLE_ERRORS as e:
+                if attempt == self.max_attempts:
+                    raise
+                wait_time = _retry_wait(e, attempt)
+                logger.warning(
+                    "Query embedding failed (%s), attempt %d/%d, retrying in %.1fs",
+                    e, attempt, self.max_attempts, wait_time,
+                )
+                await asyncio.sleep(wait_time)
+
+
+@lru_cache(maxsize=4)
+def _load_sentence_transformer(model: str, backend: str):
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError as e:
+        raise ValueError("Embedding provider 'local' requires the sentence-transformers package") from e
+    if backend == "torch":
+        return SentenceTransformer(model, device="cpu")
+    try:
+        return SentenceTransformer(model, device="cpu", backend=backend)
+    except ImportError as e:
+        raise ValueError(f"Local embedding backend '{backend}' requires optimum[onnxruntime]") from e
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    '''
+    Embeds texts on the CPU with a sentence-transformers model (PyTorch or ONNX Runtime), no network call.
+    Texts are sorted by length so each batch pads to similar sizes, and several batches are encoded
+    in parallel on a thread pool (inference releases the GIL). The model is loaded once per process.
+    '''
+    name = "local"
+
+    def __init__(self, model: Optional[str] = None, backend: Optional[str] = None):
+        super().__init__(model)
+        self.backend = (backend or config.local_embedding_backend).lower()
+        self.batch_size = max(1, config.local_embedding_batch_size)
+        self.concurrency = max(1, config.local_embedding_workers)
+
+    @property
+    def encoder(self):
+        return _load_sentence_transformer(self.model, self.backend)
+
+    def _encode(self, batch: List[str]) -> np.ndarray:
+        return self.encoder.encode(
+            batch, batch_size=len(batch), convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False
+        ).astype(np.float32, copy=False)
+
+    def embed(self, texts: List[str], on_batch: Optional[OnBatch] = None) -> np.ndarray:
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        batches = [order[i:i + self.batch_size] for i in range(0, len(order), self.batch_size)]
+        embeddings = np.empty((len(texts), self.encoder.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as executor:
+            futures = {executor.submit(self._encode, [texts[i] for i in batch]): batch for batch in batches}
+            for future in as_completed(futures):
+                batch = futures[future]
+                batch_embeddings = future.result()
+                embeddings[batch] = batch_embeddings
+                if on_batch is not None:
+                    on_batch(batch, batch_embeddings)
+
+        logger.info(
+            "Embedded %d texts locally in %d batches (%s) in %.2fs",
+            len(texts), len(batches), self.backend, time.perf_counter() - start,
+        )
+        return embeddings
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self._encode([text])[0]
+
+    def warm_up(self) -> None:
+        self.embed_query("warm up")
+
+
+EMBEDDING_PROVIDERS: Dict[str, Type[EmbeddingProvider]] = {
+    provider.name: provider for provider in (AzureEmbeddingProvider, LocalEmbeddingProvider)
+}
+
+
+def get_embedding_provider(name: Optional[str] = None) -> EmbeddingProvider:
+    """The configured embedding provider (EMBEDDING_PROVIDER), or the one named."""
+    name = (name or config.embedding_provider).lower()
+    if name not in EMBEDDING_PROVIDERS:
+        raise ValueError(f"Unknown embedding provider '{name}', expected one of: {', '.join(EMBEDDING_PROVIDERS)}")
+    return EMBEDDING_PROVIDERS[name]()
@@ -0,0 +1,152 @@
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Dict, Type, Union
+
+PdfSource = Union[str, BinaryIO]
+
+
+class PdfTextExtractor(ABC):
+    '''
+    Base interface for PDF text-extraction engines.
+    An extractor is opened on a path or binary file object and extracts one page at a time,
+    so callers can put a time budget around every page.
+    '''
+    name: str = ""
+
+    def __init__(self, source: PdfSource):
+        self.source = source
+
+    @property
+    @abstractmethod
+    def page_count(self) -> int:
+        ...
+
+    @abstractmethod
+    def extract_page(self, index: int) -> str:
+        """Return the text of the zero-based page `index`."""
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "PdfTextExtractor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class PdfPlumberExtractor(PdfTextExtractor):
+    '''Layout-aware extraction through pdfplumber (pdfminer). Slowest, used as the fidelity baseline.'''
+    name = "pdfplumber"
+
+    def __init__(self, source: PdfSource):
+        import pdfplumber
+
+        super().__init__(source)
+        self._pdf = pdfplumber.open(source)
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pdf.pages)
+
+    def extract_page(self, index: int) -> str:
+        page = self._pdf.pages[index]
+        try:
+            return page.extract_text() or ""
+        finally:
+            page.close()
+
+    def close(self) -> None:
+        self._pdf.close()
+
+
+class PyPdfExtractor(PdfTextExtractor):
+    '''Pure-python extraction through pypdf (falls back to PyPDF2, which is a project dependency).'''
+    name = "pypdf"
+
+    def __init__(self, source: PdfSource):
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            from PyPDF2 import PdfReader
+
+        super().__init__(source)
+        self._reader = PdfReader(source)
+
+    @property
+    def page_count(self) -> int:
+        return len(self._reader.pages)
+
+    def extract_page(self, index: int) -> str:
+        return self._reader.pages[index].extract_text() or ""
+
+
+class PyMuPdfExtractor(PdfTextExtractor):
+    '''MuPDF-based extraction through PyMuPDF. Optional dependency: `pip install pymupdf`.'''
+    name = "pymupdf"
+
+    def __init__(self, source: PdfSource):
+        try:
+            import fitz
+        except ImportError as e:
+            raise ValueError("PDF engine 'pymupdf' requires the pymupdf package") from e
+
+        super().__init__(source)
+        if isinstance(source, str):
+            self._doc = fitz.open(source)
+        else:
+            self._doc = fitz.open(stream=source.read(), filetype="pdf")
+
+    @property
+    def page_count(self) -> int:
+        return self._doc.page_count
+
+    def extract_page(self, index: int) -> str:
+        return self._doc.load_page(index).get_text() or ""
+
+    def close(self) -> None:
+        self._doc.close()
+
+
+class PdfiumExtractor(PdfTextExtractor):
+    '''PDFium-based extraction through pypdfium2 (installed alongside pdfplumber).'''
+    name = "pdfium"
+
+    def __init__(self, source: PdfSource):
+        try:
+            import pypdfium2
+        except ImportError as e:
+            raise ValueError("PDF engine 'pdfium' requires the pypdfium2 package") from e
+
+        super().__init__(source)
+        self._pdf = pypdfium2.PdfDocument(source)
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pdf)
+
+    def extract_page(self, index: int) -> str:
+        page = self._pdf[index]
+        textpage = page.get_textpage()
+        try:
+            # PDFium terminates lines with CRLF
+            return (textpage.get_text_range() or "").replace("\r\n", "\n")
+        finally:
+            textpage.close()
+            page.close()
+
+    def close(self) -> None:
+        self._pdf.close()
+
+
+PDF_EXTRACTORS: Dict[str, Type[PdfTextExtractor]] = {
+    extractor.name: extractor
+    for extractor in (PdfPlumberExtractor, PyPdfExtractor, PyMuPdfExtractor, PdfiumExtractor)
+}
+
+
+def get_pdf_extractor(name: str) -> Type[PdfTextExtractor]:
+    """Look up an extraction engine by name."""
+    try:
+        return PDF_EXTRACTORS[name]
+    except KeyError:
+        raise ValueError(f"Unknown PDF engine '{name}', expected one of: {', '.join(PDF_EXTRACTORS)}")
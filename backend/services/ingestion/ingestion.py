@@ -1,7 +1,22 @@
+from backend.core.config import config
+from backend.graphs.ingestion.nodes.chunk_node import chunk_node
+from backend.graphs.ingestion.state import chunks_to_enrich
+from backend.services.ingestion.cache import IngestionCacheService
+from backend.services.ingestion.checkpoints import CheckpointRegistry
+from backend.services.ingestion.streaming import StreamingIngestionPipeline
+from backend.services.ingestion.vector_store import POSITION_PROPERTIES
 from backend.utils.decorators import track_execution_time
+from typing import Callable, Optional
 import time
 import uuid
 
+# Called with a stage name each time a stage finishes (used for job progress)
+StageCallback = Callable[[str], None]
+
+
+def _no_progress(stage: str) -> None:
+    pass
+
 class DocumentIngestionService:
     '''
     Orchestrates the ingestion of documents:
@@ -9,30 +24,75 @@ class DocumentIngestionService:
     - runs processing graph
     - stores metadata and embeddings in weviate db
     '''
-    def __init__(self,loader, graph, vector_store):
+    def __init__(self,loader, graph, vector_store, enrichment_graph=None, checkpoints=None):
         self.loader = loader
         self.graph = graph
         self.vector_store = vector_store
+        self.enrichment_graph = enrichment_graph
+        self.checkpoints = checkpoints or CheckpointRegistry()
+
+    def _run_graph(self, graph_input, document_id: str, on_stage: StageCallback, state: Optional[dict] = None) -> dict:
+        """
+        Stream the graph under the document's checkpoint thread and return the final state.
+        Same result as invoke, but reports each node as it finishes. A None input resumes
+        from the thread's last checkpoint, on top of `state`.
+        """
+        run_config = {"configurable": {"thread_id": document_id}}
+        graph_output = dict(state or graph_input)
+        for update in self.graph.stream(graph_input, run_config, stream_mode="updates"):
+            for node, node_output in update.items():
+                graph_output = {**graph_output, **(node_output or {})}
+                on_stage(node)
+        return graph_output
         
     @track_execution_time
-    def ingest_document(self, file=None, text=None):
+    def ingest_document(self, file=None, text=None, pdf_engine=None, chunking_strategy=None, fast_ingest=None, streaming=None,
+                        document_key=None, on_stage: Optional[StageCallback] = None):
+        '''
+        Ingest a new document. `document_key` is an optional stable identity of the document
+        (e.g. its id in the source system); it scopes the context cache across versions.
+        '''
+        on_stage = on_stage or _no_progress
         start_time = time.time()
+        document_id = str(uuid.uuid4())
+        checkpointed = False
         try:
-            raw_text = self.loader.load(file=file, text=text)
+            raw_text = self.loader.load(file=file, text=text, engine=pdf_engine)
+            on_stage("load")
             document_name = file.filename if file else "raw_text_input"
-            document_id = str(uuid.uuid4())
             
-            graph_output = self.graph.invoke({
+            initial_state = {
                 "document_name": document_name,
                 "document_id": document_id,
                 "raw_text": raw_text,
                 "total_chunks": 0,
-                "chunks": []
-            })
-            
-            document_id = self.vector_store.store_embeddings(
-                graph_output
-            )
+                "chunks": [],
+                "chunking_strategy": chunking_strategy,
+                "fast_ingest": fast_ingest,
+                # Raw-text inputs without a key get their own fingerprint
+                "document_fingerprint": IngestionCacheService.document_fingerprint(
+                    document_id, document_key, raw_text if file else None
+                ),
+                "cache_stats": {}
+            }
+
+            if streaming is None:
+                streaming = config.ingest_mode == "streaming"
+            if streaming:
+                # Chunk up front, then pipeline contextualize → embed → store chunk by chunk
+                chunked_state = chunk_node(initial_state)
+                on_stage("chunk_node")
+                graph_output = StreamingIngestionPipeline(self.vector_store).run(chunked_state)
+                on_stage("streaming")
+            else:
+                self.checkpoints.register(document_id, document_name)
+                checkpointed = self.checkpoints.enabled
+                graph_output = self._run_graph(initial_state, document_id, on_stage)
+                document_id = self.vector_store.store_embeddings(
+                    graph_output
+                )
+                on_stage("store")
+                self.checkpoints.complete(document_id)
             elapsed = time.time() - start_time
 
             return {
@@ -41,16 +101,152 @@ class DocumentIngestionService:
                 "document_name": file.filename if file else None,
                 "total_chunks": len(graph_output["chunks"]),
                 "processing_time_seconds": elapsed,
+                "cache_stats": graph_output.get("cache_stats"),
+                "contextualization_report": graph_output.get("contextualization_report"),
+                "store_report": graph_output.get("store_report"),
+                "streaming_report": graph_output.get("streaming_report"),
+                "error_message": None
+            }
+        except Exception as e:
+            elapsed = time.time() - start_time
+            if checkpointed:
+                self.checkpoints.mark_failed(document_id, str(e))
+            return {
+                "status": "error",
+                # With checkpoints the failed ingestion can be resumed under this id
+                "document_id": document_id if checkpointed else None,
+                "document_name": file.filename if file else None,
+                "total_chunks": None,
+                "processing_time_seconds": elapsed,
+                "error_message": str(e)
+            }
+
+    @track_execution_time
+    def resume_document(self, document_id, on_stage: Optional[StageCallback] = None):
+        '''
+        Resume a failed ingestion from its last checkpoint: completed nodes are not re-run, and
+        inside the failed node the chunks already contextualized or embedded come from the result cache.
+        '''
+        on_stage = on_stage or _no_progress
+        start_time = time.time()
+        try:
+            if not self.checkpoints.enabled:
+                raise ValueError("Ingestion checkpointing is disabled")
+            snapshot = self.graph.get_state({"configurable": {"thread_id": document_id}})
+            if not snapshot.values:
+                raise ValueError(f"No checkpoint for document_id: {document_id}")
+
+            document_name = snapshot.values.get("document_name")
+            self.checkpoints.register(document_id, document_name)
+            graph_output = snapshot.values
+            if snapshot.next:
+                graph_output = self._run_graph(None, document_id, on_stage, state=snapshot.values)
+            self.vector_store.store_embeddings(graph_output)
+            on_stage("store")
+            self.checkpoints.complete(document_id)
+            elapsed = time.time() - start_time
+
+            return {
+                "status": "success",
+                "document_id": document_id,
+                "document_name": document_name,
+                "total_chunks": len(graph_output["chunks"]),
+                "processing_time_seconds": elapsed,
+                "cache_stats": graph_output.get("cache_stats"),
+                "contextualization_report": graph_output.get("contextualization_report"),
+                "store_report": graph_output.get("store_report"),
                 "error_message": None
             }
         except Exception as e:
             elapsed = time.time() - start_time
+            self.checkpoints.mark_failed(document_id, str(e))
             return {
                 "status": "error",
-                "document_id": None,
+                "document_id": document_id,
+                "document_name": None,
+                "total_chunks": None,
+                "processing_time_seconds": elapsed,
+                "error_message": str(e)
+            }
+
+    @track_execution_time
+    def reingest_document(self, document_id, file=None, text=None, pdf_engine=None, chunking_strategy=None, fast_ingest=None,
+                          on_stage: Optional[StageCallback] = None):
+        '''
+        Re-ingest a new version of a stored document under the same document_id.
+        Chunk ids are derived from content, so only added or changed chunks are contextualized,
+        embedded and written; removed chunks are deleted in one batch and unchanged ones stay in place.
+        '''
+        on_stage = on_stage or _no_progress
+        start_time = time.time()
+        try:
+            stored = self.vector_store.fetch_chunk_index(document_id)
+            if not stored:
+                raise ValueError(f"Unknown document_id: {document_id}")
+
+            raw_text = self.loader.load(file=file, text=text, engine=pdf_engine)
+            on_stage("load")
+            document_name = file.filename if file else next(iter(stored.values())).get("document_name")
+
+            state = chunk_node({
+                "document_name": document_name,
+                "document_id": document_id,
+                "raw_text": raw_text,
+                "total_chunks": 0,
+                "chunks": [],
+                "chunking_strategy": chunking_strategy,
+                "fast_ingest": fast_ingest,
+                "document_fingerprint": IngestionCacheService.document_fingerprint(document_id),
+                "cache_stats": {}
+            })
+            on_stage("chunk_node")
+            chunks = state["chunks"]
+            new_ids = {chunk["chunk_id"] for chunk in chunks}
+
+            changed = [chunk for chunk in chunks if chunk["chunk_id"] not in stored]
+            removed = [chunk_id for chunk_id in stored if chunk_id not in new_ids]
+            moved = [
+                chunk for chunk in chunks
+                if chunk["chunk_id"] in stored
+                and any(chunk.get(name) != stored[chunk["chunk_id"]].get(name) for name in POSITION_PROPERTIES)
+            ]
+
+            store_report = None
+            if changed:
+                state["changed_chunk_ids"] = [chunk["chunk_id"] for chunk in changed]
+                state = self.enrichment_graph.invoke(state)
+                changed = chunks_to_enrich(state)
+                on_stage("enrich")
+                store_report = self.vector_store.store_chunks(changed, document_id, document_name)
+            deleted = self.vector_store.delete_chunks(removed, document_id)
+            self.vector_store.update_chunk_positions(moved, document_id)
+            on_stage("store")
+            elapsed = time.time() - start_time
+
+            return {
+                "status": "success",
+                "document_id": document_id,
+                "document_name": document_name,
+                "total_chunks": len(chunks),
+                "processing_time_seconds": elapsed,
+                "cache_stats": state.get("cache_stats"),
+                "contextualization_report": state.get("contextualization_report"),
+                "store_report": store_report,
+                "reingest_report": {
+                    "added_or_changed": len(changed),
+                    "unchanged": len(chunks) - len(changed),
+                    "removed": deleted,
+                    "repositioned": len(moved),
+                },
+                "error_message": None
+            }
+        except Exception as e:
+            elapsed = time.time() - start_time
+            return {
+                "status": "error",
+                "document_id": document_id,
                 "document_name": file.filename if file else None,
                 "total_chunks": None,
                 "processing_time_seconds": elapsed,
                 "error_message": str(e)
             }
-        
\ No newline at end of file
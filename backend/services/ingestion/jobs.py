@@ -0,0 +1,239 @@
+import json
+import logging
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from backend.core.config import config
+from backend.core.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+def worker_name(pid: Optional[int] = None) -> str:
+    """Id of the worker process `pid` (default: this one) in processing list and heartbeat keys."""
+    return f"{socket.gethostname()}:{pid or os.getpid()}"
+
+
+class IngestionJobService:
+    '''
+    Redis-backed queue of ingestion jobs shared by the API and the ingestion workers.
+    The API saves the upload to the shared upload directory and enqueues a job id;
+    a worker moves it into its own processing list, runs the ingestion and records
+    per-stage timings and the result in the job's hash, which the status endpoint reads.
+    The id leaves the processing list only when the job finishes, and each worker keeps a
+    heartbeat key alive while it runs, so the jobs of a worker that died are found by
+    requeue_orphaned once its heartbeat has expired.
+    '''
+    QUEUE_KEY = "ingest_jobs:queue"
+    JOB_PREFIX = "ingest_jobs:job:"
+    PROCESSING_PREFIX = "ingest_jobs:processing:"
+    HEARTBEAT_PREFIX = "ingest_jobs:heartbeat:"
+
+    def __init__(self, redis_client=None, worker_id: Optional[str] = None):
+        self.redis_client = redis_client or get_redis_client()
+        self.ttl_seconds = config.ingest_job_ttl_seconds
+        self.worker_id = worker_id or worker_name()
+
+    def _key(self, job_id: str) -> str:
+        return self.JOB_PREFIX + job_id
+
+    def save_upload(self, job_id: str, file) -> str:
+        """Copy an UploadFile into the upload directory shared with the workers."""
+        os.makedirs(config.ingest_upload_dir, exist_ok=True)
+        _, suffix = os.path.splitext(file.filename or "")
+        path = os.path.join(config.ingest_upload_dir, f"{job_id}{suffix}")
+        file.file.seek(0)
+        with open(path, "wb") as out:
+            shutil.copyfileobj(file.file, out)
+        return path
+
+    def enqueue(self, file=None, text: Optional[str] = None, document_id: Optional[str] = None, **options: Any) -> str:
+        """
+        Queue an ingest (or a re-ingest when document_id is given) and return the job id.
+        `options` are passed through to DocumentIngestionService.
+        """
+        job_id = str(uuid.uuid4())
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "document_name": file.filename if file else "raw_text_input",
+            "upload_path": self.save_upload(job_id, file) if file else "",
+            "text": text or "",
+            "document_id": document_id or "",
+            "options": json.dumps(options),
+            "stages": json.dumps([]),
+            "created_at": time.time(),
+        }
+        self._push(job)
+        return job_id
+
+    def enqueue_bulk(self, files: List, **options: Any) -> str:
+        """Queue a bulk ingest of several uploads (zip archives are expanded by the worker)."""
+        job_id = str(uuid.uuid4())
+        upload_dir = os.path.join(config.ingest_upload_dir, job_id)
+        os.makedirs(upload_dir, exist_ok=True)
+        for index, file in enumerate(files):
+            # One folder per upload keeps same-named files apart and their names intact
+            os.makedirs(os.path.join(upload_dir, f"{index:05d}"))
+            path = os.path.join(upload_dir, f"{index:05d}", os.path.basename(file.filename or "upload"))
+            file.file.seek(0)
+            with open(path, "wb") as out:
+                shutil.copyfileobj(file.file, out)
+
+        job = {
+            "job_id": job_id,
+            "kind": "bulk",
+            "status": "queued",
+            "document_name": f"{len(files)} uploads",
+            "upload_path": upload_dir,
+            "options": json.dumps(options),
+            "stages": json.dumps([]),
+            "created_at": time.time(),
+        }
+        self._push(job)
+        return job_id
+
+    def enqueue_resume(self, document_id: str) -> str:
+        """Queue the resumption of a failed, checkpointed ingestion."""
+        job_id = str(uuid.uuid4())
+        self._push({
+            "job_id": job_id,
+            "kind": "resume",
+            "status": "queued",
+            "document_id": document_id,
+            "options": json.dumps({}),
+            "stages": json.dumps([]),
+            "created_at": time.time(),
+        })
+        return job_id
+
+    def _push(self, job: Dict[str, Any]) -> None:
+        pipe = self.redis_client.pipeline()
+        pipe.hset(self._key(job["job_id"]), mapping=job)
+        pipe.expire(self._key(job["job_id"]), self.ttl_seconds)
+        pipe.lpush(self.QUEUE_KEY, job["job_id"])
+        pipe.execute()
+
+    def dequeue(self, timeout: int) -> Optional[Dict[str, Any]]:
+        """Block up to `timeout` seconds for the next job, move it to this worker's processing list and mark it running."""
+        processing_key = self.PROCESSING_PREFIX + self.worker_id
+        job_id = self.redis_client.blmove(self.QUEUE_KEY, processing_key, timeout, src="RIGHT", dest="LEFT")
+        if job_id is None:
+            return None
+        now = time.time()
+        pipe = self.redis_client.pipeline()
+        pipe.hset(self._key(job_id), mapping={
+            "status": "running", "started_at": now, "last_mark": now, "worker": self.worker_id,
+        })
+        pipe.hincrby(self._key(job_id), "attempts", 1)
+        pipe.execute()
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.redis_client.hgetall(self._key(job_id))
+        if not job:
+            return None
+        job["options"] = json.loads(job.get("options") or "{}")
+        job["stages"] = json.loads(job.get("stages") or "[]")
+        job["result"] = json.loads(job["result"]) if job.get("result") else None
+        for field in ("created_at", "started_at", "finished_at", "last_mark"):
+            if job.get(field):
+                job[field] = float(job[field])
+        job["attempts"] = int(job.get("attempts") or 0)
+        return job
+
+    def record_stage(self, job_id: str, stage: str) -> None:
+        """Append a finished stage with its duration; only the worker running the job writes here."""
+        key = self._key(job_id)
+        stages_json, last_mark = self.redis_client.hmget(key, ["stages", "last_mark"])
+        stages = json.loads(stages_json or "[]")
+        now = time.time()
+        stages.append({
+            "stage": stage,
+            "finished_at": now,
+            "seconds": round(now - float(last_mark or now), 3),
+        })
+        self.redis_client.hset(key, mapping={"stages": json.dumps(stages), "last_mark": now})
+
+    def finish(self, job_id: str, result: Dict[str, Any]) -> None:
+        worker_id = self.redis_client.hget(self._key(job_id), "worker") or self.worker_id
+        pipe = self.redis_client.pipeline()
+        pipe.hset(self._key(job_id), mapping={
+            "status": result.get("status") if result.get("status") in ("success", "partial") else "error",
+            "result": json.dumps(result, default=str),
+            "finished_at": time.time(),
+        })
+        pipe.lrem(self.PROCESSING_PREFIX + worker_id, 0, job_id)
+        pipe.execute()
+
+    def start_heartbeat(self) -> threading.Event:
+        """
+        Mark this worker alive now and keep refreshing the mark from a daemon thread, which dies
+        with the process however it ends. Set the returned event to stop and clear the mark.
+        """
+        key = self.HEARTBEAT_PREFIX + self.worker_id
+        stop = threading.Event()
+        self.redis_client.set(key, time.time(), ex=config.ingest_worker_heartbeat_ttl_seconds)
+
+        def beat() -> None:
+            while not stop.wait(config.ingest_worker_heartbeat_seconds):
+                try:
+                    self.redis_client.set(key, time.time(), ex=config.ingest_worker_heartbeat_ttl_seconds)
+                except Exception as e:
+                    logger.warning("Worker heartbeat failed: %s", e)
+            self.redis_client.delete(key)
+
+        threading.Thread(target=beat, name="ingest-heartbeat", daemon=True).start()
+        return stop
+
+    def requeue_orphaned(self) -> List[str]:
+        """
+        Requeue the jobs in processing lists of workers whose heartbeat has expired.
+        Returns the requeued job ids.
+        """
+        requeued = []
+        for processing_key in self.redis_client.scan_iter(match=self.PROCESSING_PREFIX + "*"):
+            worker_id = processing_key[len(self.PROCESSING_PREFIX):]
+            if not self.redis_client.exists(self.HEARTBEAT_PREFIX + worker_id):
+                requeued += self.requeue_worker(worker_id)
+        return requeued
+
+    def requeue_worker(self, worker_id: str) -> List[str]:
+        """
+        Requeue the jobs of a worker known to be dead. A job whose worker died ingest_job_max_attempts
+        times is marked as error instead. Safe to run from several processes: only the one whose
+        LREM removes the id requeues it.
+        """
+        self.redis_client.delete(self.HEARTBEAT_PREFIX + worker_id)
+        processing_key = self.PROCESSING_PREFIX + worker_id
+        requeued = []
+        for job_id in self.redis_client.lrange(processing_key, 0, -1):
+            if not self.redis_client.lrem(processing_key, 0, job_id):
+                continue
+            created_at, attempts = self.redis_client.hmget(self._key(job_id), ["created_at", "attempts"])
+            if created_at is None:
+                # The job hash expired; only its id was left
+                continue
+            if int(attempts or 0) >= config.ingest_job_max_attempts:
+                logger.error("Ingestion job %s abandoned after %s attempts", job_id, attempts)
+                self.redis_client.hset(self._key(job_id), mapping={
+                    "status": "error",
+                    "result": json.dumps({"status": "error", "error_message": f"Worker lost {attempts} times"}),
+                    "finished_at": time.time(),
+                })
+                continue
+            logger.warning("Requeuing ingestion job %s of dead worker %s", job_id, worker_id)
+            pipe = self.redis_client.pipeline()
+            pipe.hset(self._key(job_id), mapping={"status": "queued"})
+            pipe.rpush(self.QUEUE_KEY, job_id)
+            pipe.execute()
+            requeued.append(job_id)
+        return requeued
+
+    def queue_length(self) -> int:
+        return self.redis_client.llen(self.QUEUE_KEY)
@@ -1,58 +1,201 @@
 from fastapi import UploadFile
-import pdfplumber
-from typing import List, Dict, Any
+import logging
+import multiprocessing
+import os
+import queue
+import shutil
+import signal
+import tempfile
+import time
+from typing import List, Dict, Any, Iterator
 
+from backend.core.config import config
+from backend.graphs.ingestion.state import LineIndexedText
+from backend.services.ingestion.extractors import get_pdf_extractor
 from backend.utils.decorators import track_execution_time
 
+logger = logging.getLogger(__name__)
+
+
+class PageExtractionTimeout(Exception):
+    """Raised inside a worker when a single page exceeds its time budget."""
+
+
+def _raise_page_timeout(signum, frame):
+    raise PageExtractionTimeout()
+
+
+# Set in each pool worker: the worker reports the first page of every range it starts
+_range_started = None
+
+
+def _init_worker(started_queue) -> None:
+    global _range_started
+    _range_started = started_queue
+
+
+def _page_record(text: str, page_num: int) -> Dict[str, Any]:
+    return {
+        "text": text,
+        "page": page_num,
+        "line_number": None  # PDFs don't get line numbers
+    }
+
+
+def _extract_page_range(path: str, start: int, end: int, page_timeout: int, engine: str) -> List[Dict[str, Any]]:
+    """
+    Extract pages [start, end) of the PDF at `path` with the named engine. Runs inside a worker process.
+    Every page gets its own SIGALRM budget, so a pathological page comes back as
+    empty text instead of stalling the whole range.
+    """
+    if _range_started is not None:
+        _range_started.put(start)
+    use_alarm = hasattr(signal, "SIGALRM") and page_timeout > 0
+    previous_handler = signal.signal(signal.SIGALRM, _raise_page_timeout) if use_alarm else None
+    pages_data = []
+    try:
+        with get_pdf_extractor(engine)(path) as extractor:
+            for index in range(start, end):
+                text = ""
+                try:
+                    if use_alarm:
+                        signal.alarm(page_timeout)
+                    text = extractor.extract_page(index)
+                except PageExtractionTimeout:
+                    logger.warning("Page %d exceeded %ds, skipping its text", index + 1, page_timeout)
+                finally:
+                    if use_alarm:
+                        signal.alarm(0)
+                pages_data.append(_page_record(text, index + 1))
+    finally:
+        if use_alarm:
+            signal.signal(signal.SIGALRM, previous_handler)
+    return pages_data
+
 
 class DocumentLoaderService:
     '''
     Takes different kinds of document and then returns in simple text format.
     '''
-    
+
+    def __init__(self, workers: int | None = None, engine: str | None = None):
+        self.workers = workers or config.pdf_extraction_workers
+        self.engine = engine or config.pdf_extraction_engine
+
     @track_execution_time
-    def load(self, file: UploadFile | None = None, text: str | None = None):
+    def load(self, file: UploadFile | None = None, text: str | None = None, engine: str | None = None):
         if file:
             filename = file.filename or ""
             if filename.endswith(".pdf"):
-                return self._load_pdf(file)
+                return self._load_pdf(file, engine)
             elif filename.endswith(".txt"):
-                return self._load_text_with_lines(text or file.file.read().decode("utf-8"))
+                if text:
+                    return self._load_text_with_lines(text)
+                return self._load_text_file(file)
         if text:
             return self._load_text_with_lines(text)
         raise ValueError("No input provided")
 
-    def _load_text_with_lines(self, text: str) -> List[Dict[str, Any]]:
-        """Load plain text and add line numbering."""
-        lines = text.split('\n')
-        result = []
-        for i, line in enumerate(lines, 1):
-            result.append({
-                "text": line,
-                "page": None,
-                "line_number": i
-            })
-        return result
-
-    def _load_pdf(self, file: UploadFile) -> List[Dict[str, Any]]:
-        """Extract text from PDF pages (simplified - no line tracking)."""
+    def _load_text_with_lines(self, text: str) -> LineIndexedText:
+        """Load plain text and index the line starts."""
+        return LineIndexedText.from_text(text)
+
+    def _load_text_file(self, file: UploadFile) -> LineIndexedText:
+        """Read an uploaded text file in blocks, indexing line starts as it streams in."""
+        file.file.seek(0)
+        return LineIndexedText.from_stream(file.file)
+
+    def _load_pdf(self, file: UploadFile, engine: str | None = None) -> List[Dict[str, Any]]:
+        """Extract text from PDF pages (simplified - no line tracking); chunking needs every page."""
         try:
-            # Reset file pointer to beginning
-            file.file.seek(0)
-            
-            with pdfplumber.open(file.file) as pdf:
-                pages_data = []
-                
-                for page_num, page in enumerate(pdf.pages, 1):
-                    text = page.extract_text() or ""
-                    
-                    pages_data.append({
-                        "text": text,
-                        "page": page_num,
-                        "line_number": None  # PDFs don't get line numbers
-                    })
-                
-                return pages_data
-                
+            return list(self._iter_pdf_pages(file, engine))
         except Exception as e:
-            raise ValueError(f"Error reading PDF: {str(e)}")
\ No newline at end of file
+            raise ValueError(f"Error reading PDF: {str(e)}")
+
+    def _iter_pdf_pages(self, file: UploadFile, engine: str | None = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield page records in page order. `engine` overrides the configured extraction engine.
+        With a page timeout the pages are always extracted in a process pool, even with one worker:
+        the per-page alarm needs a process's main thread, and a stuck page can only be abandoned
+        by killing its process. Without one a single worker extracts in-process.
+        """
+        engine = engine or self.engine
+        extractor_cls = get_pdf_extractor(engine)
+
+        # Reset file pointer to beginning
+        file.file.seek(0)
+
+        if self.workers > 1 or config.pdf_page_timeout_seconds > 0:
+            yield from self._iter_pdf_pages_parallel(file, engine)
+            return
+
+        with extractor_cls(file.file) as extractor:
+            for index in range(extractor.page_count):
+                yield _page_record(extractor.extract_page(index), index + 1)
+
+    def _start_pool(self):
+        started_queue = multiprocessing.Queue()
+        pool = multiprocessing.Pool(max(1, self.workers), initializer=_init_worker, initargs=(started_queue,))
+        return pool, started_queue
+
+    def _iter_pdf_pages_parallel(self, file: UploadFile, engine: str) -> Iterator[Dict[str, Any]]:
+        """
+        Split the document into page ranges, extract them concurrently and yield in order.
+        A range that overruns its budget (counted from when a worker starts it) is stuck where the
+        in-worker alarm cannot fire, e.g. in C code: its pages are yielded as empty text, the pool is
+        terminated so the stuck process does not keep a slot, and unfinished ranges go to a new pool.
+        """
+        # Workers open the PDF by path rather than receiving the bytes
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+            shutil.copyfileobj(file.file, tmp)
+            path = tmp.name
+
+        page_timeout = config.pdf_page_timeout_seconds
+        step = max(1, config.pdf_pages_per_task)
+        pool, started_queue = None, None
+        try:
+            with get_pdf_extractor(engine)(path) as extractor:
+                total_pages = extractor.page_count
+            ranges = [(start, min(start + step, total_pages)) for start in range(0, total_pages, step)]
+
+            pool, started_queue = self._start_pool()
+
+            def submit(page_ranges):
+                return {
+                    start: pool.apply_async(_extract_page_range, (path, start, end, page_timeout, engine))
+                    for start, end in page_ranges
+                }
+
+            results = submit(ranges)
+            started_at: Dict[int, float] = {}
+            for i, (start, end) in enumerate(ranges):
+                budget = page_timeout * (end - start) + page_timeout
+                result = results[start]
+                while not result.ready():
+                    while True:
+                        try:
+                            started_at.setdefault(started_queue.get_nowait(), time.monotonic())
+                        except queue.Empty:
+                            break
+                    began = started_at.get(start)
+                    # Backstop in case the in-worker alarm can't fire (e.g. stuck in C code)
+                    if page_timeout > 0 and began is not None and time.monotonic() - began > budget:
+                        break
+                    result.wait(0.1)
+
+                if result.ready():
+                    pages_data = result.get()
+                else:
+                    logger.warning("Pages %d-%d timed out, yielding them as empty text", start + 1, end)
+                    pages_data = [_page_record("", page_num) for page_num in range(start + 1, end + 1)]
+                    pool.terminate()
+                    pool.join()
+                    pool, started_queue = self._start_pool()
+                    started_at = {}
+                    results.update(submit([r for r in ranges[i + 1:] if not results[r[0]].ready()]))
+                yield from pages_data
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+            os.unlink(path)
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional
+
+from backend.core.config import config
+from backend.graphs.ingestion.nodes.contextual_retrival import (
+    ChunkContextualizer,
+    build_contextualization_report,
+    apply_cached_contexts,
+    contextualize_document,
+    create_genai_client,
+    is_fast_ingest,
+)
+from backend.graphs.ingestion.nodes.embed import embed_chunks
+from backend.graphs.ingestion.state import RagIngestState
+from backend.services.ingestion.cache import IngestionCacheService, hit_rate_stats
+from backend.services.ingestion.embedding_pipeline import get_embedding_provider
+from backend.services.ingestion.vector_store import chunk_properties, vector_to_list
+
+logger = logging.getLogger(__name__)
+
+_DONE = None  # Queue sentinel
+
+
+class StreamingIngestionPipeline:
+    '''
+    Pipelined alternative to the contextualize → embed → store stage barriers.
+    Each chunk moves to the next stage as soon as it is ready, through bounded queues, so
+    the first chunks become searchable while the rest of the document is still being contextualized.
+    Embeddings are dropped once a chunk is stored, which keeps peak memory flat.
+    '''
+
+    def __init__(self, vector_store, queue_size: Optional[int] = None, store_batch_size: Optional[int] = None):
+        self.vector_store = vector_store
+        self.queue_size = queue_size or config.streaming_queue_size
+        self.store_batch_size = store_batch_size or config.streaming_store_batch_size
+        self.embed_batch_size = config.streaming_embed_batch_size
+        self.embed_workers = max(1, config.embedding_concurrency)
+        self.linger_seconds = config.streaming_linger_seconds
+
+    def run(self, state: RagIngestState) -> RagIngestState:
+        """Run the pipeline on a chunked state (the output of chunk_node)."""
+        return asyncio.run(self._run(state))
+
+    async def _collect(self, queue: asyncio.Queue, max_items: int) -> tuple[List[dict], bool]:
+        """Take up to max_items from the queue, waiting at most linger_seconds for stragglers."""
+        items = []
+        item = await queue.get()
+        if item is _DONE:
+            return items, True
+        items.append(item)
+        deadline = time.monotonic() + self.linger_seconds
+        while len(items) < max_items:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is _DONE:
+                return items, True
+            items.append(item)
+        return items, False
+
+    async def _run(self, state: RagIngestState) -> RagIngestState:
+        started = time.perf_counter()
+        chunks = state["chunks"]
+        result_cache = IngestionCacheService()
+        pipeline = get_embedding_provider()
+        embed_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        store_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        stats = {"stored_chunks": 0, "time_to_first_stored_seconds": None, "embedding_hits": 0, "store_report": None}
+
+        async def contextualize() -> None:
+            try:
+                if is_fast_ingest(state):
+                    for chunk in chunks:
+                        await embed_queue.put(chunk)
+                    return
+
+                pending, cached_chunks = apply_cached_contexts(state, result_cache)
+                for chunk in cached_chunks:
+                    await embed_queue.put(chunk)
+                if not pending:
+                    state["contextualization_report"] = build_contextualization_report(
+                        [{"chunk_id": c.get("chunk_id"), "status": "cached", "attempts": 0, "error": None} for c in cached_chunks],
+                        None,
+                    )
+                    return
+
+                async_client = create_genai_client()
+                contextualizer = ChunkContextualizer(async_client, result_cache, on_done=embed_queue.put)
+                await contextualize_document(async_client, contextualizer, chunks, pending)
+                state["contextualization_report"] = contextualizer.report(cached_chunks)
+            finally:
+                for _ in range(self.embed_workers):
+                    await embed_queue.put(_DONE)
+
+        async def embed() -> None:
+            while True:
+                batch, done = await self._collect(embed_queue, self.embed_batch_size)
+                if batch:
+                    stats["embedding_hits"] += await asyncio.to_thread(embed_chunks, batch, result_cache, pipeline)
+                    for chunk in batch:
+                        await store_queue.put(chunk)
+                if done:
+                    return
+
+        def stored(batch: List[dict]) -> None:
+            if stats["time_to_first_stored_seconds"] is None:
+                stats["time_to_first_stored_seconds"] = round(time.perf_counter() - started, 3)
+            stats["stored_chunks"] += len(batch)
+            for chunk in batch:
+                # Stored: the vector is no longer needed in memory
+                chunk["embedding"] = None
+
+        def write(writer, batch: List[dict], tenant: Optional[str]) -> None:
+            for chunk in batch:
+                writer.add_object(
+                    properties=chunk_properties(chunk, state.get("document_id"), state.get("document_name")),
+                    vector=vector_to_list(chunk["embedding"]),
+                    uuid=chunk["chunk_id"],
+                    ref=chunk,
+                    tenant=tenant,
+                )
+
+        async def store(writer) -> None:
+            tenant = await asyncio.to_thread(self.vector_store.tenant, state.get("document_id"))
+            while True:
+                batch, done = await self._collect(store_queue, self.store_batch_size)
+                if batch:
+                    # The writer sizes and sends its own batches; this only hands chunks over as they arrive
+                    await asyncio.to_thread(write, writer, batch, tenant)
+                    if len(batch) < self.store_batch_size:
+                        # Upstream is slower than storage: send what is ready instead of waiting for a full batch
+                        await asyncio.to_thread(writer.flush)
+                if done:
+                    stats["store_report"] = await asyncio.to_thread(writer.close)
+                    return
+
+        async def embed_all() -> None:
+            await asyncio.gather(*[embed() for _ in range(self.embed_workers)])
+            await store_queue.put(_DONE)
+
+        with self.vector_store.batch_writer(on_written=stored) as writer:
+            await asyncio.gather(contextualize(), embed_all(), store(writer))
+        # Allow pending async tasks to complete and connections to close
+        await asyncio.sleep(0.1)
+
+        state["cache_stats"] = {
+            **(state.get("cache_stats") or {}),
+            "embedding": hit_rate_stats(stats["embedding_hits"], len(chunks)),
+        }
+        state["streaming_report"] = {
+            "stored_chunks": stats["stored_chunks"],
+            "time_to_first_stored_seconds": stats["time_to_first_stored_seconds"],
+            "total_seconds": round(time.perf_counter() - started, 3),
+        }
+        state["store_report"] = stats["store_report"]
+        logger.info("Streaming ingestion stored %d chunks: %s", stats["stored_chunks"], state["streaming_report"])
+        return state
@@ -1,65 +1,167 @@
 import weaviate
-from weaviate.classes.config import Configure, Property, DataType
-from weaviate.classes.data import DataObject
-from typing import Optional
+from weaviate.classes.query import Filter, Sort
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
 from backend.core.config import config
+from backend.core.db.tenants import TenantManager, tenant_name
 from backend.core.db.weaviate_client import get_weaviate_client
-from backend.graphs.ingestion.state import RagIngestState
+from backend.graphs.ingestion.state import ChunkData, RagIngestState
+from backend.services.ingestion.batch_writer import WeaviateBatchWriter
+from backend.utils.vectors import encode_vector, full_vectors_stored, reduce_dimensions
 from backend.utils.decorators import track_execution_time
 
 
+# Properties that move when text is inserted or removed elsewhere in the document
+POSITION_PROPERTIES = ["page_number", "end_page_number", "line_number", "end_line_number", "start_offset", "end_offset"]
+
+
+def chunk_properties(chunk: ChunkData, document_id: str, document_name: str) -> dict:
+    properties = {
+        "chunk_id": chunk.get("chunk_id"),
+        "content": chunk.get("content"),
+        "context": chunk.get("context"),
+        "breadcrumbs": chunk.get("breadcrumbs"),
+        "page_number": chunk.get("page_number"),
+        "end_page_number": chunk.get("end_page_number"),
+        "line_number": chunk.get("line_number"),
+        "end_line_number": chunk.get("end_line_number"),
+        "start_offset": chunk.get("start_offset"),
+        "end_offset": chunk.get("end_offset"),
+        "chunk_type": chunk.get("chunk_type"),
+        "content_hash": chunk.get("content_hash"),
+        "document_id": document_id,
+        "document_name": document_name,
+    }
+    if full_vectors_stored() and chunk.get("embedding") is not None:
+        properties["full_embedding"] = encode_vector(chunk["embedding"])
+    return properties
+
+
+def vector_to_list(embedding) -> Optional[List[float]]:
+    """Chunks carry full float32 rows; Weaviate takes plain lists at the configured ANN dimension."""
+    return reduce_dimensions(embedding).tolist() if embedding is not None else None
+
+
 class VectorStoreService:
     
-    def __init__(self, client: Optional[weaviate.WeaviateClient] = None):
+    def __init__(self, client: Optional[weaviate.WeaviateClient] = None, tenants: Optional[TenantManager] = None):
         self.client = client or get_weaviate_client()
         self.collection_name = config.weaviate_collection_name
-        self._ensure_schema_exists()
-    
-    def _ensure_schema_exists(self) -> None:
-        if self.client.collections.exists(self.collection_name):
-            self.client.collections.delete(self.collection_name)
-        
-        self.client.collections.create(
-            name=self.collection_name,
-            properties=[
-                Property(name="chunk_id", data_type=DataType.TEXT),
-                Property(name="content", data_type=DataType.TEXT),
-                Property(name="context", data_type=DataType.TEXT),
-                Property(name="contextualized_chunk", data_type=DataType.TEXT),
-                Property(name="breadcrumbs", data_type=DataType.TEXT),
-                Property(name="page_number", data_type=DataType.INT),
-                Property(name="line_number", data_type=DataType.INT),
-                Property(name="chunk_type", data_type=DataType.TEXT),
-                Property(name="document_id", data_type=DataType.TEXT),
-                Property(name="document_name", data_type=DataType.TEXT),
-            ]
-        )
+        # The schema is managed once per process at startup (backend.core.db.schema.SchemaManager)
+        self.tenants = tenants or (TenantManager(self.client) if config.weaviate_multi_tenancy else None)
+
+    def tenant(self, document_id: str) -> Optional[str]:
+        """Tenant a document is written to, activated or created first; None with a shared collection."""
+        if self.tenants is None:
+            return None
+        name = tenant_name(document_id)
+        self.tenants.ensure_active(name, create=True)
+        return name
 
+    def _collection(self, document_id: str):
+        """Collection handle for an existing document (its tenant, when multi-tenant); None if the tenant is unknown."""
+        collection = self.client.collections.get(self.collection_name)
+        if self.tenants is None:
+            return collection
+        name = tenant_name(document_id)
+        if not self.tenants.ensure_active(name):
+            return None
+        return collection.with_tenant(name)
+    
     @track_execution_time
     def store_embeddings(self, state: RagIngestState) -> str:
         if not state.get("chunks"):
             raise ValueError("No chunks to store")
         
+        state["store_report"] = self.store_chunks(state["chunks"], state.get("document_id"), state.get("document_name"))
+        return state.get("document_id")
+
+    def store_chunks(self, chunks: Iterable[ChunkData], document_id: str, document_name: str) -> Dict[str, Any]:
+        """
+        Write a document's chunks as they come (a list or any iterator) through a batch writer.
+        Returns the writer report; raises BatchWriteError if objects still fail after retries.
+        """
+        tenant = self.tenant(document_id)
+        with self.batch_writer() as writer:
+            for chunk in chunks:
+                writer.add_object(
+                    properties=chunk_properties(chunk, document_id, document_name),
+                    vector=vector_to_list(chunk.get("embedding")),
+                    uuid=chunk.get("chunk_id"),
+                    tenant=tenant,
+                )
+        return writer.report
+
+    @contextmanager
+    def batch_writer(self, on_written: Optional[Callable[[List[Any]], None]] = None) -> Iterator[WeaviateBatchWriter]:
+        """
+        A writer whose objects can come from any number of documents (pass `tenant=self.tenant(document_id)`
+        per object when multi-tenant); everything is flushed on exit. Raises BatchWriteError if any object failed to import after retries.
+        """
         collection = self.client.collections.get(self.collection_name)
-        
-        objects = [
-            DataObject(
-                properties={
-                    "chunk_id": chunk.get("chunk_id"),
-                    "content": chunk.get("content"),
-                    "context": chunk.get("context"),
-                    "contextualized_chunk": chunk.get("contextualized_chunk"),
-                    "breadcrumbs": chunk.get("breadcrumbs"),
-                    "page_number": chunk.get("page_number"),
-                    "line_number": chunk.get("line_number"),
-                    "chunk_type": chunk.get("chunk_type"),
-                    "document_id": state.get("document_id"),
-                    "document_name": state.get("document_name"),
-                },
-                vector=chunk.get("embedding")
+        writer = WeaviateBatchWriter(collection, on_written=on_written)
+        with writer:
+            yield writer
+
+    def fetch_chunk_index(self, document_id: str, page_size: int = 1000) -> Dict[str, dict]:
+        """
+        Map each stored chunk id of a document to its content hash and position, without vectors or text.
+        A tenant holds only its document, so it is read with the cursor iterator. The cursor cannot
+        be filtered, so the shared collection is paged by chunk_id instead (sorted, then greater than
+        the last one seen); unlike offset paging this has no QUERY_MAXIMUM_RESULTS ceiling.
+        """
+        collection = self._collection(document_id)
+        if collection is None:
+            return {}
+        properties = ["content_hash", "document_name", *POSITION_PROPERTIES]
+        if self.tenants is not None:
+            return {
+                str(obj.uuid): obj.properties
+                for obj in collection.iterator(return_properties=properties, cache_size=page_size)
+            }
+        index = {}
+        by_document = Filter.by_property("document_id").equal(document_id)
+        last_chunk_id = None
+        while True:
+            response = collection.query.fetch_objects(
+                filters=by_document if last_chunk_id is None
+                else by_document & Filter.by_property("chunk_id").greater_than(last_chunk_id),
+                sort=Sort.by_property("chunk_id"),
+                return_properties=properties,
+                limit=page_size,
             )
-            for chunk in state["chunks"]
-        ]
-        
-        collection.data.insert_many(objects)
-        return state.get("document_id")
\ No newline at end of file
+            for obj in response.objects:
+                index[str(obj.uuid)] = obj.properties
+            if len(response.objects) < page_size:
+                return index
+            # Chunk ids are the object uuids
+            last_chunk_id = str(response.objects[-1].uuid)
+
+    def delete_chunks(self, chunk_ids: List[str], document_id: str) -> int:
+        """Delete chunks of a document by id in one batch request."""
+        if not chunk_ids:
+            return 0
+        collection = self._collection(document_id)
+        result = collection.data.delete_many(where=Filter.by_id().contains_any(chunk_ids))
+        return result.successful
+
+    def update_chunk_positions(self, chunks: List[ChunkData], document_id: str) -> None:
+        """
+        Refresh provenance of unchanged chunks; content and vectors are left as they are.
+        An early edit shifts every later chunk, and Weaviate has no batched partial update,
+        so the updates are sent concurrently instead of one round trip after another.
+        """
+        if not chunks:
+            return
+        collection = self._collection(document_id)
+
+        def update(chunk: ChunkData) -> None:
+            collection.data.update(
+                uuid=chunk["chunk_id"],
+                properties={name: chunk.get(name) for name in POSITION_PROPERTIES},
+            )
+
+        with ThreadPoolExecutor(max_workers=min(max(1, config.weaviate_update_concurrency), len(chunks))) as executor:
+            # list() re-raises the first failed update
+            list(executor.map(update, chunks))
@@ -1,50 +1,217 @@
+import asyncio
+import numpy as np
+from typing import Optional
+from backend.core.config import config
+from backend.core.db.weaviate_client import get_async_weaviate_client
+from backend.core.db.schema import contextualized_text
+from backend.core.db.tenants import TenantManager, tenant_name
 from backend.utils.decorators import track_execution_time
-from weaviate.classes.query import Filter
+from backend.utils.vectors import decode_vector, full_vectors_stored, reduce_dimensions
+from weaviate.classes.query import Filter, MetadataQuery
+
+# Fetched for every search candidate: the fusion key and the text the reranker scores
+SEARCH_PROPERTIES = ["chunk_id", "breadcrumbs", "context", "content"]
+# Fetched once for the final top-k only
+PAYLOAD_PROPERTIES = [
+    "document_name", "chunk_type", "page_number", "end_page_number", "line_number", "end_line_number",
+]
+
+
+def search_result(obj, **scores) -> dict:
+    """Search candidate with its scores and the contextualized text, which is not stored."""
+    chunk = dict(obj.properties)
+    chunk["contextualized_chunk"] = contextualized_text(chunk.get("context"), chunk.get("content"))
+    chunk.update(scores)
+    return chunk
+
+def rescore_by_vector(query_vector, objects: list, vectors: Optional[list] = None) -> list:
+    '''
+    Re-rank ANN candidates by exact cosine similarity between the query and each object's
+    stored (uncompressed) vector, as returned with include_vector=True, or the given `vectors`.
+    '''
+    if not objects:
+        return objects
+    query = np.asarray(query_vector, dtype=np.float32)
+    if vectors is None:
+        vectors = [obj.vector["default"] for obj in objects]
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scores = vectors @ query / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query) + 1e-12)
+    return [objects[i] for i in np.argsort(-scores, kind="stable")]
+
 
 class ChunksRetrivalService:
     '''
     Service to retrieve relevant chunks from a document based on a query.
+    Every search has a sync and an async (a-prefixed) variant; the async ones use the async
+    Weaviate client so concurrent queries wait on I/O without holding a thread.
     '''
-    def __init__(self, weaviate_client, embedding_service):
+    def __init__(self, weaviate_client, embedding_service, tenants: TenantManager = None,
+                 async_weaviate_client=None):
         self.weaviate_client = weaviate_client
         self.embedding_service = embedding_service
+        self.tenants = tenants or (TenantManager(weaviate_client) if config.weaviate_multi_tenancy else None)
+        # Bound to the event loop it connects on, so resolved on first async use
+        self.async_weaviate_client = async_weaviate_client
+
+    def _scope(self, document_id: str, client=None):
+        '''
+        Collection handle and filter for one document: its own tenant index when multi-tenant
+        (activated on demand, no filter needed), else the shared collection filtered by document_id.
+        Returns (None, None) for a document without a tenant.
+        '''
+        collection = (client or self.weaviate_client).collections.get(config.weaviate_collection_name)
+        if self.tenants is None:
+            return collection, Filter.by_property("document_id").equal(document_id)
+        name = tenant_name(document_id)
+        if not self.tenants.ensure_active(name):
+            return None, None
+        return collection.with_tenant(name), None
+
+    async def _ascope(self, document_id: str):
+        if self.async_weaviate_client is None:
+            self.async_weaviate_client = await get_async_weaviate_client()
+        if self.tenants is None:
+            return self._scope(document_id, self.async_weaviate_client)
+        # Tenant activation is a Redis lookup, plus a Weaviate update for a cold tenant
+        return await asyncio.to_thread(self._scope, document_id, self.async_weaviate_client)
+
+    @staticmethod
+    def _vector_query(query_embedding, where_filter, top_k: int, ef: Optional[int], rescore_limit: Optional[int]):
+        '''
+        Arguments for near_vector, plus the search vector and rescore limit that _vector_results needs.
+        Weaviate has no per-query ef or rescore setting, so both are applied here: `ef` widens the
+        candidate list to at least that many results, and `rescore_limit` fetches that many candidates
+        with their full vectors so they can be re-ranked exactly.
+        '''
+        search_vector = reduce_dimensions(query_embedding)
+        full_rescore = full_vectors_stored()
+        if rescore_limit is None and full_rescore:
+            rescore_limit = config.embedding_rescore_candidates
+        arguments = dict(
+            near_vector=search_vector.tolist(),
+            filters=where_filter,
+            limit=max(top_k, ef or 0, rescore_limit or 0),
+            include_vector=bool(rescore_limit) and not full_rescore,
+            return_properties=SEARCH_PROPERTIES + (["full_embedding"] if rescore_limit and full_rescore else []),
+            return_metadata=MetadataQuery(distance=True),
+        )
+        return arguments, search_vector, rescore_limit
+
+    @staticmethod
+    def _vector_results(objects: list, query_embedding, search_vector, top_k: int,
+                        rescore_limit: Optional[int]) -> list[dict]:
+        if rescore_limit and full_vectors_stored():
+            full_vectors = [obj.properties.pop("full_embedding", None) for obj in objects]
+            # Chunks stored before full vectors were kept stay in ANN order
+            if all(vector is not None for vector in full_vectors):
+                objects = rescore_by_vector(query_embedding, objects, [decode_vector(vector) for vector in full_vectors])
+        elif rescore_limit:
+            objects = rescore_by_vector(search_vector, objects)
+        return [search_result(obj, vector_distance=obj.metadata.distance) for obj in objects[:top_k]]
 
     @track_execution_time
-    def vector_search(self, query: str, document_id: str, top_k: int = 5) -> list[dict]:
+    def vector_search(self, query: str, document_id: str, top_k: int = 5, ef: Optional[int] = None,
+                      rescore_limit: Optional[int] = None) -> list[dict]:
         '''
         Perform a vector search to retrieve top_k relevant chunks for the given query and document_id.
+        Only SEARCH_PROPERTIES and the distance are returned; see fetch_payloads for the rest.
+        `ef` and `rescore_limit` are per-query overrides (see _vector_query).
+        With reduced embedding dimensions the ANN search runs on the truncated query vector and, when
+        full vectors are stored, the candidates are rescored against them at full dimension.
         '''
+        collection, where_filter = self._scope(document_id)
+        if collection is None:
+            return []
         query_embedding = self.embedding_service.embedd_text(query)
-        collection = self.weaviate_client.collections.get("Chunk")
-        
-        where_filter = Filter.by_property("document_id").equal(document_id)
-        
-        results = collection.query.near_vector(
-            near_vector=query_embedding,
+        arguments, search_vector, rescore_limit = self._vector_query(query_embedding, where_filter, top_k, ef, rescore_limit)
+        results = collection.query.near_vector(**arguments)
+        return self._vector_results(results.objects, query_embedding, search_vector, top_k, rescore_limit)
+
+    @track_execution_time
+    async def avector_search(self, query: str, document_id: str, top_k: int = 5, ef: Optional[int] = None,
+                             rescore_limit: Optional[int] = None) -> list[dict]:
+        '''Async vector_search; the query embedding and the tenant lookup run concurrently.'''
+        query_embedding, (collection, where_filter) = await asyncio.gather(
+            self.embedding_service.aembedd_text(query), self._ascope(document_id)
+        )
+        if collection is None:
+            return []
+        arguments, search_vector, rescore_limit = self._vector_query(query_embedding, where_filter, top_k, ef, rescore_limit)
+        results = await collection.query.near_vector(**arguments)
+        return self._vector_results(results.objects, query_embedding, search_vector, top_k, rescore_limit)
+
+    @staticmethod
+    def _bm25_query(query: str, where_filter, top_k: int) -> dict:
+        return dict(
+            query=query,
             filters=where_filter,
-            limit=top_k
+            limit=top_k,
+            query_properties=["breadcrumbs", "content"],
+            return_properties=SEARCH_PROPERTIES,
+            return_metadata=MetadataQuery(score=True),
         )
-        
-        return [obj.properties for obj in results.objects]
-    
+
     @track_execution_time
     def bm25_search(self, query: str, document_id: str, top_k: int = 5) -> list[dict]:
         '''
         Perform a BM25 search to retrieve top_k relevant chunks for the given query and document_id.
+        Only SEARCH_PROPERTIES and the score are returned; see fetch_payloads for the rest.
         '''
-        collection = self.weaviate_client.collections.get("Chunk")
-        
-        where_filter = Filter.by_property("document_id").equal(document_id)
-        
-        results = collection.query.bm25(
-            query=query,
-            filters=where_filter,
-            limit=top_k,
-            query_properties=["breadcrumbs", "content"]
+        collection, where_filter = self._scope(document_id)
+        if collection is None:
+            return []
+        results = collection.query.bm25(**self._bm25_query(query, where_filter, top_k))
+        return [search_result(obj, bm25_score=obj.metadata.score) for obj in results.objects]
+
+    @track_execution_time
+    async def abm25_search(self, query: str, document_id: str, top_k: int = 5) -> list[dict]:
+        collection, where_filter = await self._ascope(document_id)
+        if collection is None:
+            return []
+        results = await collection.query.bm25(**self._bm25_query(query, where_filter, top_k))
+        return [search_result(obj, bm25_score=obj.metadata.score) for obj in results.objects]
+
+    @staticmethod
+    def _payload_query(chunk_ids: list[str], where_filter) -> dict:
+        by_chunk_id = Filter.by_property("chunk_id").contains_any(chunk_ids)
+        return dict(
+            filters=by_chunk_id if where_filter is None else where_filter & by_chunk_id,
+            limit=len(chunk_ids),
+            return_properties=["chunk_id"] + PAYLOAD_PROPERTIES,
         )
-        
-        return [obj.properties for obj in results.objects]
-    
+
+    @staticmethod
+    def _merge_payloads(chunks: list[dict], objects: list) -> list[dict]:
+        payloads = {obj.properties["chunk_id"]: obj.properties for obj in objects}
+        for chunk in chunks:
+            chunk.update(payloads.get(chunk["chunk_id"], {}))
+        return chunks
+
+    @track_execution_time
+    def fetch_payloads(self, document_id: str, chunks: list[dict]) -> list[dict]:
+        '''
+        Add PAYLOAD_PROPERTIES (provenance and page/line numbers) to the final chunks in one
+        batched fetch, instead of returning them for every search candidate.
+        '''
+        if not chunks:
+            return chunks
+        collection, where_filter = self._scope(document_id)
+        if collection is None:
+            return chunks
+        results = collection.query.fetch_objects(**self._payload_query([chunk["chunk_id"] for chunk in chunks], where_filter))
+        return self._merge_payloads(chunks, results.objects)
+
+    @track_execution_time
+    async def afetch_payloads(self, document_id: str, chunks: list[dict]) -> list[dict]:
+        if not chunks:
+            return chunks
+        collection, where_filter = await self._ascope(document_id)
+        if collection is None:
+            return chunks
+        results = await collection.query.fetch_objects(
+            **self._payload_query([chunk["chunk_id"] for chunk in chunks], where_filter)
+        )
+        return self._merge_payloads(chunks, results.objects)
 
     @track_execution_time
     def reciprocal_rank_fusion(self, vector_results, bm25_results) -> list[dict]:
@@ -1,7 +1,7 @@
 import json
 from datetime import datetime
 from typing import List, Dict, Optional
-from backend.core.redis_client import get_redis_client
+from backend.core.redis_client import get_async_redis_client, get_redis_client
 from backend.core.config import config
 
 
@@ -13,6 +13,7 @@ class ConversationService:
     
     def __init__(self):
         self.redis_client = get_redis_client()
+        self.async_redis_client = get_async_redis_client()
         self.ttl_seconds = config.conversation_ttl_seconds
         self.max_history = config.max_conversation_history
     
@@ -25,7 +26,13 @@ class ConversationService:
         Load conversation history for a document.
         Returns last N messages (N from config.max_conversation_history).
         """
-        messages_json = self.redis_client.get(self._get_key(document_id))
+        return self._decode(self.redis_client.get(self._get_key(document_id)))
+
+    async def aload_conversation(self, document_id: str) -> List[Dict]:
+        """load_conversation on the async Redis client."""
+        return self._decode(await self.async_redis_client.get(self._get_key(document_id)))
+
+    def _decode(self, messages_json: Optional[str]) -> List[Dict]:
         if messages_json is None:
             return []
         
@@ -48,6 +55,17 @@ class ConversationService:
             )
         except Exception as e:
             raise Exception(f"Failed to save conversation: {str(e)}")
+
+    async def asave_conversation(self, document_id: str, messages: List[Dict]) -> None:
+        """save_conversation on the async Redis client."""
+        try:
+            await self.async_redis_client.setex(
+                self._get_key(document_id),
+                self.ttl_seconds,
+                json.dumps(messages)
+            )
+        except Exception as e:
+            raise Exception(f"Failed to save conversation: {str(e)}")
     
     def clear_conversation(self, document_id: str) -> bool:
         """Delete conversation history for a document."""
@@ -1,21 +1,22 @@
-from openai import AzureOpenAI
+import numpy as np
+from backend.services.ingestion.embedding_pipeline import EmbeddingProvider, get_embedding_provider
 from backend.utils.decorators import track_execution_time
-from backend.core.config import config
 
 class EmbeddingService:
-    '''Generate embeddings for given text inputs using OpenAI.'''
+    '''Generate query embeddings with the collection's embedding provider (Azure OpenAI or local CPU).'''
     
-    def __init__(self, embedding_client: AzureOpenAI):
-        self.embedding_client = embedding_client
+    def __init__(self, provider: EmbeddingProvider = None):
+        self.provider = provider or get_embedding_provider()
     
     @track_execution_time
-    def embedd_text(self, text: str) -> list[float]:
+    def embedd_text(self, text: str) -> np.ndarray:
         """
-        Generate embeddings for multiple texts.
-        Returns embeddings as list of vectors.
+        Generate the embedding of one query text.
+        Returns a float32 vector.
         """
-        response = self.embedding_client.embeddings.create(
-            model= config.text_embedding_model,
-            input=text
-        )
-        return response.data[0].embedding
\ No newline at end of file
+        return self.provider.embed_query(text)
+
+    @track_execution_time
+    async def aembedd_text(self, text: str) -> np.ndarray:
+        """Async embedd_text: the async OpenAI client, or a worker thread for the local model."""
+        return await self.provider.aembed_query(text)
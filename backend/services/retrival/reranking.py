@@ -1,3 +1,4 @@
+import asyncio
 from typing import List, Dict, Any
 from backend.core.cross_encoder_client import get_cross_encoder
 
@@ -50,4 +51,8 @@ class RerankingService:
         # Sort by reranking score and return top-k
         reranked = sorted(chunks, key=lambda x: x['reranking_score'], reverse=True)
         
-        return reranked[:top_k]
\ No newline at end of file
+        return reranked[:top_k]
+
+    async def arerank(self, query: str, chunks: List[Dict[str, Any]], top_k: int = 10) -> List[Dict[str, Any]]:
+        """rerank on a worker thread: cross-encoder inference is CPU-bound and would block the event loop."""
+        return await asyncio.to_thread(self.rerank, query, chunks, top_k)
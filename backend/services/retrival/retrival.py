@@ -47,13 +47,21 @@ class RetrivalService:
         
         return response
 
-    @track_execution_time
-    def retrieve(self, query: str, document_id: str, conversation_history: list = None) -> dict:
-        '''
-        Given a query and document_id, retrieve final answers from vector store
-        and return the response from the retrival graph.
-        Includes conversation history if provided (only human + ai messages, no tool messages).
-        '''
+    async def aretrieve_with_conversation(self, query: str, document_id: str) -> dict:
+        """
+        Async retrieve_with_conversation for the API: Redis, Weaviate, the embedding and LLM calls
+        are awaited, so one worker serves many queries while they wait on I/O.
+        """
+        conversation_history = await self.conversation_service.aload_conversation(document_id)
+        response = await self.aretrieve(query, document_id, conversation_history)
+        if response.get("status") == "success":
+            await self.conversation_service.asave_conversation(
+                document_id,
+                response.get("conversation_messages", [])
+            )
+        return response
+
+    def _graph_input(self, query: str, document_id: str, conversation_history: list = None) -> dict:
         # Build input messages: history + current query (exclude tool messages)
         messages = []
         if conversation_history:
@@ -61,13 +69,29 @@ class RetrivalService:
             messages.extend([msg for msg in conversation_history if msg.get("role") in ["human", "ai"]])
         
         messages.append(self._create_message_dict("human", query))
-        
-        graph_output = self.graph.invoke({
+        return {
             "query": query,
             "document_id": document_id,
             "messages": messages
-        })
-        
+        }
+
+    @track_execution_time
+    def retrieve(self, query: str, document_id: str, conversation_history: list = None) -> dict:
+        '''
+        Given a query and document_id, retrieve final answers from vector store
+        and return the response from the retrival graph.
+        Includes conversation history if provided (only human + ai messages, no tool messages).
+        '''
+        graph_input = self._graph_input(query, document_id, conversation_history)
+        return self._response(graph_input["messages"], self.graph.invoke(graph_input))
+
+    @track_execution_time
+    async def aretrieve(self, query: str, document_id: str, conversation_history: list = None) -> dict:
+        '''retrieve through graph.ainvoke: async nodes and tools, nothing blocks the event loop.'''
+        graph_input = self._graph_input(query, document_id, conversation_history)
+        return self._response(graph_input["messages"], await self.graph.ainvoke(graph_input))
+
+    def _response(self, messages: list, graph_output: dict) -> dict:
         # Extract final response from the last assistant message
         graph_messages = graph_output.get("messages", [])
         final_response = None
@@ -0,0 +1,85 @@
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+
+def jittered_backoff(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Full-jitter exponential backoff: a random wait in [0, min(cap, base * 2^(attempt-1))]."""
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+
+class AdaptiveConcurrencyLimiter:
+    '''
+    AIMD concurrency limit for asyncio tasks calling a rate-limited provider.
+    The limit grows by about one slot per limit's worth of successes and is multiplied by
+    `decrease_factor` when the provider throttles (429/5xx). Only requests that started after
+    the last decrease can shrink it again, so one burst of failures counts once.
+    A Retry-After pause holds back every new request until it passes.
+    '''
+
+    def __init__(self, initial: int, maximum: int, minimum: int = 1, decrease_factor: float = 0.5):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.decrease_factor = decrease_factor
+        self._limit = float(min(max(initial, self.minimum), self.maximum))
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._paused_until = 0.0
+        self._condition = asyncio.Condition()
+
+        # Statistics
+        self._limit_samples = 0.0
+        self._acquisitions = 0
+        self._peak_in_flight = 0
+        self._lowest_limit = self._limit
+        self._decreases = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[float]:
+        """Hold one slot for the duration of a request; yields the request's start time."""
+        while True:
+            delay = self._paused_until - time.monotonic()
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+            self._acquisitions += 1
+            self._limit_samples += self._limit
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        try:
+            yield time.monotonic()
+        finally:
+            async with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+
+    def on_success(self) -> None:
+        self._limit = min(self.maximum, self._limit + 1 / self._limit)
+
+    def on_throttle(self, started_at: float, retry_after: float | None = None) -> None:
+        if retry_after:
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        if started_at < self._last_decrease:
+            return
+        self._limit = max(self.minimum, self._limit * self.decrease_factor)
+        self._lowest_limit = min(self._lowest_limit, self._limit)
+        self._last_decrease = time.monotonic()
+        self._decreases += 1
+
+    def stats(self) -> dict:
+        return {
+            "average_limit": round(self._limit_samples / self._acquisitions, 2) if self._acquisitions else self.limit,
+            "final_limit": self.limit,
+            "lowest_limit": int(self._lowest_limit),
+            "peak_in_flight": self._peak_in_flight,
+            "decreases": self._decreases,
+        }
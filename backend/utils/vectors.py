@@ -0,0 +1,60 @@
+import base64
+from typing import Optional
+
+import numpy as np
+
+from backend.core.config import config
+
+# Models trained so that a prefix of the vector is itself an embedding (Matryoshka representation)
+MATRYOSHKA_MODELS = ("text-embedding-3-small", "text-embedding-3-large")
+
+
+def reduce_dimensions(vectors, dimensions: Optional[int] = None) -> np.ndarray:
+    """
+    Matryoshka truncation: keep the first `dimensions` components and re-normalize, which is
+    what text-embedding-3 returns for the `dimensions` parameter. Works on one vector or a matrix;
+    vectors already at or below the size are returned unchanged. Only meaningful for MATRYOSHKA_MODELS;
+    SchemaManager refuses EMBEDDING_DIMENSIONS with any other model at startup.
+    """
+    dimensions = dimensions if dimensions is not None else config.embedding_dimensions
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if not dimensions or vectors.shape[-1] <= dimensions:
+        return vectors
+    reduced = vectors[..., :dimensions]
+    return reduced / np.maximum(np.linalg.norm(reduced, axis=-1, keepdims=True), 1e-12)
+
+
+def embedding_model(provider: Optional[str] = None) -> str:
+    provider = (provider or config.embedding_provider).lower()
+    return config.local_embedding_model if provider == "local" else config.text_embedding_model
+
+
+def supports_truncation(provider: Optional[str] = None) -> bool:
+    """Whether the provider's model can be truncated by reduce_dimensions without retraining."""
+    provider = (provider or config.embedding_provider).lower()
+    return provider == "azure" and embedding_model(provider) in MATRYOSHKA_MODELS
+
+
+def embedding_identity(provider: Optional[str] = None, dimensions: Optional[int] = None) -> str:
+    """
+    Provider, model and ANN vector size of the stored vectors, e.g. azure:text-embedding-3-large:256;
+    recorded on the collection so queries use the same. The size is left out when vectors are full length.
+    """
+    provider = (provider or config.embedding_provider).lower()
+    dimensions = dimensions if dimensions is not None else config.embedding_dimensions
+    identity = f"{provider}:{embedding_model(provider)}"
+    return f"{identity}:{dimensions}" if dimensions else identity
+
+
+def full_vectors_stored() -> bool:
+    """Whether objects carry the full-dimension vector next to the reduced one used for ANN search."""
+    return bool(config.embedding_dimensions) and config.embedding_store_full_vector
+
+
+def encode_vector(vector) -> str:
+    """float32 bytes as base64, the wire format of a Weaviate BLOB property."""
+    return base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode("ascii")
+
+
+def decode_vector(blob) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(blob) if isinstance(blob, str) else blob, dtype=np.float32)
@@ -0,0 +1,156 @@
+"""
+Ingestion worker: pulls jobs queued by POST /api/v1/ingestion/ingest and runs them
+outside the API process.
+
+    python -m backend.workers.ingestion_worker --processes 4
+
+Each process handles one job at a time. SIGTERM/SIGINT stop the pool after the
+jobs in progress have finished. The parent process restarts workers that die and
+requeues the jobs they held (see IngestionJobService.requeue_orphaned).
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import shutil
+import signal
+import threading
+import time
+
+from fastapi import UploadFile
+
+from backend.core.config import config
+from backend.core.logging import setup_logging
+from backend.services.ingestion.jobs import IngestionJobService, worker_name
+
+logger = logging.getLogger(__name__)
+
+
+def build_ingestion_service():
+    # Imported here so each worker process creates its own clients
+    from backend.graphs.ingestion.graph import document_graph, enrichment_graph
+    from backend.services.ingestion.ingestion import DocumentIngestionService
+    from backend.services.ingestion.loader import DocumentLoaderService
+    from backend.services.ingestion.vector_store import VectorStoreService
+
+    return DocumentIngestionService(
+        loader=DocumentLoaderService(),
+        graph=document_graph,
+        vector_store=VectorStoreService(),
+        enrichment_graph=enrichment_graph
+    )
+
+
+def run_bulk_job(service, jobs: IngestionJobService, job: dict) -> dict:
+    from backend.services.ingestion.bulk import BulkIngestionService, expand_sources
+
+    upload_dir = job["upload_path"]
+    bulk = BulkIngestionService(loader=service.loader, vector_store=service.vector_store)
+    # Zip archives are extracted next to the uploads and removed with them
+    sources = expand_sources([upload_dir], upload_dir)
+    return bulk.ingest(sources, on_stage=lambda stage: jobs.record_stage(job["job_id"], stage), **job["options"])
+
+
+def run_job(service, jobs: IngestionJobService, job: dict) -> None:
+    job_id = job["job_id"]
+    upload_path = job.get("upload_path")
+    on_stage = lambda stage: jobs.record_stage(job_id, stage)
+    file = None
+    start_time = time.time()
+    try:
+        if job.get("kind") == "bulk":
+            result = run_bulk_job(service, jobs, job)
+        elif job.get("kind") == "resume":
+            result = service.resume_document(document_id=job["document_id"], on_stage=on_stage)
+        else:
+            if upload_path:
+                file = UploadFile(file=open(upload_path, "rb"), filename=job["document_name"])
+            if job.get("document_id"):
+                result = service.reingest_document(
+                    document_id=job["document_id"], file=file, text=job.get("text") or None, on_stage=on_stage, **job["options"]
+                )
+            else:
+                result = service.ingest_document(file=file, text=job.get("text") or None, on_stage=on_stage, **job["options"])
+    except Exception as e:
+        logger.exception("Ingestion job %s failed", job_id)
+        result = {"status": "error", "processing_time_seconds": time.time() - start_time, "error_message": str(e)}
+    finally:
+        if file is not None:
+            file.file.close()
+        if upload_path and os.path.isdir(upload_path):
+            shutil.rmtree(upload_path, ignore_errors=True)
+        elif upload_path and os.path.exists(upload_path):
+            os.remove(upload_path)
+
+    jobs.finish(job_id, result)
+    logger.info("Ingestion job %s finished: %s", job_id, result.get("status"))
+
+
+def worker_loop(stop_event) -> None:
+    setup_logging()
+    # The parent handles Ctrl-C; a worker finishes its current job and exits on stop_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+
+    from backend.core.db.schema import SchemaManager
+
+    jobs = IngestionJobService()
+    SchemaManager.setup()
+    service = build_ingestion_service()
+    heartbeat = jobs.start_heartbeat()
+    logger.info("Ingestion worker %d ready", os.getpid())
+
+    try:
+        while not stop_event.is_set():
+            job = jobs.dequeue(timeout=config.ingest_queue_poll_seconds)
+            if job is not None:
+                run_job(service, jobs, job)
+    finally:
+        heartbeat.set()
+
+
+def start_worker(stop_event, index: int) -> multiprocessing.Process:
+    # Not daemonic: workers start their own process pools for PDF extraction
+    process = multiprocessing.Process(target=worker_loop, args=(stop_event,), name=f"ingestion-worker-{index}")
+    process.start()
+    return process
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run ingestion worker processes.")
+    parser.add_argument("--processes", type=int, default=config.ingest_worker_processes)
+    args = parser.parse_args()
+
+    setup_logging()
+    stop_event = multiprocessing.Event()
+    # The handlers only flag the loop below: setting stop_event from a handler that interrupted
+    # the main thread inside stop_event itself would deadlock on its lock
+    stopping = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+
+    processes = [start_worker(stop_event, i) for i in range(max(1, args.processes))]
+    logger.info("Started %d ingestion workers", len(processes))
+
+    jobs = IngestionJobService()
+    while not stopping.wait(config.ingest_reaper_interval_seconds):
+        try:
+            for i, process in enumerate(processes):
+                if process.is_alive() or stopping.is_set():
+                    continue
+                logger.warning("Ingestion worker %d exited with code %s, restarting it", process.pid, process.exitcode)
+                # Its jobs go back to the queue right away instead of after its heartbeat expires
+                jobs.requeue_worker(worker_name(process.pid))
+                processes[i] = start_worker(stop_event, i)
+            # Workers of other hosts, or of a previous run of this one
+            jobs.requeue_orphaned()
+        except Exception:
+            logger.exception("Ingestion worker supervision failed")
+
+    stop_event.set()
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()